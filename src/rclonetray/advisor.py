@@ -0,0 +1,278 @@
+"""Recommends listing and comparison flags for a transfer from what is known about both sides"""
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .index import ListingIndex
+from .jobs import write_json_atomic
+
+# Flags the advisor chooses between
+ADVISED_FLAGS = ('--fast-list', '--no-traverse', '--checksum', '--size-only')
+
+# Backends that can list a whole tree in a few calls (ListR)
+FAST_LIST_BACKENDS = ('s3', 'b2', 'google cloud storage', 'drive', 'swift', 'azureblob',
+                      'jottacloud', 'qingstor', 'oracleobjectstorage', 'storj')
+
+# Hash types a backend stores with each object, so comparing them costs nothing
+STORED_HASHES = {
+    's3': {'md5'},
+    'b2': {'sha1'},
+    'google cloud storage': {'md5', 'crc32c'},
+    'drive': {'md5', 'sha1', 'sha256'},
+    'azureblob': {'md5'},
+    'swift': {'md5'},
+    'dropbox': {'dropbox'},
+    'onedrive': {'quickxor', 'sha1'},
+    'box': {'sha1'},
+    'pcloud': {'md5', 'sha1'},
+    'jottacloud': {'md5'},
+    'oracleobjectstorage': {'md5'},
+}
+
+# Backends that need an extra request per object to read its modification time
+PER_OBJECT_MODTIME_BACKENDS = ('s3', 'swift', 'oracleobjectstorage')
+
+# Rough memory --fast-list needs per object, as it holds the whole listing
+FAST_LIST_BYTES_PER_OBJECT = 1024
+
+# --fast-list is not worth its memory below this many directories
+FAST_LIST_MIN_DIRS = 100
+
+# ...and is not recommended above this much memory
+FAST_LIST_MAX_MEMORY = 1024 ** 3
+
+# Objects returned per listing request by most backends
+LIST_PAGE_SIZE = 1000
+
+# Destination objects per source object before --no-traverse pays off
+NO_TRAVERSE_RATIO = 100
+
+# Past runs kept per backend pair and flag, and needed before they count
+HISTORY_SIZE = 20
+MIN_SAMPLES = 3
+
+def split_endpoint(path: str) -> Tuple[Optional[str], str]:
+    """Split 'remote:dir' into ('remote', 'dir'); local paths give (None, path)"""
+    if ':' in path and not path.startswith('/'):
+        remote, _, rest = path.partition(':')
+        return remote, rest.strip('/')
+    return None, path
+
+class Advice:
+    """Recommended flags for one transfer, with the reasoning and estimated cost"""
+
+    def __init__(self):
+        self.flags: List[str] = []
+        self.reasons: List[str] = []
+        self.source_stats: Optional[Dict[str, int]] = None
+        self.dest_stats: Optional[Dict[str, int]] = None
+        self.memory: int = 0  # Bytes held by --fast-list
+        self.calls_before: Optional[int] = None  # API calls with the job's own flags
+        self.calls_after: Optional[int] = None  # ...and with the recommended flags added
+
+    def summary(self) -> str:
+        """Human readable description of the advice"""
+        lines = []
+        for label, stats in (("Source", self.source_stats), ("Destination", self.dest_stats)):
+            if stats:
+                lines.append(f"{label}: {stats['objects']:,} files in {stats['dirs']:,} directories, "
+                             f"depth {stats['depth']}")
+        lines.extend(f"• {reason}" for reason in self.reasons)
+        if not self.flags:
+            lines.append("No extra flags recommended.")
+        if self.memory:
+            lines.append(f"Estimated extra memory: {self.memory / 1024 ** 2:.0f} MB")
+        if self.calls_before is not None and self.calls_after is not None:
+            lines.append(f"Estimated API calls: {self.calls_before:,} → {self.calls_after:,}")
+        return "\n".join(lines)
+
+class StrategyAdvisor:
+    """Picks --fast-list, --no-traverse, --checksum or --size-only for a job.
+
+    Decisions are based on the tree sizes in the search index and on what
+    each backend can do cheaply. Recorded run times per backend pair
+    override a rule once there are enough of them to disagree with it.
+    """
+
+    def __init__(self, index: ListingIndex, history_path: Path):
+        self.index = index
+        self.history_path = Path(history_path)
+        self.history = self._load()
+        self._stats: Dict[Tuple[str, str], tuple] = {}  # (remote, path) -> (indexed_at, stats)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+        if not self.history_path.exists():
+            return {}
+        try:
+            with open(self.history_path) as f:
+                history = json.load(f)
+            return history if isinstance(history, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"Error loading advisor history: {e}")
+            return {}
+
+    def tree_stats(self, path: str, cached_only: bool = False) -> Optional[Dict[str, int]]:
+        """Index statistics below a 'remote:path', reused until the remote is reindexed.
+
+        With ``cached_only`` the statistics last computed are returned without
+        querying the index, which makes the call cheap enough for the GUI thread.
+        """
+        remote, rel = split_endpoint(path)
+        if remote is None:
+            return None
+        if cached_only:
+            with self._lock:
+                cached = self._stats.get((remote, rel))
+            return cached[1] if cached else None
+        indexed_at = self.index.indexed_at(remote)
+        if not indexed_at:
+            return None
+        with self._lock:
+            cached = self._stats.get((remote, rel))
+        if cached and cached[0] == indexed_at:
+            return cached[1]
+        stats = self.index.tree_stats(remote, rel)
+        with self._lock:
+            self._stats[(remote, rel)] = (indexed_at, stats)
+        return stats
+
+    def advise(self, transfer_type: str, source: str, dest: str, flags: Optional[List[str]],
+               source_type: str, dest_type: str, cached_only: bool = False) -> Advice:
+        """Recommend flags for a sync or copy that are not already in ``flags``"""
+        flags = list(flags or [])
+        advice = Advice()
+        src = advice.source_stats = self.tree_stats(source, cached_only)
+        dst = advice.dest_stats = self.tree_stats(dest, cached_only)
+        wanted: List[str] = []
+
+        # Listing: one request per directory, or a few for the whole tree
+        listr = [stats for stats, backend in ((src, source_type), (dst, dest_type))
+                 if backend in FAST_LIST_BACKENDS and stats]
+        if listr:
+            dirs = max(stats['dirs'] for stats in listr)
+            memory = sum(stats['objects'] + stats['dirs'] for stats in listr) * FAST_LIST_BYTES_PER_OBJECT
+            if dirs >= FAST_LIST_MIN_DIRS and memory <= FAST_LIST_MAX_MEMORY:
+                wanted.append('--fast-list')
+                advice.reasons.append(f"--fast-list: {dirs:,} directories listed in bulk "
+                                      f"instead of one request each")
+            elif dirs >= FAST_LIST_MIN_DIRS:
+                advice.reasons.append(f"--fast-list skipped: the listing would need about "
+                                      f"{memory / 1024 ** 2:.0f} MB")
+
+        # A few files into a large destination: look them up instead of listing it
+        if transfer_type == 'copy' and src and dst and \
+                dst['objects'] >= max(src['objects'], 1) * NO_TRAVERSE_RATIO:
+            wanted.append('--no-traverse')
+            advice.reasons.append(f"--no-traverse: {src['objects']:,} files going into "
+                                  f"{dst['objects']:,}, so the destination is not listed")
+
+        # Comparison: stored hashes are free, per-object modtimes are not
+        shared = STORED_HASHES.get(source_type, set()) & STORED_HASHES.get(dest_type, set())
+        if shared:
+            wanted.append('--checksum')
+            advice.reasons.append(f"--checksum: both sides store {'/'.join(sorted(shared))} hashes, "
+                                  f"so no modification times are read")
+        elif source_type in PER_OBJECT_MODTIME_BACKENDS or dest_type in PER_OBJECT_MODTIME_BACKENDS:
+            if 'local' in (source_type, dest_type) and \
+                    (STORED_HASHES.get(source_type) or STORED_HASHES.get(dest_type)):
+                wanted.append('--checksum')
+                advice.reasons.append("--checksum: hashing the local files is cheaper than a "
+                                      "request per remote file for its modification time")
+            else:
+                wanted.append('--size-only')
+                advice.reasons.append("--size-only: reading modification times costs a request per "
+                                      "file and there is no common hash (same-size edits are missed)")
+
+        wanted = self._apply_history(wanted, advice, transfer_type, source_type, dest_type)
+        if '--checksum' in flags or '--size-only' in flags:
+            wanted = [flag for flag in wanted if flag not in ('--checksum', '--size-only')]
+        advice.flags = [flag for flag in wanted if flag not in flags]
+
+        if '--fast-list' in advice.flags:
+            advice.memory = sum(stats['objects'] + stats['dirs'] for stats in listr) * FAST_LIST_BYTES_PER_OBJECT
+        # Costs are only estimated when both trees are known
+        if (src or source_type == 'local') and (dst or dest_type == 'local'):
+            advice.calls_before = self.estimate_calls(src, dst, source_type, dest_type, flags)
+            advice.calls_after = self.estimate_calls(src, dst, source_type, dest_type,
+                                                     flags + advice.flags)
+        return advice
+
+    def _apply_history(self, wanted: List[str], advice: Advice, transfer_type: str,
+                       source_type: str, dest_type: str) -> List[str]:
+        """Drop or add flags where past runs of this backend pair disagree with the rules"""
+        with self._lock:
+            pair = dict(self.history.get(f"{source_type}->{dest_type}", {}))
+        result = list(wanted)
+        for flag in ADVISED_FLAGS:
+            runs = pair.get(flag, {})
+            with_flag, without = runs.get('with', []), runs.get('without', [])
+            if len(with_flag) < MIN_SAMPLES or len(without) < MIN_SAMPLES:
+                continue
+            faster = sum(with_flag) / len(with_flag) < sum(without) / len(without)
+            if flag in result and not faster:
+                result.remove(flag)
+                advice.reasons.append(f"{flag} dropped: past runs were faster without it")
+            elif flag not in result and faster:
+                if flag == '--no-traverse' and transfer_type != 'copy':
+                    continue
+                if flag == '--fast-list' and \
+                        source_type not in FAST_LIST_BACKENDS and dest_type not in FAST_LIST_BACKENDS:
+                    continue
+                other = {'--checksum': '--size-only', '--size-only': '--checksum'}.get(flag)
+                if other in result:
+                    continue
+                result.append(flag)
+                advice.reasons.append(f"{flag}: past runs were faster with it")
+        return result
+
+    @staticmethod
+    def estimate_calls(src: Optional[Dict[str, int]], dst: Optional[Dict[str, int]],
+                       source_type: str, dest_type: str, flags: List[str]) -> int:
+        """Rough number of API requests a sync or copy makes with ``flags``"""
+        fast_list = '--fast-list' in flags
+        modtimes = '--checksum' not in flags and '--size-only' not in flags
+
+        def listing(stats, backend):
+            if backend == 'local' or not stats:
+                return 0
+            pages = math.ceil(stats['objects'] / LIST_PAGE_SIZE)
+            if fast_list and backend in FAST_LIST_BACKENDS:
+                return pages + 1
+            return max(stats['dirs'] + 1, pages)
+
+        calls = listing(src, source_type)
+        if '--no-traverse' in flags and src:
+            # Each source file is looked up on the destination instead
+            calls += src['objects'] if dest_type != 'local' else 0
+        else:
+            calls += listing(dst, dest_type)
+        if modtimes:
+            for stats, backend in ((src, source_type), (dst, dest_type)):
+                if stats and backend in PER_OBJECT_MODTIME_BACKENDS:
+                    calls += stats['objects']
+        return calls
+
+    def record(self, transfer_type: str, source: str, dest: str, source_type: str,
+               dest_type: str, flags: List[str], duration: float):
+        """Remember how long a finished job took per thousand files with its flags"""
+        # After a sync or copy the destination holds every source file, so its
+        # size stands in for a source that is not indexed, such as a local folder
+        stats = self.tree_stats(source) or self.tree_stats(dest)
+        if not stats or not stats['objects'] or duration <= 0:
+            return
+        rate = duration * 1000 / stats['objects']
+        with self._lock:
+            pair = self.history.setdefault(f"{source_type}->{dest_type}", {})
+            for flag in ADVISED_FLAGS:
+                if flag == '--no-traverse' and transfer_type != 'copy':
+                    continue
+                runs = pair.setdefault(flag, {'with': [], 'without': []})
+                key = 'with' if flag in flags else 'without'
+                runs[key] = (runs[key] + [round(rate, 3)])[-HISTORY_SIZE:]
+            try:
+                write_json_atomic(self.history_path, self.history)
+            except OSError as e:
+                print(f"Error saving advisor history: {e}")
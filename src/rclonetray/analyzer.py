@@ -0,0 +1,155 @@
+"""Storage usage analysis of a remote from a streamed recursive listing"""
+
+import heapq
+import pickle
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .listing import stream_rclone
+
+# Bump when the cache layout changes so old caches are rescanned
+CACHE_VERSION = 1
+
+# Largest individual files remembered alongside the directory totals
+TOP_FILES = 100
+
+class SizeTree:
+    """Directory tree with aggregated sizes, stored in parallel arrays.
+
+    Only directories get a node; files are folded into their directory's
+    size and count as they stream in, so memory grows with the number of
+    directories rather than files. Node 0 is the root.
+    """
+
+    def __init__(self):
+        self.names: List[str] = ['']
+        self.parents = array('i', [-1])
+        self.own_sizes = array('q', [0])  # Bytes of the files directly in the directory
+        self.own_counts = array('q', [0])
+        self.sizes = array('q')  # Totals including subdirectories, filled by finish()
+        self.counts = array('q')
+        self.children: Dict[int, List[int]] = {}
+        self.top_files: List[Tuple[int, str]] = []  # Min-heap of (size, path)
+        self.scanned_at: Optional[float] = None
+        self._index: Dict[str, int] = {'': 0}  # Directory path -> node, only while building
+
+    def _node(self, path: str) -> int:
+        node = self._index.get(path)
+        if node is None:
+            parent_path, _, name = path.rpartition('/')
+            parent = self._node(parent_path)
+            node = len(self.names)
+            self.names.append(name)
+            self.parents.append(parent)
+            self.own_sizes.append(0)
+            self.own_counts.append(0)
+            self._index[path] = node
+        return node
+
+    def add_file(self, path: str, size: int):
+        size = max(size, 0)  # Unknown sizes are reported as -1
+        directory = path.rpartition('/')[0]
+        node = self._node(directory)
+        self.own_sizes[node] += size
+        self.own_counts[node] += 1
+        if len(self.top_files) < TOP_FILES:
+            heapq.heappush(self.top_files, (size, path))
+        elif size > self.top_files[0][0]:
+            heapq.heapreplace(self.top_files, (size, path))
+
+    def finish(self):
+        """Compute the totals once every file has been added"""
+        self.sizes = array('q', self.own_sizes)
+        self.counts = array('q', self.own_counts)
+        # Children always come after their parent, so one reverse pass sums everything
+        for node in range(len(self.names) - 1, 0, -1):
+            parent = self.parents[node]
+            self.sizes[parent] += self.sizes[node]
+            self.counts[parent] += self.counts[node]
+        self._build_children()
+        self.top_files.sort(reverse=True)
+        self._index = {}
+        self.scanned_at = time.time()
+
+    def _build_children(self):
+        """Child lists for browsing, largest first; rebuilt rather than cached"""
+        self.children = {}
+        for node in range(1, len(self.names)):
+            self.children.setdefault(self.parents[node], []).append(node)
+        for nodes in self.children.values():
+            nodes.sort(key=lambda child: self.sizes[child], reverse=True)
+
+    def path(self, node: int) -> str:
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parents[node]
+        return '/'.join(reversed(parts))
+
+    def find(self, path: str) -> Optional[int]:
+        """Node of a directory path, walking down from the root"""
+        node = 0
+        for name in filter(None, path.split('/')):
+            node = next((child for child in self.children.get(node, []) if self.names[child] == name), None)
+            if node is None:
+                return None
+        return node
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {key: value for key, value in self.__dict__.items() if key not in ('children', '_index')}
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['SizeTree']:
+        """Load a cached analysis, or None if there is no usable one"""
+        try:
+            with open(path, 'rb') as f:
+                version, state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading storage analysis {path}: {e}")
+            return None
+        if version != CACHE_VERSION:
+            return None
+        tree = cls()
+        tree.__dict__.update(state)
+        tree._index = {}
+        tree._build_children()
+        return tree
+
+def scan_remote(remote: str, cache_path: Path, progress: Optional[Callable[[int], None]] = None,
+                should_stop: Callable[[], bool] = lambda: False) -> Optional[SizeTree]:
+    """List every file of ``remote`` into a SizeTree and cache it on disk.
+
+    Returns None if stopped. ``progress`` is called with the number of
+    files read so far every few thousand files.
+    """
+    # lsf prints "size<TAB>path" per file, far less to parse than lsjson
+    args = ['rclone', 'lsf', '-R', '--files-only', '--format', 'sp', '--separator', '\t',
+            f'{remote}:']
+    tree = SizeTree()
+    count = 0
+    for line in stream_rclone(args, should_stop):
+        size_text, _, file_path = line.rstrip('\n').partition('\t')
+        try:
+            tree.add_file(file_path, int(size_text))
+        except ValueError:
+            continue
+        count += 1
+        if progress and count % 5000 == 0:
+            progress(count)
+    if should_stop():
+        return None
+
+    tree.finish()
+    try:
+        tree.save(cache_path)
+    except OSError as e:
+        print(f"Error caching storage analysis of {remote}: {e}")
+    return tree
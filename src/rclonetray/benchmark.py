@@ -0,0 +1,324 @@
+"""Mount I/O benchmark comparing mount profiles against a local stand-in remote"""
+
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .diskguard import format_version
+from .runner import get_runner
+
+# Flags that differ between profiles; everything else matches a normal mount
+MOUNT_PROFILES = {
+    'default': ['--vfs-read-chunk-size', '32M', '--vfs-read-ahead', '128M', '--buffer-size', '32M'],
+    'low-memory': ['--vfs-read-chunk-size', '8M', '--vfs-read-ahead', '0', '--buffer-size', '0'],
+    'streaming': ['--vfs-read-chunk-size', '64M', '--vfs-read-ahead', '512M', '--buffer-size', '64M'],
+    'random-access': ['--vfs-read-chunk-size', '1M', '--vfs-read-ahead', '0', '--buffer-size', '1M'],
+}
+
+# Metric key, label, unit and whether a higher value is better
+METRICS = (
+    ('mount_ms', 'Mount time', 'ms', False),
+    ('seq_write_mbps', 'Sequential write', 'MB/s', True),
+    ('seq_read_mbps', 'Sequential read (cold)', 'MB/s', True),
+    ('rand_read_iops', 'Random 4K read', 'IOPS', True),
+    ('rand_read_p50_ms', 'Random 4K read p50', 'ms', False),
+    ('rand_read_p95_ms', 'Random 4K read p95', 'ms', False),
+    ('small_create_per_s', 'Small-file create', 'files/s', True),
+    ('list_cold_ms', 'Directory listing (cold)', 'ms', False),
+    ('list_warm_ms', 'Directory listing (warm)', 'ms', False),
+)
+
+# Relative change against an older report that counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# Seconds a profile's mount gets to come up, and to go away again
+MOUNT_TIMEOUT = 15
+UNMOUNT_TIMEOUT = 10
+
+# Bytes per read or write call for the sequential tests
+BLOCK_SIZE = 1024 * 1024
+
+# Bytes per random read
+RANDOM_READ_SIZE = 4096
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``, 0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+class BenchmarkOptions:
+    """Sizes of the benchmark workloads"""
+
+    def __init__(self, file_size_mb: int = 256, random_reads: int = 500,
+                 small_files: int = 200, list_entries: int = 2000):
+        self.file_size_mb = file_size_mb
+        self.random_reads = random_reads
+        self.small_files = small_files
+        self.list_entries = list_entries
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+class BenchmarkReport:
+    """Results of one benchmark run, saved as sorted JSON so runs diff cleanly"""
+
+    def __init__(self, rclone_version: str = '', options: Optional[Dict[str, int]] = None):
+        self.rclone_version = rclone_version
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.options = options or {}
+        self.profiles: Dict[str, List[str]] = {}  # Name -> flags
+        self.results: Dict[str, Dict[str, float]] = {}  # Profile -> metric -> value
+        self.errors: Dict[str, str] = {}  # Profile -> what went wrong
+
+    def to_dict(self) -> dict:
+        return {
+            'rclone_version': self.rclone_version,
+            'created_at': self.created_at,
+            'options': self.options,
+            'profiles': self.profiles,
+            'results': self.results,
+            'errors': self.errors,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BenchmarkReport':
+        report = cls(data.get('rclone_version', ''), data.get('options'))
+        report.created_at = data.get('created_at', '')
+        report.profiles = data.get('profiles', {})
+        report.results = data.get('results', {})
+        report.errors = data.get('errors', {})
+        return report
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path: Path) -> 'BenchmarkReport':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def default_name(self) -> str:
+        """File name for the report, by rclone version and date"""
+        version = self.rclone_version.replace(' ', '_') or 'unknown'
+        return f"mount-{version}-{self.created_at[:10]}.json"
+
+    def format(self) -> str:
+        """Plain text table of all metrics per profile"""
+        names = list(self.results) + [name for name in self.errors if name not in self.results]
+        lines = [f"rclone {self.rclone_version or '(unknown version)'}, {self.created_at}"]
+        width = max([len(label) + len(unit) + 3 for _, label, unit, _ in METRICS])
+        lines.append(' ' * width + ''.join(f"{name:>16}" for name in names))
+        for key, label, unit, _ in METRICS:
+            cells = []
+            for name in names:
+                value = self.results.get(name, {}).get(key)
+                cells.append(f"{value:>16.1f}" if value is not None else f"{'-':>16}")
+            lines.append(f"{label} ({unit})".ljust(width) + ''.join(cells))
+        for name, error in self.errors.items():
+            lines.append(f"{name}: {error}")
+        return "\n".join(lines)
+
+    def compare(self, older: 'BenchmarkReport') -> str:
+        """Change of every metric against an older report, regressions marked"""
+        lines = [f"rclone {older.rclone_version} ({older.created_at}) -> "
+                 f"{self.rclone_version} ({self.created_at})"]
+        if older.options != self.options:
+            lines.append("Warning: the reports used different workload sizes")
+        for name in self.results:
+            before = older.results.get(name)
+            if before is None:
+                continue
+            if older.profiles.get(name) != self.profiles.get(name):
+                lines.append(f"{name}: flags differ, {older.profiles.get(name)} -> {self.profiles.get(name)}")
+            lines.append(f"{name}:")
+            for key, label, unit, higher_better in METRICS:
+                old, new = before.get(key), self.results[name].get(key)
+                if old is None or new is None:
+                    continue
+                change = (new - old) / old if old else 0.0
+                worse = change < -REGRESSION_THRESHOLD if higher_better else change > REGRESSION_THRESHOLD
+                marker = '  REGRESSION' if worse else ''
+                lines.append(f"  {label}: {old:.1f} -> {new:.1f} {unit} ({change:+.0%}){marker}")
+        return "\n".join(lines)
+
+def _write_file(path: Path, size: int):
+    block = os.urandom(BLOCK_SIZE)
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            remaining -= f.write(block[:min(BLOCK_SIZE, remaining)])
+
+def _seed(source: Path, options: BenchmarkOptions):
+    """Create the files the read and listing tests use, directly in the stand-in remote"""
+    size = options.file_size_mb * 1024 * 1024
+    _write_file(source / 'sequential.bin', size)
+    _write_file(source / 'random.bin', size)
+    listing = source / 'listing'
+    listing.mkdir()
+    for i in range(options.list_entries):
+        (listing / f"entry_{i:06d}.txt").write_bytes(b'x')
+
+def _wait_until(check: Callable[[], bool], timeout: float) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if check():
+            return True
+        time.sleep(0.05)
+    return check()
+
+class _Mount:
+    """An rclone mount of the stand-in remote with one profile's flags"""
+
+    def __init__(self, rclone: str, source: Path, mount_point: Path, cache_dir: Path,
+                 log_path: Path, flags: List[str]):
+        self.mount_point = mount_point
+        self.log_path = log_path
+        mount_point.mkdir()
+        with open(log_path, 'w') as log:
+            self.process = subprocess.Popen(
+                [rclone, 'mount', f':local:{source}', str(mount_point), '--vfs-cache-mode', 'full',
+                 '--cache-dir', str(cache_dir), '--dir-cache-time', '1h', *flags],
+                stdout=subprocess.DEVNULL, stderr=log
+            )
+
+    def wait_mounted(self) -> float:
+        """Milliseconds until the mount is up; raises if rclone gives up"""
+        start = time.monotonic()
+        mounted = _wait_until(lambda: os.path.ismount(self.mount_point) or self.process.poll() is not None,
+                              MOUNT_TIMEOUT)
+        if self.process.poll() is not None:
+            with open(self.log_path, errors='replace') as log:
+                error = log.read().strip().splitlines()
+            raise RuntimeError(error[-1] if error else f"rclone exited with code {self.process.returncode}")
+        if not mounted:
+            raise RuntimeError(f"Not mounted after {MOUNT_TIMEOUT} s")
+        return (time.monotonic() - start) * 1000
+
+    def close(self):
+        # rclone unmounts itself on SIGTERM; fusermount cleans up if it can't
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(UNMOUNT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if os.path.ismount(self.mount_point):
+            get_runner().run(['fusermount', '-uz', str(self.mount_point)], timeout=UNMOUNT_TIMEOUT)
+
+def _measure(mount_point: Path, options: BenchmarkOptions, results: Dict[str, float]):
+    """Run every workload through a mount, filling ``results`` as they finish"""
+    size = options.file_size_mb * 1024 * 1024
+
+    start = time.monotonic()
+    _write_file(mount_point / 'written.bin', size)
+    results['seq_write_mbps'] = options.file_size_mb / max(time.monotonic() - start, 1e-6)
+
+    start = time.monotonic()
+    with open(mount_point / 'sequential.bin', 'rb') as f:
+        while f.read(BLOCK_SIZE):
+            pass
+    results['seq_read_mbps'] = options.file_size_mb / max(time.monotonic() - start, 1e-6)
+
+    latencies = []
+    rng = random.Random(0)  # Same offsets for every profile and run
+    fd = os.open(mount_point / 'random.bin', os.O_RDONLY)
+    try:
+        start = time.monotonic()
+        for _ in range(options.random_reads):
+            offset = rng.randrange(0, max(size - RANDOM_READ_SIZE, 1))
+            read_start = time.monotonic()
+            os.pread(fd, RANDOM_READ_SIZE, offset)
+            latencies.append((time.monotonic() - read_start) * 1000)
+        elapsed = time.monotonic() - start
+    finally:
+        os.close(fd)
+    results['rand_read_iops'] = options.random_reads / max(elapsed, 1e-6)
+    results['rand_read_p50_ms'] = percentile(latencies, 50)
+    results['rand_read_p95_ms'] = percentile(latencies, 95)
+
+    small = mount_point / 'small'
+    small.mkdir()
+    payload = b'x' * 4096
+    start = time.monotonic()
+    for i in range(options.small_files):
+        with open(small / f"file_{i:06d}.txt", 'wb') as f:
+            f.write(payload)
+    results['small_create_per_s'] = options.small_files / max(time.monotonic() - start, 1e-6)
+
+    for key in ('list_cold_ms', 'list_warm_ms'):
+        start = time.monotonic()
+        with os.scandir(mount_point / 'listing') as entries:
+            for entry in entries:
+                entry.stat()
+        results[key] = (time.monotonic() - start) * 1000
+
+def run_benchmark(profiles: Dict[str, List[str]], options: Optional[BenchmarkOptions] = None,
+                  rclone: str = 'rclone', progress: Optional[Callable[[str], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  work_dir: Optional[Path] = None,
+                  rclone_version: Tuple[int, ...] = ()) -> BenchmarkReport:
+    """Mount a temporary local remote once per profile and measure each.
+
+    Every profile gets a fresh copy of the seeded files and an empty VFS
+    cache, so cold reads go through rclone's chunked reader every time.
+    ``work_dir`` should be on the disk that holds the real VFS cache, and
+    ``rclone_version`` is the parsed version the report is filed under.
+    """
+    options = options or BenchmarkOptions()
+    report = BenchmarkReport(format_version(rclone_version), options.to_dict())
+    if work_dir:
+        Path(work_dir).mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(prefix='rclonetray-bench-', dir=work_dir))
+    try:
+        seed = work / 'seed'
+        seed.mkdir()
+        if progress:
+            progress("Creating test files...")
+        _seed(seed, options)
+
+        for name, flags in profiles.items():
+            if should_stop and should_stop():
+                break
+            if progress:
+                progress(f"Benchmarking {name}...")
+            report.profiles[name] = list(flags)
+            profile_dir = work / name
+            profile_dir.mkdir()
+            source = profile_dir / 'remote'
+            shutil.copytree(seed, source)
+
+            mount = _Mount(rclone, source, profile_dir / 'mnt', profile_dir / 'cache',
+                           profile_dir / 'rclone.log', flags)
+            results: Dict[str, float] = {}
+            try:
+                results['mount_ms'] = mount.wait_mounted()
+                _measure(profile_dir / 'mnt', options, results)
+            except (OSError, RuntimeError) as e:
+                report.errors[name] = str(e)
+                print(f"Benchmark of profile {name} failed: {e}")
+            finally:
+                mount.close()
+            if results:
+                report.results[name] = {key: round(value, 3) for key, value in results.items()}
+            if not os.path.ismount(profile_dir / 'mnt'):
+                shutil.rmtree(profile_dir, ignore_errors=True)
+    finally:
+        # Never walk into a mount that refused to go away
+        if not any(os.path.ismount(path / 'mnt') for path in work.iterdir() if path.is_dir()):
+            shutil.rmtree(work, ignore_errors=True)
+    return report
@@ -18,6 +18,18 @@ class Config:
             'mount_options': '--vfs-cache-mode=full',
             'auto_mount': False,
             'mount_on_startup': False,
+            'long_dir_cache': True,  # Cache directories for long on backends that report changes
+            'prewarm_dir_cache': False,  # Load the directory tree after mounting (prewarm_paths per remote)
+            'health_check_interval': 30,  # Seconds between mount probes
+            'health_check_deadline': 5.0,  # Seconds before a mount counts as stale
+            'health_slow_threshold': 1.0,  # Seconds before an operation counts as slow
+            'pin_refresh_interval': 1800,  # Seconds between re-warms of offline folders (below --vfs-cache-max-age)
+            'pin_rate_limit': 10.0,  # MB/s read while prefetching offline folders, 0 for unlimited
+            'disk_guard': True,  # Size the VFS cache to its disk and pause local writes before a disk fills
+            'disk_guard_interval': 15,  # Seconds between free space checks
+            'disk_min_free_gb': 2.0,  # GB kept free on the cache and destination disks
+            'vfs_cache_share': 0.5,  # Share of the cache disk's usable space --vfs-cache-max-size may take
+            'disk_low_bwlimit': '10M',  # --bwlimit of new transfers into a disk that is running low
             
             # Interface Settings
             'start_minimized': True,
@@ -28,10 +40,26 @@ class Config:
             # Advanced Settings
             'rclone_path': 'rclone',
             'config_path': str(Path.home() / '.config' / 'rclone' / 'rclone.conf'),
+            'data_dir': str(Path.home() / '.config' / 'archclonetray'),
             'log_level': 'INFO',
             'check_updates': True,
             'buffer_size': '256M',
             'transfers': 4,
+            'auto_resume_jobs': False,  # Relaunch unfinished jobs without asking
+            'auto_retry_failed': False,  # Re-run failed files of a transfer automatically
+            'max_failed_retries': 3,
+            'retry_backoff': 30,  # Seconds before the first retry, doubled each time
+            'watch_debounce': 1.0,  # Seconds of quiet before watched changes are pushed
+            'watch_full_interval': 3600,  # Seconds between full runs of a watched folder
+            'listing_cache_ttl': 300,  # Seconds remote directory listings are reused
+            'index_interval': 3600,  # Seconds between incremental refreshes of the search index
+            'index_full_interval': 86400,  # Seconds between full relistings (catch deletions)
+            'index_tpslimit': 10,  # Max API transactions per second while indexing
+            'coalesce_window': 1.0,  # Seconds queued single-file copies wait to be batched together
+            'rewrite_mounted_paths': True,  # Read transfer sources inside our mounts straight from the remote
+            'prefer_server_side': True,  # Copy within a provider account without downloading
+            'auto_apply_advice': False,  # Add advised --fast-list/--checksum/... flags to sync and copy jobs
+            'speed_test_transfers': True,  # Default --transfers of a remote from its last speed test
             
             # Remote Settings
             'remotes': {},  # Store per-remote settings
@@ -42,6 +70,9 @@ class Config:
             'timeout': 30,
             'retries': 3,
             'low_level_retries': 10,
+            'command_timeout': 30,  # Seconds before a helper command is abandoned
+            'shutdown_timeout': 10.0,  # Seconds allowed for unmounting and stopping transfers
+            'cancel_kill_timeout': 5.0,  # Seconds before a cancelled transfer is killed
         }
         
         # Only set defaults if they don't exist
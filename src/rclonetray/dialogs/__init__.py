@@ -7,6 +7,13 @@ from .rclone_config import RcloneConfigDialog
 from .dashboard import DashboardDialog
 from .transfer import TransferDialog
 from .new_remote import NewRemoteDialog
+from .schedules import SchedulesDialog
+from .remote_browser import RemoteBrowserDialog
+from .storage import StorageAnalyzerDialog
+from .duplicates import DuplicatesDialog
+from .preview import PreviewDialog
+from .benchmark import MountBenchmarkDialog
+from .speedtest import SpeedTestDialog
 
 __all__ = [
     'PreferencesDialog',
@@ -15,5 +22,12 @@ __all__ = [
     'RcloneConfigDialog',
     'DashboardDialog',
     'TransferDialog',
-    'NewRemoteDialog'
+    'NewRemoteDialog',
+    'SchedulesDialog',
+    'RemoteBrowserDialog',
+    'StorageAnalyzerDialog',
+    'DuplicatesDialog',
+    'PreviewDialog',
+    'MountBenchmarkDialog',
+    'SpeedTestDialog'
 ]
@@ -0,0 +1,189 @@
+"""Mount Benchmark Dialog"""
+
+import shlex
+import threading
+from pathlib import Path
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QCheckBox, QGroupBox, QFormLayout, QSpinBox,
+                           QLineEdit, QTextEdit, QFileDialog, QMessageBox)
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+from ..benchmark import MOUNT_PROFILES, BenchmarkOptions, BenchmarkReport, run_benchmark
+
+class MountBenchmarkDialog(QDialog):
+    """Compare mount profiles on a temporary local remote"""
+
+    def __init__(self, rclone_manager, parent=None):
+        super().__init__(parent)
+        self.rclone = rclone_manager
+        self.reports_dir = rclone_manager.data_dir / 'benchmarks'
+        self.report = None
+        self.running = False
+        self.message = ""  # Progress message set by the worker
+        self.stop_event = threading.Event()
+        self.setWindowTitle("Benchmark Mount Profiles")
+        self.setMinimumSize(750, 550)
+
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(lambda: self.status_label.setText(self.message))
+
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        profiles_group = QGroupBox("Profiles")
+        profiles_layout = QVBoxLayout()
+        self.profile_boxes = {}
+        for name, flags in MOUNT_PROFILES.items():
+            box = QCheckBox(f"{name}: {' '.join(flags)}")
+            box.setChecked(True)
+            self.profile_boxes[name] = box
+            profiles_layout.addWidget(box)
+        self.custom_flags = QLineEdit()
+        self.custom_flags.setPlaceholderText("Custom profile, e.g. --vfs-read-chunk-size 16M --vfs-read-ahead 64M")
+        profiles_layout.addWidget(self.custom_flags)
+        profiles_group.setLayout(profiles_layout)
+        layout.addWidget(profiles_group)
+
+        workload_group = QGroupBox("Workload")
+        workload_layout = QFormLayout()
+        defaults = BenchmarkOptions()
+        self.file_size = QSpinBox()
+        self.file_size.setRange(1, 16384)
+        self.file_size.setSuffix(" MB")
+        self.file_size.setValue(defaults.file_size_mb)
+        workload_layout.addRow("Sequential/random file size:", self.file_size)
+        self.random_reads = QSpinBox()
+        self.random_reads.setRange(1, 100000)
+        self.random_reads.setValue(defaults.random_reads)
+        workload_layout.addRow("Random 4K reads:", self.random_reads)
+        self.small_files = QSpinBox()
+        self.small_files.setRange(1, 100000)
+        self.small_files.setValue(defaults.small_files)
+        workload_layout.addRow("Small files created:", self.small_files)
+        self.list_entries = QSpinBox()
+        self.list_entries.setRange(1, 1000000)
+        self.list_entries.setValue(defaults.list_entries)
+        workload_layout.addRow("Directory entries listed:", self.list_entries)
+        workload_group.setLayout(workload_layout)
+        layout.addWidget(workload_group)
+
+        self.output = QTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setFont(QFont('monospace'))
+        layout.addWidget(self.output)
+
+        self.status_label = QLabel("Each profile mounts a temporary local remote in ~/.cache; "
+                                   "nothing is uploaded.")
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        self.run_btn = QPushButton("Run Benchmark")
+        self.run_btn.clicked.connect(self.run)
+        buttons.addWidget(self.run_btn)
+
+        self.save_btn = QPushButton("Save Report...")
+        self.save_btn.clicked.connect(self.save_report)
+        self.save_btn.setEnabled(False)
+        buttons.addWidget(self.save_btn)
+
+        self.compare_btn = QPushButton("Compare With...")
+        self.compare_btn.clicked.connect(self.compare_report)
+        self.compare_btn.setEnabled(False)
+        buttons.addWidget(self.compare_btn)
+
+        buttons.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def selected_profiles(self):
+        profiles = {name: MOUNT_PROFILES[name] for name, box in self.profile_boxes.items()
+                    if box.isChecked()}
+        custom = self.custom_flags.text().strip()
+        if custom:
+            profiles['custom'] = shlex.split(custom)
+        return profiles
+
+    def run(self):
+        """Benchmark the selected profiles in the background"""
+        profiles = self.selected_profiles()
+        if not profiles or self.running:
+            return
+        options = BenchmarkOptions(self.file_size.value(), self.random_reads.value(),
+                                   self.small_files.value(), self.list_entries.value())
+        self.running = True
+        self.stop_event.clear()
+        self.run_btn.setEnabled(False)
+        self.message = "Starting..."
+        self.progress_timer.start(500)
+        # On the disk that holds the real VFS cache, not a tmpfs
+        self.rclone.runner.run_long(
+            run_benchmark, self.show_report, profiles, options, 'rclone',
+            self.set_message, self.stop_event.is_set, Path.home() / '.cache' / 'rclonetray-benchmark',
+            self.rclone.rclone_version
+        )
+
+    def set_message(self, message):
+        self.message = message
+
+    def show_report(self, report, error):
+        self.running = False
+        self.progress_timer.stop()
+        self.run_btn.setEnabled(True)
+        if error:
+            self.status_label.setText(f"Benchmark failed: {error}")
+            return
+        self.report = report
+        self.output.setPlainText(report.format())
+        self.save_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
+
+        # Kept so later runs, e.g. after an rclone upgrade, can be compared
+        path = self.reports_dir / report.default_name()
+        try:
+            report.save(path)
+            self.status_label.setText(f"Report saved to {path}")
+        except OSError as e:
+            self.status_label.setText(f"Could not save report: {e}")
+
+    def save_report(self):
+        if not self.report:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Report", str(self.reports_dir / self.report.default_name()), "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self.report.save(Path(path))
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to save report: {e}")
+
+    def compare_report(self):
+        """Show how this run differs from an earlier report"""
+        if not self.report:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Compare With", str(self.reports_dir), "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            older = BenchmarkReport.load(Path(path))
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to read report: {e}")
+            return
+        self.output.setPlainText(self.report.format() + "\n\n" + self.report.compare(older))
+
+    def done(self, result):
+        # Stop after the current profile; its mount is cleaned up by the worker
+        self.stop_event.set()
+        self.progress_timer.stop()
+        super().done(result)
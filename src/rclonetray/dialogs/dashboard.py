@@ -1,17 +1,36 @@
 """Rclone Dashboard Dialog"""
 
 import json
+import os
+import shutil
 import subprocess
+import time
 from pathlib import Path
 from datetime import datetime
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                            QLabel, QTableWidget, QTableWidgetItem, QTabWidget,
                            QWidget, QProgressBar, QGroupBox, QFormLayout,
-                           QScrollArea, QMenu, QMessageBox, QComboBox)
+                           QScrollArea, QMenu, QMessageBox, QComboBox, QLineEdit,
+                           QFileDialog)
 from PyQt6.QtCore import Qt, QTimer, pyqtSlot, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 import psutil
 from .transfer import TransferDialog
+from .schedules import SchedulesDialog
+from .storage import StorageAnalyzerDialog
+from .duplicates import DuplicatesDialog
+from .preview import PreviewDialog
+from .benchmark import MountBenchmarkDialog
+from .speedtest import SpeedTestDialog
+from ..probe import HEALTHY, SLOW, STALE
+from ..serve import PROTOCOLS
+from ..formatting import format_size
+
+HEALTH_COLORS = {
+    HEALTHY: Qt.GlobalColor.green,
+    SLOW: Qt.GlobalColor.darkYellow,
+    STALE: Qt.GlobalColor.red,
+}
 
 class DashboardDialog(QDialog):
     def __init__(self, config, rclone_manager, parent=None):
@@ -21,6 +40,8 @@ class DashboardDialog(QDialog):
         self.setWindowTitle('RcloneTray Dashboard')
         self.setMinimumSize(800, 600)
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.remote_states = {}  # Remote -> (type, mounted), filled in the background
+        self.remote_states_pending = False
         
         # Update timer
         self.timer = QTimer(self)
@@ -38,6 +59,7 @@ class DashboardDialog(QDialog):
         tabs.addTab(self.create_overview_tab(), "Overview")
         tabs.addTab(self.create_mounts_tab(), "Mounts")
         tabs.addTab(self.create_transfers_tab(), "Transfers")
+        tabs.addTab(self.create_search_tab(), "Search")
         layout.addWidget(tabs)
         
         # Bottom buttons
@@ -114,8 +136,8 @@ class DashboardDialog(QDialog):
         mounts_layout = QVBoxLayout()
         
         self.mounts_table = QTableWidget()
-        self.mounts_table.setColumnCount(4)
-        self.mounts_table.setHorizontalHeaderLabels(["Remote", "Mount Point", "Status", "Actions"])
+        self.mounts_table.setColumnCount(5)
+        self.mounts_table.setHorizontalHeaderLabels(["Remote", "Mount Point", "Status", "Latency", "Actions"])
         self.mounts_table.horizontalHeader().setStretchLastSection(True)
         self.mounts_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.mounts_table.customContextMenuRequested.connect(self.show_mount_context_menu)
@@ -125,6 +147,21 @@ class DashboardDialog(QDialog):
         mounts_group.setLayout(mounts_layout)
         layout.addWidget(mounts_group)
         
+        # rclone serve endpoints
+        serve_group = QGroupBox("Served Endpoints")
+        serve_layout = QVBoxLayout()
+        
+        self.serve_table = QTableWidget()
+        self.serve_table.setColumnCount(5)
+        self.serve_table.setHorizontalHeaderLabels(["Remote", "Protocol", "Address", "Status", "Actions"])
+        self.serve_table.horizontalHeader().setStretchLastSection(True)
+        self.serve_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        serve_layout.addWidget(self.serve_table)
+        
+        serve_group.setLayout(serve_layout)
+        layout.addWidget(serve_group)
+        self.rclone.serve.endpoints_changed.connect(self.update_serve_table)
+        
         # Controls
         controls = QHBoxLayout()
         
@@ -132,11 +169,15 @@ class DashboardDialog(QDialog):
         refresh_btn.clicked.connect(self.update_stats)
         controls.addWidget(refresh_btn)
         
+        benchmark_btn = QPushButton("Benchmark Mount Profiles...")
+        benchmark_btn.clicked.connect(lambda: MountBenchmarkDialog(self.rclone, self).exec())
+        controls.addWidget(benchmark_btn)
+        
         controls.addStretch()
         
-        unmount_all_btn = QPushButton("Unmount All")
-        unmount_all_btn.clicked.connect(self.unmount_all)
-        controls.addWidget(unmount_all_btn)
+        self.unmount_all_btn = QPushButton("Unmount All")
+        self.unmount_all_btn.clicked.connect(self.unmount_all)
+        controls.addWidget(self.unmount_all_btn)
         
         layout.addLayout(controls)
         tab.setLayout(layout)
@@ -159,6 +200,26 @@ class DashboardDialog(QDialog):
         copy_btn.clicked.connect(self.start_copy)
         controls.addWidget(copy_btn)
         
+        bisync_btn = QPushButton("New Bisync")
+        bisync_btn.clicked.connect(self.start_bisync)
+        controls.addWidget(bisync_btn)
+        
+        replicate_btn = QPushButton("New Replication")
+        replicate_btn.clicked.connect(self.start_replication)
+        controls.addWidget(replicate_btn)
+        
+        watch_btn = QPushButton("New Watch")
+        watch_btn.clicked.connect(self.start_watch)
+        controls.addWidget(watch_btn)
+        
+        schedules_btn = QPushButton("Schedules...")
+        schedules_btn.clicked.connect(self.show_schedules)
+        controls.addWidget(schedules_btn)
+        
+        cancel_all_btn = QPushButton("Cancel All")
+        cancel_all_btn.clicked.connect(self.cancel_all_transfers)
+        controls.addWidget(cancel_all_btn)
+        
         # Bandwidth control
         controls.addStretch()
         controls.addWidget(QLabel("Bandwidth Limit:"))
@@ -186,14 +247,175 @@ class DashboardDialog(QDialog):
         transfers_group.setLayout(transfers_layout)
         layout.addWidget(transfers_group)
         
+        # Watched folders
+        watches_group = QGroupBox("Watched Folders")
+        watches_layout = QVBoxLayout()
+        
+        self.watches_table = QTableWidget()
+        self.watches_table.setColumnCount(5)
+        self.watches_table.setHorizontalHeaderLabels([
+            "Folder", "Destination", "Pending Changes", "Last Push", "Actions"
+        ])
+        self.watches_table.horizontalHeader().setStretchLastSection(True)
+        watches_layout.addWidget(self.watches_table)
+        
+        watches_group.setLayout(watches_layout)
+        layout.addWidget(watches_group)
+        
+        tab.setLayout(layout)
+        return tab
+        
+    def create_search_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        
+        # Search box; queries run once typing pauses
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search file names and paths on indexed remotes")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        layout.addWidget(self.search_box)
+        
+        self.search_table = QTableWidget()
+        self.search_table.setColumnCount(4)
+        self.search_table.setHorizontalHeaderLabels(["Remote", "Path", "Size", "Modified"])
+        self.search_table.horizontalHeader().setStretchLastSection(True)
+        self.search_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.search_table)
+        
+        self.search_status = QLabel()
+        layout.addWidget(self.search_status)
+        
+        # Indexed remotes
+        index_group = QGroupBox("Indexed Remotes")
+        index_layout = QVBoxLayout()
+        
+        self.index_table = QTableWidget()
+        self.index_table.setColumnCount(4)
+        self.index_table.setHorizontalHeaderLabels(["Remote", "Entries", "Last Refresh", "Status"])
+        self.index_table.horizontalHeader().setStretchLastSection(True)
+        self.index_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        index_layout.addWidget(self.index_table)
+        
+        index_controls = QHBoxLayout()
+        self.index_remote_combo = QComboBox()  # Filled in by on_remote_states
+        index_controls.addWidget(self.index_remote_combo)
+        
+        add_index_btn = QPushButton("Add to Index")
+        add_index_btn.clicked.connect(self.add_indexed_remote)
+        index_controls.addWidget(add_index_btn)
+        
+        remove_index_btn = QPushButton("Remove")
+        remove_index_btn.clicked.connect(self.remove_indexed_remote)
+        index_controls.addWidget(remove_index_btn)
+        
+        index_controls.addStretch()
+        
+        duplicates_btn = QPushButton("Find Duplicates...")
+        duplicates_btn.clicked.connect(self.find_duplicates)
+        index_controls.addWidget(duplicates_btn)
+        
+        refresh_index_btn = QPushButton("Refresh Index")
+        refresh_index_btn.clicked.connect(self.refresh_index)
+        index_controls.addWidget(refresh_index_btn)
+        
+        index_layout.addLayout(index_controls)
+        index_group.setLayout(index_layout)
+        layout.addWidget(index_group)
+        
+        self.rclone.indexer.index_updated.connect(self.update_index_table)
+        self.update_index_table()
+        
         tab.setLayout(layout)
         return tab
         
+    def run_search(self):
+        """Search the listing index"""
+        text = self.search_box.text()
+        started = time.perf_counter()
+        try:
+            results = self.rclone.indexer.index.search(text)
+        except Exception as e:
+            self.search_status.setText(f"Search failed: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        self.search_table.setRowCount(len(results))
+        for i, result in enumerate(results):
+            self.search_table.setItem(i, 0, QTableWidgetItem(result['remote']))
+            path = result['path'] + ('/' if result['is_dir'] else '')
+            self.search_table.setItem(i, 1, QTableWidgetItem(path))
+            size = "" if result['is_dir'] or result['size'] is None else format_size(result['size'])
+            self.search_table.setItem(i, 2, QTableWidgetItem(size))
+            self.search_table.setItem(i, 3, QTableWidgetItem((result['mtime'] or '')[:19].replace('T', ' ')))
+        self.search_table.resizeColumnsToContents()
+        self.search_status.setText(f"{len(results)} results in {elapsed:.0f} ms" if text.strip() else "")
+    
+    def update_index_table(self, remote=None):
+        """Update the indexed remotes table"""
+        try:
+            remotes = list(self.rclone.indexer.index.remotes().items())
+        except Exception as e:
+            print(f"Error reading index: {e}")
+            return
+        self.index_table.setRowCount(len(remotes))
+        for i, (name, info) in enumerate(remotes):
+            self.index_table.setItem(i, 0, QTableWidgetItem(name))
+            self.index_table.setItem(i, 1, QTableWidgetItem(str(info['files'])))
+            refreshed = datetime.fromtimestamp(info['indexed_at']).strftime('%Y-%m-%d %H:%M') if info['indexed_at'] else "Never"
+            self.index_table.setItem(i, 2, QTableWidgetItem(refreshed))
+            if self.rclone.indexer.running == name:
+                status = "Indexing..."
+            elif info['error']:
+                status = f"Error: {info['error']}"
+            else:
+                status = "OK" if info['periodic'] else "Listed once (not refreshed)"
+            self.index_table.setItem(i, 3, QTableWidgetItem(status))
+        self.index_table.resizeColumnsToContents()
+        if self.search_box.text().strip():
+            self.run_search()
+    
+    def add_indexed_remote(self):
+        """Start indexing the selected remote"""
+        remote = self.index_remote_combo.currentText()
+        if remote:
+            self.rclone.indexer.add_remote(remote)
+            self.update_index_table()
+    
+    def remove_indexed_remote(self):
+        """Stop indexing the remote selected in the table"""
+        row = self.index_table.currentRow()
+        if row >= 0:
+            self.rclone.indexer.remove_remote(self.index_table.item(row, 0).text())
+    
+    def find_duplicates(self):
+        """Show the duplicate finder"""
+        self.rclone.list_remotes_async(self.show_duplicates_dialog)
+
+    def show_duplicates_dialog(self, remotes):
+        dialog = DuplicatesDialog(self.rclone, remotes, self)
+        dialog.exec()
+    
+    def refresh_index(self):
+        """Refresh every indexed remote now"""
+        self.rclone.indexer.refresh()
+        self.update_index_table()
+    
     def start_sync(self):
         """Start a new sync operation"""
-        dialog = TransferDialog("sync", self.rclone.list_remotes(), self)
+        self.rclone.list_remotes_async(self.show_sync_dialog)
+
+    def show_sync_dialog(self, remotes):
+        dialog = TransferDialog("sync", remotes, self, allow_preview=True,
+                                advise=lambda *job: self.advise_in_background("sync", *job))
         if dialog.exec():
             source, dest, flags = dialog.get_values()
+            if dialog.preview.isChecked():
+                self.preview_transfer("sync", source, dest, flags)
+                return
             try:
                 self.rclone.sync(source, dest, flags)
                 self.update_transfers()
@@ -202,15 +424,92 @@ class DashboardDialog(QDialog):
     
     def start_copy(self):
         """Start a new copy operation"""
-        dialog = TransferDialog("copy", self.rclone.list_remotes(), self)
+        self.rclone.list_remotes_async(self.show_copy_dialog)
+
+    def show_copy_dialog(self, remotes):
+        dialog = TransferDialog("copy", remotes, self, allow_preview=True,
+                                advise=lambda *job: self.advise_in_background("copy", *job))
         if dialog.exec():
             source, dest, flags = dialog.get_values()
+            if dialog.preview.isChecked():
+                self.preview_transfer("copy", source, dest, flags)
+                return
             try:
-                self.rclone.copy(source, dest, flags)
+                self.rclone.copy(source, dest, flags, source_is_file=dialog.source_is_file())
                 self.update_transfers()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to start copy: {e}")
     
+    def advise_in_background(self, operation, callback, source, dest, flags):
+        """Suggest flags for a job on a worker, as the index lookups can be slow"""
+        self.rclone.runner.run_in_background(self.rclone.advise, callback,
+                                             operation, source, dest, flags)
+
+    def preview_transfer(self, operation, source, dest, flags):
+        """Show what a transfer would change and let the user start it from there"""
+        dialog = PreviewDialog(self.rclone, operation, source, dest, flags, self)
+        dialog.exec()
+        self.update_transfers()
+    
+    def start_bisync(self):
+        """Start a new bidirectional sync"""
+        self.rclone.list_remotes_async(self.show_bisync_dialog)
+
+    def show_bisync_dialog(self, remotes):
+        dialog = TransferDialog("bisync", remotes, self)
+        if dialog.exec():
+            path1, path2, flags = dialog.get_values()
+            try:
+                self.rclone.bisync(path1, path2, flags)
+                self.update_transfers()
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to start bisync: {e}")
+    
+    def start_replication(self):
+        """Copy one source to several destinations"""
+        self.rclone.list_remotes_async(self.show_replication_dialog)
+
+    def show_replication_dialog(self, remotes):
+        dialog = TransferDialog("replicate", remotes, self)
+        if dialog.exec():
+            source, dests, flags = dialog.get_values()
+            if not dests:
+                QMessageBox.warning(self, "Error", "Select at least one destination")
+                return
+            try:
+                self.rclone.replicate(source, dests, flags)
+                self.update_transfers()
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to start replication: {e}")
+    
+    def start_watch(self):
+        """Start watching a local folder"""
+        self.rclone.list_remotes_async(self.show_watch_dialog)
+
+    def show_watch_dialog(self, remotes):
+        dialog = TransferDialog("watch", remotes, self)
+        if dialog.exec():
+            source, dest, flags = dialog.get_values()
+            try:
+                self.rclone.watches.add(source, dest, flags, dialog.get_full_mode())
+                self.update_transfers()
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to start watch: {e}")
+    
+    def stop_watch(self, watch_id):
+        """Stop watching a folder"""
+        self.rclone.watches.remove(watch_id)
+        self.update_transfers()
+    
+    def show_schedules(self):
+        """Show scheduled jobs"""
+        self.rclone.list_remotes_async(self.show_schedules_dialog)
+
+    def show_schedules_dialog(self, remotes):
+        dialog = SchedulesDialog(self.rclone.scheduler, remotes, self)
+        dialog.exec()
+        self.update_transfers()
+    
     def set_bandwidth_limit(self, limit):
         """Set bandwidth limit for transfers"""
         if limit == "No Limit":
@@ -223,12 +522,28 @@ class DashboardDialog(QDialog):
     def update_transfers(self):
         """Update transfers table"""
         try:
-            transfers = self.rclone.get_transfers()
+            # Coalesced runs are shown through the queued jobs they carry
+            transfers = [(transfer_id, transfer) for transfer_id, transfer
+                         in self.rclone.get_transfers().items() if 'members' not in transfer]
             self.transfers_table.setRowCount(len(transfers))
             
-            for i, (transfer_id, transfer) in enumerate(transfers.items()):
+            for i, (transfer_id, transfer) in enumerate(transfers):
                 # Transfer type
-                self.transfers_table.setItem(i, 0, QTableWidgetItem(transfer['type']))
+                transfer_type = transfer['type']
+                if transfer.get('schedule'):
+                    transfer_type += f" ({transfer['schedule']})"
+                elif transfer.get('watch'):
+                    transfer_type += " (watch)"
+                elif transfer.get('batch'):
+                    transfer_type += " (batched)"
+                elif transfer.get('replication'):
+                    transfer_type += " (replica)"
+                type_item = QTableWidgetItem(transfer_type)
+                if transfer.get('server_side'):
+                    type_item.setText(f"{transfer_type} [server-side]")
+                    type_item.setToolTip(f"Copied within the provider ({transfer['server_side']}), "
+                                         f"without passing through this machine")
+                self.transfers_table.setItem(i, 0, type_item)
                 
                 # Source/Destination
                 self.transfers_table.setItem(i, 1, QTableWidgetItem(transfer['source']))
@@ -237,7 +552,13 @@ class DashboardDialog(QDialog):
                 # Progress
                 progress = QProgressBar()
                 progress.setValue(transfer['progress'])
-                progress.setFormat(f"{transfer['progress']}%")
+                if transfer['status'] == 'paused' and \
+                        transfer.get('batch', transfer_id) in self.rclone.disk_guard.paused:
+                    progress.setFormat(f"{transfer['progress']}% (paused, low disk space)")
+                elif transfer['status'] == 'paused':
+                    progress.setFormat(f"{transfer['progress']}% (paused)")
+                else:
+                    progress.setFormat(f"{transfer['progress']}%")
                 self.transfers_table.setCellWidget(i, 3, progress)
                 
                 # Speed
@@ -251,21 +572,81 @@ class DashboardDialog(QDialog):
                 btn_layout = QHBoxLayout(btn_widget)
                 btn_layout.setContentsMargins(2, 2, 2, 2)
                 
-                if transfer['status'] in ['starting', 'running']:
+                if transfer['status'] in ['starting', 'running', 'paused']:
+                    if transfer['status'] == 'paused':
+                        resume_btn = QPushButton("Resume")
+                        resume_btn.clicked.connect(lambda checked, tid=transfer_id: self.resume_transfer(tid))
+                        btn_layout.addWidget(resume_btn)
+                    else:
+                        pause_btn = QPushButton("Pause")
+                        pause_btn.clicked.connect(lambda checked, tid=transfer_id: self.pause_transfer(tid))
+                        btn_layout.addWidget(pause_btn)
+                    
                     cancel_btn = QPushButton("Cancel")
-                    cancel_btn.clicked.connect(lambda tid=transfer_id: self.cancel_transfer(tid))
+                    cancel_btn.clicked.connect(lambda checked, tid=transfer_id: self.cancel_transfer(tid))
                     btn_layout.addWidget(cancel_btn)
+                elif transfer['status'] == 'queued':
+                    # Replicas wait for the shared listing of their source
+                    btn_layout.addWidget(QLabel("Listing source..." if transfer.get('replication') else "Queued"))
+                    
+                    cancel_btn = QPushButton("Cancel")
+                    cancel_btn.clicked.connect(lambda checked, tid=transfer_id: self.cancel_transfer(tid))
+                    btn_layout.addWidget(cancel_btn)
+                elif transfer['status'] == 'cancelling':
+                    btn_layout.addWidget(QLabel("Cancelling..."))
+                elif transfer['status'] == 'failed' and transfer.get('failed_files'):
+                    status = f"Failed ({transfer['failed_files']} files)"
+                    if transfer.get('retry_at'):
+                        status += f", retrying at {datetime.fromtimestamp(transfer['retry_at']):%H:%M:%S}"
+                    btn_layout.addWidget(QLabel(status))
+                    
+                    retry_btn = QPushButton("Retry Failed")
+                    retry_btn.clicked.connect(lambda checked, tid=transfer_id: self.retry_failed(tid))
+                    btn_layout.addWidget(retry_btn)
                 else:
                     status_label = QLabel(transfer['status'].title())
+                    if transfer.get('conflicts'):
+                        status_label.setText(f"{transfer['status'].title()} ({len(transfer['conflicts'])} conflicts)")
+                        status_label.setToolTip("Changed on both sides, both versions kept:\n" +
+                                                "\n".join(transfer['conflicts']))
                     btn_layout.addWidget(status_label)
                 
                 btn_layout.addStretch()
                 self.transfers_table.setCellWidget(i, 6, btn_widget)
             
             self.transfers_table.resizeColumnsToContents()
+            self.update_watches()
             
         except Exception as e:
             print(f"Error updating transfers: {e}")
+
+    def update_watches(self):
+        """Update watched folders table"""
+        watches = list(self.rclone.watches.jobs.items())
+        self.watches_table.setRowCount(len(watches))
+        
+        for i, (watch_id, job) in enumerate(watches):
+            self.watches_table.setItem(i, 0, QTableWidgetItem(job.source))
+            self.watches_table.setItem(i, 1, QTableWidgetItem(job.dest))
+            
+            pending = f"{len(job.changed)} file(s)"
+            if job.busy:
+                pending += ", pushing"
+            self.watches_table.setItem(i, 2, QTableWidgetItem(pending))
+            
+            last_push = datetime.fromtimestamp(job.last_push).strftime('%H:%M:%S') if job.last_push else "Never"
+            self.watches_table.setItem(i, 3, QTableWidgetItem(last_push))
+            
+            btn_widget = QWidget()
+            btn_layout = QHBoxLayout(btn_widget)
+            btn_layout.setContentsMargins(2, 2, 2, 2)
+            stop_btn = QPushButton("Stop Watching")
+            stop_btn.clicked.connect(lambda checked, wid=watch_id: self.stop_watch(wid))
+            btn_layout.addWidget(stop_btn)
+            btn_layout.addStretch()
+            self.watches_table.setCellWidget(i, 4, btn_widget)
+        
+        self.watches_table.resizeColumnsToContents()
     
     def cancel_transfer(self, transfer_id):
         """Cancel a transfer"""
@@ -277,35 +658,87 @@ class DashboardDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error cancelling transfer: {e}")
 
+    def cancel_all_transfers(self):
+        """Cancel every active transfer"""
+        try:
+            self.rclone.cancel_all()
+            self.update_transfers()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error cancelling transfers: {e}")
+
+    def retry_failed(self, transfer_id):
+        """Re-run only the failed files of a transfer"""
+        try:
+            if self.rclone.retry_failed(transfer_id):
+                self.update_transfers()
+            else:
+                QMessageBox.warning(self, "Warning", "No failed files to retry")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to retry transfer: {e}")
+
+    def pause_transfer(self, transfer_id):
+        """Pause a transfer"""
+        if self.rclone.pause_transfer(transfer_id):
+            self.update_transfers()
+        else:
+            QMessageBox.warning(self, "Warning", "Failed to pause transfer")
+
+    def resume_transfer(self, transfer_id):
+        """Resume a paused transfer"""
+        if self.rclone.resume_transfer(transfer_id):
+            self.update_transfers()
+        else:
+            QMessageBox.warning(self, "Warning", "Failed to resume transfer")
+
     @pyqtSlot()
     def update_stats(self):
         """Update all statistics"""
-        self.update_remotes()
+        self.refresh_remote_states()
         self.update_system_stats()
         self.update_mounts()
         self.update_transfers()
 
+    def refresh_remote_states(self):
+        """Look up remote types and mount states in the background; rclone and findmnt may be slow"""
+        if self.remote_states_pending:
+            return
+        self.remote_states_pending = True
+        self.rclone.runner.run_in_background(self.rclone.remote_states, self.on_remote_states)
+
+    def on_remote_states(self, states, error):
+        self.remote_states_pending = False
+        if error:
+            print(f"Error listing remotes: {error}")
+            return
+        self.remote_states = states
+        self.update_remotes()
+        self.update_remotes_list()
+        self.update_index_remotes()
+
+    def update_index_remotes(self):
+        """Offer the configured remotes for indexing, keeping the current choice"""
+        remotes = list(self.remote_states)
+        if remotes == [self.index_remote_combo.itemText(i) for i in range(self.index_remote_combo.count())]:
+            return
+        current = self.index_remote_combo.currentText()
+        self.index_remote_combo.clear()
+        self.index_remote_combo.addItems(remotes)
+        self.index_remote_combo.setCurrentText(current)
+
     def update_remotes(self):
         """Update remotes table"""
         try:
-            remotes = self.rclone.list_remotes()
-            self.remotes_table.setRowCount(len(remotes))
+            self.remotes_table.setRowCount(len(self.remote_states))
             
-            for i, remote in enumerate(remotes):
+            for i, (remote, (remote_type, mounted)) in enumerate(self.remote_states.items()):
                 # Remote name
                 self.remotes_table.setItem(i, 0, QTableWidgetItem(remote))
                 
-                # Remote type (get from rclone config show)
-                try:
-                    output = subprocess.check_output(['rclone', 'config', 'show', remote])
-                    config = json.loads(output)
-                    remote_type = config.get('type', 'Unknown')
-                except:
-                    remote_type = 'Unknown'
+                # Remote type (from rclone config show)
                 self.remotes_table.setItem(i, 1, QTableWidgetItem(remote_type))
                 
                 # Status
-                status = "Mounted" if self.rclone.is_mounted(remote) else "Not Mounted"
+                status = "Mounted" if mounted else "Not Mounted"
                 status_item = QTableWidgetItem(status)
                 status_item.setForeground(Qt.GlobalColor.green if status == "Mounted" else Qt.GlobalColor.red)
                 self.remotes_table.setItem(i, 2, status_item)
@@ -331,30 +764,16 @@ class DashboardDialog(QDialog):
         except Exception as e:
             print(f"Error updating system stats: {e}")
 
-    def update_mounts(self):
-        """Update mounts tables"""
+    def update_remotes_list(self):
+        """Update the available remotes with their mount buttons"""
         try:
-            # Update available remotes
-            remotes = self.rclone.list_remotes()
-            self.remotes_list.setRowCount(len(remotes))
+            self.remotes_list.setRowCount(len(self.remote_states))
             
-            for i, remote in enumerate(remotes):
+            for i, (remote, (remote_type, mounted)) in enumerate(self.remote_states.items()):
                 # Remote name
                 self.remotes_list.setItem(i, 0, QTableWidgetItem(remote))
                 
                 # Remote type
-                try:
-                    output = subprocess.check_output(['rclone', 'config', 'show', remote])
-                    output_str = output.decode()
-                    # Parse the output to find the type
-                    for line in output_str.splitlines():
-                        if line.strip().startswith('type = '):
-                            remote_type = line.split('=')[1].strip()
-                            break
-                    else:
-                        remote_type = 'Unknown'
-                except:
-                    remote_type = 'Unknown'
                 self.remotes_list.setItem(i, 1, QTableWidgetItem(remote_type))
                 
                 # Mount button
@@ -362,7 +781,7 @@ class DashboardDialog(QDialog):
                 btn_layout = QHBoxLayout(btn_widget)
                 btn_layout.setContentsMargins(2, 2, 2, 2)
                 
-                if self.rclone.is_mounted(remote):
+                if mounted:
                     unmount_btn = QPushButton("Unmount")
                     unmount_btn.clicked.connect(lambda r=remote: self.unmount_remote(r))
                     btn_layout.addWidget(unmount_btn)
@@ -371,35 +790,55 @@ class DashboardDialog(QDialog):
                     mount_btn.clicked.connect(lambda r=remote: self.mount_remote(r))
                     btn_layout.addWidget(mount_btn)
                 
+                # Lower-overhead access than FUSE for some workloads
+                serve_btn = QPushButton("Serve")
+                serve_menu = QMenu(serve_btn)
+                for protocol in PROTOCOLS:
+                    serve_menu.addAction(protocol.upper(),
+                                         lambda checked=False, r=remote, p=protocol: self.serve_remote(r, p))
+                serve_btn.setMenu(serve_menu)
+                btn_layout.addWidget(serve_btn)
+                
                 btn_layout.addStretch()
                 self.remotes_list.setCellWidget(i, 2, btn_widget)
-            
-            # Update active mounts
-            active_mounts = []
-            mnt_dir = Path.home() / 'mnt'
-            if mnt_dir.exists():
-                for mount_point in mnt_dir.iterdir():
-                    if mount_point.is_mount():
-                        active_mounts.append(mount_point.name)
+            self.remotes_list.resizeColumnsToContents()
+        except Exception as e:
+            print(f"Error updating remotes: {e}")
+
+    def update_mounts(self):
+        """Update mounts tables"""
+        try:
+            # Update active mounts (from the mount table, never touching the mounts)
+            active_mounts = self.rclone.active_mounts()
             
             self.mounts_table.setRowCount(len(active_mounts))
             
-            for i, remote in enumerate(active_mounts):
+            for i, (remote, mount_point) in enumerate(sorted(active_mounts.items())):
                 # Remote name
                 self.mounts_table.setItem(i, 0, QTableWidgetItem(remote))
                 
                 # Mount point
-                mount_point = mnt_dir / remote
-                self.mounts_table.setItem(i, 1, QTableWidgetItem(str(mount_point)))
+                self.mounts_table.setItem(i, 1, QTableWidgetItem(mount_point))
                 
-                # Status
-                is_mounted = self.rclone.verify_mount(str(mount_point))
-                status = "Active" if is_mounted else "Error"
-                status_item = QTableWidgetItem(status)
-                status_item.setForeground(
-                    Qt.GlobalColor.green if is_mounted else Qt.GlobalColor.red
-                )
+                # Status from the background health probe
+                health = self.rclone.health.results.get(remote)
+                if health is None:
+                    status_item = QTableWidgetItem("Checking...")
+                    latency_item = QTableWidgetItem("")
+                else:
+                    status_item = QTableWidgetItem(health.status.title())
+                    status_item.setForeground(HEALTH_COLORS.get(health.status, Qt.GlobalColor.red))
+                    status_item.setToolTip(health.describe())
+                    latency_item = QTableWidgetItem(f"{health.total_ms:.0f} ms")
+                    latency_item.setToolTip(health.describe())
+                # First ls before and after filling the directory cache
+                prewarm = self.rclone.prewarm_results.get(remote)
+                if prewarm:
+                    latency_item.setToolTip("\n".join(filter(None, [latency_item.toolTip(), prewarm.describe()])))
+                    if prewarm.after:
+                        latency_item.setText(f"{latency_item.text()} (ls {max(prewarm.after.values()):.0f} ms)".strip())
                 self.mounts_table.setItem(i, 2, status_item)
+                self.mounts_table.setItem(i, 3, latency_item)
                 
                 # Action buttons
                 btn_widget = QWidget()
@@ -416,31 +855,15 @@ class DashboardDialog(QDialog):
                 btn_layout.addWidget(open_btn)
                 
                 btn_layout.addStretch()
-                self.mounts_table.setCellWidget(i, 3, btn_widget)
+                self.mounts_table.setCellWidget(i, 4, btn_widget)
             
             # Adjust column sizes
-            self.remotes_list.resizeColumnsToContents()
             self.mounts_table.resizeColumnsToContents()
+            self.update_serve_table()
             
         except Exception as e:
             print(f"Error updating mounts: {e}")
 
-    def update_transfers(self):
-        """Update transfers table"""
-        try:
-            # Get transfer status using rclone rc
-            transfers = []  # TODO: Implement rclone rc calls to get transfer status
-            self.transfers_table.setRowCount(len(transfers))
-            
-            for i, transfer in enumerate(transfers):
-                self.transfers_table.setItem(i, 0, QTableWidgetItem(transfer.get('name', '')))
-                self.transfers_table.setItem(i, 1, QTableWidgetItem(transfer.get('size', '')))
-                self.transfers_table.setItem(i, 2, QTableWidgetItem(transfer.get('progress', '')))
-                self.transfers_table.setItem(i, 3, QTableWidgetItem(transfer.get('speed', '')))
-                self.transfers_table.setItem(i, 4, QTableWidgetItem(transfer.get('eta', '')))
-        except Exception as e:
-            print(f"Error updating transfers: {e}")
-
     class MountThread(QThread):
         mount_finished = pyqtSignal(bool, str)  # Success, Error message
         
@@ -499,13 +922,54 @@ class DashboardDialog(QDialog):
             
     def unmount_all(self):
         """Unmount all remotes"""
-        mnt_dir = Path.home() / 'mnt'
-        if not mnt_dir.exists():
+        if not self.rclone.active_mounts():
             return
+
+        # Unmounts of our own mounts run concurrently in the background under a shared deadline
+        self.unmount_all_btn.setEnabled(False)
+        self.rclone.unmount_all_async(self.on_unmount_all_finished)
+
+    def on_unmount_all_finished(self, report):
+        """Handle completion of Unmount All"""
+        self.unmount_all_btn.setEnabled(True)
+        self.update_stats()
+        if report.summary():
+            QMessageBox.warning(self, "Unmount All", report.summary())
+
+    def update_serve_table(self):
+        """Update the served endpoints table"""
+        endpoints = sorted(self.rclone.serve.endpoints.values(),
+                           key=lambda endpoint: (endpoint.remote, endpoint.protocol))
+        self.serve_table.setRowCount(len(endpoints))
+        for i, endpoint in enumerate(endpoints):
+            self.serve_table.setItem(i, 0, QTableWidgetItem(endpoint.remote))
+            self.serve_table.setItem(i, 1, QTableWidgetItem(endpoint.protocol.upper()))
+            address_item = QTableWidgetItem(endpoint.address)
+            if endpoint.user:
+                address_item.setToolTip(f"User: {endpoint.user}\nPassword: {endpoint.password}")
+            self.serve_table.setItem(i, 2, address_item)
+            status_item = QTableWidgetItem(endpoint.status.title())
+            if endpoint.error:
+                status_item.setToolTip(endpoint.error)
+            self.serve_table.setItem(i, 3, status_item)
             
-        for mount_point in mnt_dir.iterdir():
-            if mount_point.is_mount():
-                self.unmount_remote(mount_point.name)
+            stop_btn = QPushButton("Stop")
+            stop_btn.clicked.connect(lambda checked, sid=endpoint.serve_id: self.rclone.serve.remove(sid))
+            self.serve_table.setCellWidget(i, 4, stop_btn)
+        self.serve_table.resizeColumnsToContents()
+    
+    def serve_remote(self, remote, protocol):
+        """Serve a remote on localhost"""
+        try:
+            endpoint = self.rclone.serve.add(remote, protocol)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to serve {remote}: {e}")
+            return
+        self.update_serve_table()
+        message = f"{remote}: is served at {endpoint.address}"
+        if endpoint.user:
+            message += f"\n\nUser: {endpoint.user}\nPassword: {endpoint.password}"
+        QMessageBox.information(self, f"Serving {remote}", message)
 
     def unmount_selected(self):
         """Unmount selected remote"""
@@ -537,6 +1001,8 @@ class DashboardDialog(QDialog):
         menu.addSeparator()
         menu.addAction("Configure", lambda: self.configure_remote(remote))
         menu.addAction("View Stats", lambda: self.view_remote_stats(remote))
+        menu.addAction("Analyze Storage", lambda: self.analyze_storage(remote))
+        menu.addAction("Speed Test...", lambda: self.speed_test(remote))
         
         # Show menu at cursor position
         menu.exec(self.remotes_table.mapToGlobal(pos))
@@ -559,10 +1025,38 @@ class DashboardDialog(QDialog):
         menu.addAction("Open in File Manager", lambda: self.open_mount_point(remote))
         menu.addAction("View Stats", lambda: self.view_remote_stats(remote))
         menu.addAction("Check Mount", lambda: self.check_mount(remote))
+        if remote in self.rclone.mount_rc:
+            menu.addAction("Prewarm Directory Cache", lambda: self.rclone.prewarm(remote))
+        
+        # Folders prefetched into the VFS cache
+        menu.addSeparator()
+        menu.addAction("Keep Folder Offline...", lambda: self.pin_folder(remote))
+        pins = self.rclone.pins.pins(remote)
+        if pins:
+            offline_menu = menu.addMenu("Offline Folders")
+            for path in pins:
+                status = self.rclone.pins.status.get((remote, path))
+                label = f"{path or '/'} ({status.describe() if status else 'not warmed yet'})"
+                offline_menu.addAction(f"Stop Keeping {label} Offline",
+                                       lambda p=path: self.rclone.pins.unpin(remote, p))
         
         # Show menu at cursor position
         menu.exec(self.mounts_table.mapToGlobal(pos))
     
+    def pin_folder(self, remote):
+        """Pick a folder of a mount to keep in its cache"""
+        mount_point = self.rclone.active_mounts().get(remote)
+        if not mount_point:
+            return
+        folder = QFileDialog.getExistingDirectory(self, f"Keep Offline - {remote}:", mount_point)
+        if not folder:
+            return
+        rel = os.path.relpath(folder, mount_point)
+        if rel.startswith('..'):
+            QMessageBox.warning(self, "Error", f"Pick a folder inside {mount_point}")
+            return
+        self.rclone.pins.pin(remote, '' if rel == '.' else rel)
+    
     def configure_remote(self, remote):
         """Open configuration for a remote"""
         try:
@@ -570,7 +1064,7 @@ class DashboardDialog(QDialog):
             cmd = None
             
             for term in terminals:
-                if subprocess.run(['which', term], capture_output=True).returncode == 0:
+                if shutil.which(term):
                     if term == 'konsole':
                         cmd = [term, '-e', 'rclone', 'config', 'edit', remote]
                     elif term == 'gnome-terminal':
@@ -587,14 +1081,35 @@ class DashboardDialog(QDialog):
     
     def view_remote_stats(self, remote):
         """View statistics for a remote"""
+        # rclone about can take a while on slow backends, so don't wait for it here
+        self.rclone.runner.run_async(
+            ['rclone', 'about', f'{remote}:', '--json'],
+            lambda result, error: self.show_remote_stats(remote, result, error)
+        )
+
+    def analyze_storage(self, remote):
+        """Show what takes up space on a remote"""
+        dialog = StorageAnalyzerDialog(self.rclone, remote, self)
+        dialog.exec()
+
+    def speed_test(self, remote):
+        """Measure the throughput of a remote"""
+        dialog = SpeedTestDialog(self.rclone, remote, self)
+        dialog.exec()
+
+    def show_remote_stats(self, remote, result, error):
+        """Show the result of an rclone about call"""
         try:
-            output = subprocess.check_output(['rclone', 'about', f'{remote}:', '--json'])
-            stats = json.loads(output)
+            if error:
+                raise error
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"rclone exited with code {result.returncode}")
+            stats = json.loads(result.stdout)
             
             msg = f"Statistics for {remote}:\n\n"
-            msg += f"Total: {self.format_size(stats.get('total', 0))}\n"
-            msg += f"Used: {self.format_size(stats.get('used', 0))}\n"
-            msg += f"Free: {self.format_size(stats.get('free', 0))}\n"
+            msg += f"Total: {format_size(stats.get('total', 0))}\n"
+            msg += f"Used: {format_size(stats.get('used', 0))}\n"
+            msg += f"Free: {format_size(stats.get('free', 0))}\n"
             msg += f"Usage: {stats.get('used%', '0')}%"
             
             from PyQt6.QtWidgets import QMessageBox
@@ -605,19 +1120,23 @@ class DashboardDialog(QDialog):
     
     def check_mount(self, remote):
         """Check if a mount is working properly"""
-        mount_point = Path.home() / 'mnt' / remote
-        try:
-            # Try to list directory contents
-            next(mount_point.iterdir())
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.information(self, "Mount Check", f"Mount {remote} is working properly")
-        except StopIteration:
-            # Empty directory is fine
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.information(self, "Mount Check", f"Mount {remote} is working (empty directory)")
-        except Exception as e:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(self, "Mount Check", f"Mount {remote} may have issues: {e}")
+        mount_point = self.rclone.active_mounts().get(remote, str(Path.home() / 'mnt' / remote))
+        # The probe runs in a separate process, so a dead mount can't freeze the dialog
+        self.rclone.health.check(remote, mount_point,
+                                 callback=lambda health: self.show_mount_health(remote, health))
+
+    def show_mount_health(self, remote, health):
+        """Show the result of a mount health probe"""
+        if health.status == HEALTHY:
+            QMessageBox.information(self, "Mount Check",
+                                    f"Mount {remote} is working properly\n\n{health.describe()}")
+        elif health.status == SLOW:
+            QMessageBox.warning(self, "Mount Check",
+                                f"Mount {remote} is responding slowly\n\n{health.describe()}")
+        else:
+            QMessageBox.warning(self, "Mount Check",
+                                f"Mount {remote} is not responding\n\n{health.describe()}")
+        self.update_mounts()
     
     def open_mount_point(self, remote):
         """Open mount point in file manager"""
@@ -628,14 +1147,6 @@ class DashboardDialog(QDialog):
             from PyQt6.QtWidgets import QMessageBox
             QMessageBox.critical(self, "Error", f"Failed to open {remote} mount point: {e}")
     
-    def format_size(self, size):
-        """Format size in bytes to human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} PB"
-    
     def closeEvent(self, event):
         """Stop timer when closing"""
         self.timer.stop()
@@ -0,0 +1,134 @@
+"""Duplicate Finder Dialog"""
+
+import threading
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QListWidget, QListWidgetItem, QTreeWidget,
+                           QTreeWidgetItem, QGroupBox)
+from PyQt6.QtCore import Qt, QTimer
+from ..duplicates import find_duplicates
+from ..formatting import format_size
+
+# Duplicate sets shown at once; the largest are the interesting ones
+MAX_SETS_SHOWN = 1000
+
+class DuplicatesDialog(QDialog):
+    """Find files stored more than once across remotes"""
+
+    def __init__(self, rclone_manager, remotes, parent=None):
+        super().__init__(parent)
+        self.rclone = rclone_manager
+        self.remotes = remotes
+        self.running = False
+        self.message = ""  # Progress message set by the worker
+        self.stop_event = threading.Event()
+        self.setWindowTitle("Find Duplicates")
+        self.setMinimumSize(750, 550)
+
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(lambda: self.status_label.setText(self.message))
+
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        remotes_group = QGroupBox("Remotes to Compare")
+        remotes_layout = QVBoxLayout()
+        self.remote_list = QListWidget()
+        indexed = self.rclone.indexer.index.remotes()
+        for remote in self.remotes:
+            item = QListWidgetItem(remote)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if remote in indexed else Qt.CheckState.Unchecked)
+            self.remote_list.addItem(item)
+        self.remote_list.setMaximumHeight(120)
+        remotes_layout.addWidget(self.remote_list)
+        remotes_layout.addWidget(QLabel("Remotes not in the search index are listed once, without "
+                                        "being refreshed later; only files that share a size are hashed."))
+        remotes_group.setLayout(remotes_layout)
+        layout.addWidget(remotes_group)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["File", "Size", "Reclaimable"])
+        layout.addWidget(self.results)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        self.find_btn = QPushButton("Find Duplicates")
+        self.find_btn.clicked.connect(self.find)
+        buttons.addWidget(self.find_btn)
+
+        buttons.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def selected_remotes(self):
+        return [
+            self.remote_list.item(i).text() for i in range(self.remote_list.count())
+            if self.remote_list.item(i).checkState() == Qt.CheckState.Checked
+        ]
+
+    def find(self):
+        """Search the selected remotes in the background"""
+        remotes = self.selected_remotes()
+        if not remotes or self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.find_btn.setEnabled(False)
+        self.message = "Starting..."
+        self.progress_timer.start(500)
+
+        self.rclone.runner.run_long(self.search, self.show_results, remotes)
+
+    def search(self, remotes):
+        # Runs on a worker thread, where rclone config show may take its time
+        remote_types = {remote: self.rclone.get_remote_type(remote) for remote in remotes}
+        return find_duplicates(
+            self.rclone.indexer.index, remotes, remote_types,
+            max_listing_age=self.rclone.indexer.full_interval,
+            progress=self.set_message, should_stop=self.stop_event.is_set
+        )
+
+    def set_message(self, message):
+        self.message = message
+
+    def show_results(self, result, error):
+        self.running = False
+        self.progress_timer.stop()
+        self.find_btn.setEnabled(True)
+        # Remotes may have been added to the index
+        self.rclone.indexer.index_updated.emit('')
+        if error:
+            self.status_label.setText(f"Search failed: {error}")
+            return
+
+        sets, unhashable = result
+        self.results.clear()
+        for dup in sets[:MAX_SETS_SHOWN]:
+            top = QTreeWidgetItem([f"{len(dup.files)} copies", format_size(dup.size),
+                                   format_size(dup.reclaimable)])
+            for remote, path in dup.files:
+                top.addChild(QTreeWidgetItem([f"{remote}:{path}"]))
+            self.results.addTopLevelItem(top)
+        self.results.resizeColumnToContents(1)
+
+        status = (f"{len(sets):,} duplicate sets, "
+                  f"{format_size(sum(dup.reclaimable for dup in sets))} reclaimable")
+        if unhashable:
+            status += f"; {unhashable:,} files could not be compared (no hash)"
+        self.status_label.setText(status)
+
+    def done(self, result):
+        # Abandon a search nobody will look at
+        self.stop_event.set()
+        self.progress_timer.stop()
+        super().done(result)
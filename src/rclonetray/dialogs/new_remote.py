@@ -10,6 +10,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                            QLabel, QComboBox, QLineEdit, QFormLayout,
                            QGroupBox, QMessageBox, QScrollArea, QWidget)
 from PyQt6.QtCore import Qt
+from ..runner import get_runner
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -190,51 +191,56 @@ class NewRemoteDialog(QDialog):
         description = PROVIDERS.get(provider, "")
         self.description_label.setText(description)
         
-        # Fetch and display provider documentation
-        try:
-            # Get detailed provider info
-            output = subprocess.check_output(
-                ['rclone', 'config', 'providers', provider, '--help'],
-                text=True
-            )
-            
-            # Process and format the documentation
-            docs = []
-            in_description = False
-            
-            for line in output.split('\n'):
-                if line.strip() == "Description:":
-                    in_description = True
-                    continue
-                if in_description:
-                    if not line.strip():  # Empty line marks end of description
-                        in_description = False
-                    else:
-                        docs.append(line.strip())
-            
-            # Add configuration options section
-            if "Configuration:" in output:
-                docs.extend([
-                    "",
-                    "<b>Configuration Options:</b>",
-                    ""
-                ])
-                config_section = output.split("Configuration:")[1]
-                for line in config_section.split('\n'):
-                    if line.strip():
-                        docs.append(line.strip())
-            
-            # Format documentation with HTML
-            formatted_docs = "<br>".join(docs)
-            formatted_docs = formatted_docs.replace("*", "•")  # Convert asterisks to bullets
-            
-            self.doc_label.setText(formatted_docs)
-            
-        except subprocess.CalledProcessError as e:
+        # Fetch and display provider documentation without blocking the dialog
+        get_runner().run_async(
+            ['rclone', 'config', 'providers', provider, '--help'],
+            lambda result, error: self.show_provider_docs(provider, result, error)
+        )
+
+    def show_provider_docs(self, provider, result, error):
+        """Show the documentation fetched by update_description"""
+        if provider != self.provider_combo.currentText():
+            return  # Another provider was picked meanwhile
+        if error or result.returncode != 0:
+            detail = str(error) if error else (result.stdout or f"rclone exited with status {result.returncode}")
             self.doc_label.setText(
                 f"Could not fetch provider documentation. Basic configuration will be available in the next step.\n\n"
-                f"Error: {e.output.decode() if e.output else str(e)}"
+                f"Error: {detail}"
             )
+            return
+        output = result.stdout
+
+        # Process and format the documentation
+        docs = []
+        in_description = False
+        
+        for line in output.split('\n'):
+            if line.strip() == "Description:":
+                in_description = True
+                continue
+            if in_description:
+                if not line.strip():  # Empty line marks end of description
+                    in_description = False
+                else:
+                    docs.append(line.strip())
+        
+        # Add configuration options section
+        if "Configuration:" in output:
+            docs.extend([
+                "",
+                "<b>Configuration Options:</b>",
+                ""
+            ])
+            config_section = output.split("Configuration:")[1]
+            for line in config_section.split('\n'):
+                if line.strip():
+                    docs.append(line.strip())
+        
+        # Format documentation with HTML
+        formatted_docs = "<br>".join(docs)
+        formatted_docs = formatted_docs.replace("*", "•")  # Convert asterisks to bullets
+        
+        self.doc_label.setText(formatted_docs)
             
     def check_dependencies(self):
         """Check if required dependencies are available"""
@@ -245,9 +251,7 @@ class NewRemoteDialog(QDialog):
             missing_deps.append('rclone')
             
         # Check for FUSE
-        try:
-            subprocess.run(['fusermount', '-V'], capture_output=True)
-        except FileNotFoundError:
+        if not shutil.which('fusermount'):
             missing_deps.append('fuse3')
             
         return missing_deps
@@ -292,9 +296,7 @@ class NewRemoteDialog(QDialog):
             
             for term in terminals:
                 logger.debug(f"Checking for terminal emulator: {term}")
-                which_result = subprocess.run(['which', term], capture_output=True)
-                
-                if which_result.returncode == 0:
+                if shutil.which(term):
                     logger.info(f"Found terminal emulator: {term}")
                     
                     # Base rclone command
@@ -342,7 +344,7 @@ read
                             cmd = [term, '-e', script_path]
                     break
                 else:
-                    logger.debug(f"Terminal {term} not found: {which_result.stderr.decode()}")
+                    logger.debug(f"Terminal {term} not found")
             
             if cmd:
                 logger.info(f"Executing command: {' '.join(cmd)}")
@@ -0,0 +1,328 @@
+"""Transfer Preview Dialog"""
+
+import json
+import re
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QComboBox, QTableView, QHeaderView, QMessageBox)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QProcess, QTimer
+from ..listing import parse_lsjson_line
+from ..formatting import format_size
+
+NEW = '+'        # Only in the source
+DELETED = '-'    # Only in the destination
+CHANGED = '*'    # In both, but different
+SAME = '='
+ERROR = '!'
+
+# What a dry run logs instead of changing a file, e.g. "Skipped copy as --dry-run is set (size 1Ki)"
+SKIPPED = re.compile(r'^Skipped (.+?) as --dry-run is set')
+
+STATUS_NAMES = {NEW: "New", CHANGED: "Changed", DELETED: "Deleted", ERROR: "Error"}
+
+class DiffModel(QAbstractTableModel):
+    """Differences between source and destination, appended in batches.
+
+    Rows are plain lists and the view only asks for the visible ones, so
+    the table stays responsive with millions of entries.
+    """
+    HEADERS = ["Status", "Path", "Size"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []       # [status, path, size]
+        self.pending = []
+        self.status_filter = None
+        self.visible = None  # Row numbers shown while filtering
+        self.by_path = {}    # (status, path) -> row number, for filling in sizes
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows) if self.visible is None else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row() if self.visible is None else self.visible[index.row()]
+        status, path, size = self.rows[row]
+        if index.column() == 0:
+            return STATUS_NAMES[status]
+        if index.column() == 1:
+            return path
+        return "" if size is None else format_size(size)
+
+    def add(self, status, path, size=None):
+        self.pending.append([status, path, size])
+
+    def flush(self):
+        """Show rows added since the last flush"""
+        if not self.pending:
+            return
+        start = len(self.rows)
+        for offset, row in enumerate(self.pending):
+            self.by_path[(row[0], row[1])] = start + offset
+        new_visible = [start + offset for offset, row in enumerate(self.pending)
+                       if self.status_filter is None or row[0] == self.status_filter]
+
+        first = self.rowCount()
+        count = len(self.pending) if self.visible is None else len(new_visible)
+        if count:
+            self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self.rows.extend(self.pending)
+        if self.visible is not None:
+            self.visible.extend(new_visible)
+        if count:
+            self.endInsertRows()
+        self.pending = []
+
+    def set_size(self, status, path, size):
+        row = self.by_path.get((status, path))
+        if row is not None:
+            self.rows[row][2] = size
+
+    def sizes_changed(self):
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 2), self.index(self.rowCount() - 1, 2))
+
+    def set_filter(self, status):
+        self.beginResetModel()
+        self.status_filter = status
+        self.visible = None if status is None else [
+            i for i, row in enumerate(self.rows) if row[0] == status
+        ]
+        self.endResetModel()
+
+    def paths(self, *statuses, without_size=False):
+        return [path for status, path, size in self.rows
+                if status in statuses and not (without_size and size is not None)]
+
+class PreviewDialog(QDialog):
+    """Shows what a sync or copy would change, then runs it on just those files"""
+
+    def __init__(self, rclone_manager, operation, source, dest, flags, parent=None):
+        super().__init__(parent)
+        self.rclone = rclone_manager
+        self.operation = operation
+        self.source = rclone_manager.direct_path(source)
+        self.dest = dest
+        self.flags = list(flags)
+        self.counts = {NEW: 0, CHANGED: 0, DELETED: 0, SAME: 0, ERROR: 0}
+        self.buffer = ''
+        self.new_paths = set()  # Files the dry run found missing on the destination
+        self.last_error = ''
+        self.size_processes = []
+        self.transfer_id = None
+        self.setWindowTitle(f"Preview {operation.title()}: {source} → {dest}")
+        self.setMinimumSize(800, 550)
+        self.init_ui()
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.model.flush)
+        self.flush_timer.start(200)
+
+        self.start_check()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        filters = QHBoxLayout()
+        filters.addWidget(QLabel("Show:"))
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItem("All changes", None)
+        for status in (NEW, CHANGED, DELETED, ERROR):
+            self.filter_combo.addItem(STATUS_NAMES[status], status)
+        self.filter_combo.currentIndexChanged.connect(
+            lambda: self.model.set_filter(self.filter_combo.currentData())
+        )
+        filters.addWidget(self.filter_combo)
+        filters.addStretch()
+        layout.addLayout(filters)
+
+        self.model = DiffModel(self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.view.verticalHeader().setVisible(False)
+        # Fixed row heights keep scrolling cheap however many rows there are
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.view.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.view)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(cancel_btn)
+
+        buttons.addStretch()
+
+        self.run_btn = QPushButton(f"Run {self.operation.title()}")
+        self.run_btn.setEnabled(False)
+        self.run_btn.clicked.connect(self.run_transfer)
+        buttons.addWidget(self.run_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def start_check(self):
+        """Dry-run the real job, streaming what it would do.
+
+        Running the job itself rather than ``rclone check`` means its
+        filters and its way of comparing files (modtime, checksum or size)
+        decide what counts as changed, exactly as in the run that follows.
+        """
+        flags = [flag for flag in self.flags if flag not in ('--dry-run', '-v', '-vv', '-q')]
+        args = [self.operation, self.source, self.dest] + flags + ['--dry-run', '-vv', '--use-json-log']
+        self.process = QProcess(self)
+        self.process.setProgram('rclone')
+        self.process.setArguments(args)
+        self.process.readyReadStandardError.connect(self.read_check_output)
+        self.process.finished.connect(self.on_check_finished)
+        self.status_label.setText("Comparing...")
+        self.process.start()
+
+    def read_check_output(self):
+        self.buffer += self.process.readAllStandardError().data().decode(errors='replace')
+        *lines, self.buffer = self.buffer.split('\n')
+        for line in lines:
+            self.parse_log_line(line.strip())
+        self.show_counts("Comparing...")
+
+    def parse_log_line(self, line):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            if line:
+                self.last_error = line
+            return
+        msg = entry.get('msg', '')
+        path = entry.get('object', '')
+        if entry.get('level') in ('error', 'critical'):
+            self.last_error = msg
+            if path:
+                self.counts[ERROR] += 1
+                self.model.add(ERROR, path)
+            return
+        # Directories are created and removed along with their files
+        if not path or not entry.get('objectType', '').endswith('Object'):
+            return
+        if msg.startswith('Need to transfer - File not found'):
+            self.new_paths.add(path)
+            return
+        if msg.startswith('Unchanged skipping'):
+            # Unchanged files are only counted; they can be the vast majority
+            self.counts[SAME] += 1
+            return
+        match = SKIPPED.match(msg)
+        if not match:
+            return
+        if match.group(1) == 'delete':
+            status = DELETED
+        elif path in self.new_paths:
+            status = NEW
+        else:
+            # Content or only the modification time differs
+            status = CHANGED
+        size = entry.get('size')
+        self.counts[status] += 1
+        self.model.add(status, path, size if isinstance(size, int) and size >= 0 else None)
+
+    def on_check_finished(self, exit_code, exit_status):
+        self.read_check_output()
+        self.parse_log_line(self.buffer.strip())
+        self.buffer = ''
+        self.model.flush()
+        # Unreadable files also make the dry run exit non-zero, so only a silent failure is an error
+        if exit_code != 0 and not any(self.counts.values()):
+            self.status_label.setText(f"Comparison failed: {self.last_error or exit_code}")
+            return
+        self.run_btn.setEnabled(bool(self.counts[NEW] or self.counts[CHANGED] or
+                                     self.counts[DELETED] or self.counts[ERROR]))
+        # The dry run logs most sizes; older rclone versions leave them to a listing
+        self.show_counts("Fetching sizes...")
+        self.fetch_sizes(self.source, (NEW, CHANGED))
+        self.fetch_sizes(self.dest, (DELETED,))
+        if not self.size_processes:
+            self.model.sizes_changed()
+            self.show_counts("Ready")
+
+    def fetch_sizes(self, root, statuses):
+        """List just the changed files to fill in their sizes"""
+        paths = self.model.paths(*statuses, without_size=True)
+        if not paths:
+            return
+        files_path = self.rclone.journal.files_path(self.rclone.new_transfer_id('preview'))
+        self.rclone.journal.write_file_list(files_path, paths)
+
+        process = QProcess(self)
+        process.setProgram('rclone')
+        process.setArguments(['lsjson', '-R', '--files-only', '--no-mimetype', '--no-modtime',
+                              '--files-from', str(files_path), root])
+        state = {'buffer': ''}
+
+        def read():
+            state['buffer'] += process.readAllStandardOutput().data().decode(errors='replace')
+            *lines, state['buffer'] = state['buffer'].split('\n')
+            for entry in filter(None, map(parse_lsjson_line, lines)):
+                for status in statuses:
+                    self.model.set_size(status, entry['Path'], entry.get('Size'))
+
+        def finished():
+            read()
+            files_path.unlink(missing_ok=True)
+            self.size_processes.remove(process)
+            self.model.sizes_changed()
+            if not self.size_processes:
+                self.show_counts("Ready")
+
+        process.readyReadStandardOutput.connect(read)
+        process.finished.connect(finished)
+        self.size_processes.append(process)
+        process.start()
+
+    def show_counts(self, state):
+        self.status_label.setText(
+            f"{state} {self.counts[NEW]:,} new, {self.counts[CHANGED]:,} changed, "
+            + (f"{self.counts[DELETED]:,} to delete, " if self.operation == 'sync' else "")
+            + f"{self.counts[SAME]:,} unchanged"
+            + (f", {self.counts[ERROR]:,} errors" if self.counts[ERROR] else "")
+        )
+
+    def run_transfer(self):
+        """Start the real job on the files found above, without listing everything again"""
+        # Files that failed to compare are tried again; the job reports them if they still fail
+        statuses = (NEW, CHANGED, DELETED, ERROR)
+        transfer_id = self.rclone.new_transfer_id(self.operation)
+        files_path = self.rclone.journal.files_path(transfer_id)
+        self.rclone.journal.write_file_list(files_path, self.model.paths(*statuses))
+
+        flags = [flag for flag in self.flags if flag != '--dry-run'] + ['--files-from', str(files_path)]
+        if self.operation == 'copy':
+            # sync needs to look at listed files that are gone from the source
+            flags.append('--no-traverse')
+        try:
+            self.transfer_id = self.rclone.start_transfer(self.operation, self.source, self.dest,
+                                                          flags, transfer_id=transfer_id)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to start {self.operation}: {e}")
+            return
+        self.accept()
+
+    def done(self, result):
+        # Stop comparisons nobody will look at
+        self.flush_timer.stop()
+        for process in [self.process] + self.size_processes:
+            if process.state() != QProcess.ProcessState.NotRunning:
+                process.kill()
+        super().done(result)
@@ -1,5 +1,6 @@
 """Rclone configuration dialog"""
 
+import shutil
 import subprocess
 from pathlib import Path
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
@@ -101,7 +102,7 @@ class RcloneConfigDialog(QDialog):
             cmd = None
             
             for term in terminals:
-                if subprocess.run(['which', term], capture_output=True).returncode == 0:
+                if shutil.which(term):
                     if term == 'konsole':
                         cmd = [term, '-e', 'rclone', 'config']
                     elif term == 'gnome-terminal':
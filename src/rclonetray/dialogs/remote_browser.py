@@ -0,0 +1,188 @@
+"""Remote Browser Dialog"""
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QTreeWidget, QTreeWidgetItem)
+from PyQt6.QtCore import Qt, QProcess
+from ..listing import get_listing_cache, join_remote_path, parse_lsjson_line
+from ..formatting import format_size
+
+# Item data roles
+PATH_ROLE = Qt.ItemDataRole.UserRole
+IS_DIR_ROLE = Qt.ItemDataRole.UserRole + 1
+LOADED_ROLE = Qt.ItemDataRole.UserRole + 2
+
+class RemoteBrowserDialog(QDialog):
+    """Pick a path on a remote, listing one directory level at a time"""
+
+    def __init__(self, remote, path="", select_dirs_only=False, parent=None):
+        super().__init__(parent)
+        self.remote = remote
+        self.select_dirs_only = select_dirs_only
+        self.cache = get_listing_cache()
+        self.processes = {}  # Directory path -> (QProcess, parent item, buffer, entries)
+        self.setWindowTitle(f"Browse {remote}:")
+        self.setMinimumSize(500, 450)
+        self.init_ui()
+        self.load(None, "")
+        self.path_label.setText(f"{remote}:{path.strip('/')}")
+        self.selected = path.strip('/')
+        self.selected_is_file = False
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Name", "Size"])
+        self.tree.itemExpanded.connect(self.on_expanded)
+        self.tree.currentItemChanged.connect(self.on_selected)
+        self.tree.itemDoubleClicked.connect(self.on_double_clicked)
+        layout.addWidget(self.tree)
+
+        self.path_label = QLabel()
+        layout.addWidget(self.path_label)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        buttons.addWidget(refresh_btn)
+
+        buttons.addStretch()
+
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(cancel_btn)
+
+        select_btn = QPushButton("Select")
+        select_btn.clicked.connect(self.accept)
+        select_btn.setDefault(True)
+        buttons.addWidget(select_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def selected_path(self):
+        """Path of the selected entry, relative to the remote root"""
+        return self.selected
+
+    def load(self, item, path):
+        """Show the entries of ``path`` under ``item`` (None for the root)"""
+        entries = self.cache.get(self.remote, path)
+        if entries is not None:
+            self.add_entries(item, path, entries)
+            self.mark_loaded(item)
+            return
+        if path in self.processes:
+            return
+
+        # Stream the listing so large directories fill in as they arrive
+        process = QProcess(self)
+        process.setProgram('rclone')
+        process.setArguments(['lsjson', '--no-mimetype', '--no-modtime',
+                              join_remote_path(self.remote, path)])
+        self.processes[path] = (process, item, [''], [])
+        process.readyReadStandardOutput.connect(lambda: self.on_output(path, process))
+        process.finished.connect(lambda code, status: self.on_finished(path, process, code))
+        self.status_label.setText(f"Listing {join_remote_path(self.remote, path)}...")
+        process.start()
+
+    def is_current(self, path, process):
+        """False for listings abandoned by a refresh"""
+        return self.processes.get(path, (None,))[0] is process
+
+    def on_output(self, path, process):
+        if not self.is_current(path, process):
+            return
+        _, item, buffer, entries = self.processes[path]
+        buffer[0] += process.readAllStandardOutput().data().decode(errors='replace')
+        *lines, buffer[0] = buffer[0].split('\n')
+        batch = [entry for entry in map(parse_lsjson_line, lines) if entry]
+        entries.extend(batch)
+        self.add_entries(item, path, batch)
+
+    def on_finished(self, path, process, exit_code):
+        if not self.is_current(path, process):
+            process.deleteLater()
+            return
+        self.on_output(path, process)
+        _, item, _, entries = self.processes.pop(path)
+        if exit_code == 0:
+            self.cache.put(self.remote, path, entries)
+            self.mark_loaded(item)
+            self.status_label.setText(f"{len(entries)} entries")
+        else:
+            error = process.readAllStandardError().data().decode(errors='replace').strip()
+            self.status_label.setText(f"Error listing {join_remote_path(self.remote, path)}: "
+                                      f"{error.splitlines()[-1] if error else exit_code}")
+            if item is not None:
+                # Allow another try on the next expand
+                item.setExpanded(False)
+        process.deleteLater()
+
+    def add_entries(self, item, path, entries):
+        """Add directory entries below ``item``"""
+        items = []
+        for entry in entries:
+            child = QTreeWidgetItem([entry['Name']])
+            child_path = f"{path}/{entry['Name']}" if path else entry['Name']
+            child.setData(0, PATH_ROLE, child_path)
+            child.setData(0, IS_DIR_ROLE, entry.get('IsDir', False))
+            if entry.get('IsDir'):
+                # Placeholder so the directory can be expanded before it is listed
+                child.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            else:
+                child.setText(1, format_size(entry.get('Size', 0)))
+                child.setTextAlignment(1, Qt.AlignmentFlag.AlignRight)
+            items.append(child)
+
+        if item is None:
+            self.tree.addTopLevelItems(items)
+        else:
+            item.addChildren(items)
+
+    def mark_loaded(self, item):
+        if item is not None:
+            item.setData(0, LOADED_ROLE, True)
+            if item.childCount() == 0:
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicator)
+
+    def on_expanded(self, item):
+        if not item.data(0, LOADED_ROLE) and item.childCount() == 0:
+            self.load(item, item.data(0, PATH_ROLE))
+
+    def on_selected(self, item, previous):
+        if item is None:
+            return
+        path = item.data(0, PATH_ROLE)
+        if self.select_dirs_only and not item.data(0, IS_DIR_ROLE):
+            # A file stands for the directory it is in
+            path = path.rpartition('/')[0]
+        self.selected = path
+        self.selected_is_file = not self.select_dirs_only and not item.data(0, IS_DIR_ROLE)
+        self.path_label.setText(f"{self.remote}:{path}")
+
+    def on_double_clicked(self, item, column):
+        if not item.data(0, IS_DIR_ROLE):
+            self.accept()
+
+    def refresh(self):
+        """Drop cached listings and list the remote again"""
+        self.stop_listings()
+        self.cache.invalidate(self.remote)
+        self.tree.clear()
+        self.load(None, "")
+
+    def stop_listings(self):
+        """Kill listings still in progress; their output is ignored"""
+        processes = [process for process, *_ in self.processes.values()]
+        self.processes.clear()
+        for process in processes:
+            process.kill()
+
+    def done(self, result):
+        # Do not leave listings running behind a closed dialog
+        self.stop_listings()
+        super().done(result)
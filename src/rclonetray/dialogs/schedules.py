@@ -0,0 +1,194 @@
+"""Scheduled Jobs Dialog"""
+
+from datetime import datetime
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QComboBox, QLineEdit, QFormLayout, QSpinBox,
+                           QCheckBox, QTableWidget, QTableWidgetItem, QMessageBox)
+from PyQt6.QtCore import Qt
+from .transfer import TransferDialog
+from ..scheduler import parse_schedule
+
+class ScheduleEditDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("New Scheduled Job")
+        self.setMinimumWidth(400)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.name = QLineEdit()
+        self.name.setPlaceholderText("e.g. Nightly backup")
+        form.addRow("Name:", self.name)
+
+        self.operation = QComboBox()
+        self.operation.addItems(["sync", "copy", "bisync"])
+        form.addRow("Operation:", self.operation)
+
+        self.schedule = QLineEdit("0 2 * * *")
+        self.schedule.setToolTip(
+            "Cron expression (minute hour day month weekday), @daily/@hourly/...,\n"
+            "or an interval such as 'every 30m' (units s, m, h, d)"
+        )
+        form.addRow("Schedule:", self.schedule)
+
+        self.jitter = QSpinBox()
+        self.jitter.setRange(0, 3600)
+        self.jitter.setValue(60)
+        self.jitter.setSuffix(" s")
+        form.addRow("Random Delay (max):", self.jitter)
+
+        self.catch_up = QCheckBox("Run once at startup if a run was missed")
+        self.catch_up.setChecked(True)
+        form.addRow("", self.catch_up)
+
+        layout.addLayout(form)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(cancel_btn)
+
+        buttons.addStretch()
+
+        next_btn = QPushButton("Next")
+        next_btn.clicked.connect(self.validate)
+        next_btn.setDefault(True)
+        buttons.addWidget(next_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def validate(self):
+        """Check the schedule expression before accepting"""
+        if not self.name.text().strip():
+            QMessageBox.warning(self, "Error", "Please enter a name for the job")
+            return
+        try:
+            parse_schedule(self.schedule.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Invalid schedule: {e}")
+            return
+        self.accept()
+
+class SchedulesDialog(QDialog):
+    def __init__(self, scheduler, remotes, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.remotes = remotes
+        self.setWindowTitle("Scheduled Jobs")
+        self.setMinimumSize(800, 400)
+        self.init_ui()
+        self.update_table()
+        self.scheduler.schedules_changed.connect(self.update_table)
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(8)
+        self.table.setHorizontalHeaderLabels([
+            "Name", "Operation", "Source", "Destination",
+            "Schedule", "Next Run", "Last Run", "Enabled"
+        ])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.table)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("Add")
+        add_btn.clicked.connect(self.add_schedule)
+        buttons.addWidget(add_btn)
+
+        remove_btn = QPushButton("Remove")
+        remove_btn.clicked.connect(self.remove_schedule)
+        buttons.addWidget(remove_btn)
+
+        toggle_btn = QPushButton("Enable/Disable")
+        toggle_btn.clicked.connect(self.toggle_schedule)
+        buttons.addWidget(toggle_btn)
+
+        run_btn = QPushButton("Run Now")
+        run_btn.clicked.connect(self.run_schedule)
+        buttons.addWidget(run_btn)
+
+        buttons.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def format_time(self, timestamp):
+        if not timestamp:
+            return "Never"
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+    def update_table(self):
+        """Refresh the schedules table"""
+        schedules = list(self.scheduler.schedules.items())
+        self.table.setRowCount(len(schedules))
+
+        for i, (schedule_id, job) in enumerate(schedules):
+            name_item = QTableWidgetItem(job['name'])
+            name_item.setData(Qt.ItemDataRole.UserRole, schedule_id)
+            self.table.setItem(i, 0, name_item)
+            self.table.setItem(i, 1, QTableWidgetItem(job['type']))
+            self.table.setItem(i, 2, QTableWidgetItem(job['source']))
+            self.table.setItem(i, 3, QTableWidgetItem(job['dest']))
+            self.table.setItem(i, 4, QTableWidgetItem(job['schedule']))
+            next_run = self.format_time(job.get('next_run')) if job.get('enabled', True) else "-"
+            self.table.setItem(i, 5, QTableWidgetItem(next_run))
+            self.table.setItem(i, 6, QTableWidgetItem(self.format_time(job.get('last_run'))))
+            self.table.setItem(i, 7, QTableWidgetItem("Yes" if job.get('enabled', True) else "No"))
+
+        self.table.resizeColumnsToContents()
+
+    def selected_schedule(self):
+        row = self.table.currentRow()
+        if row < 0:
+            return None
+        return self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+
+    def add_schedule(self):
+        """Add a schedule: timing first, then source and destination"""
+        edit = ScheduleEditDialog(self)
+        if not edit.exec():
+            return
+
+        operation = edit.operation.currentText()
+        transfer = TransferDialog(operation, self.remotes, self)
+        if not transfer.exec():
+            return
+
+        source, dest, flags = transfer.get_values()
+        try:
+            self.scheduler.add(edit.name.text().strip(), operation, source, dest,
+                               edit.schedule.text(), flags, edit.jitter.value(),
+                               edit.catch_up.isChecked())
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Failed to add schedule: {e}")
+
+    def remove_schedule(self):
+        schedule_id = self.selected_schedule()
+        if schedule_id:
+            self.scheduler.remove(schedule_id)
+
+    def toggle_schedule(self):
+        schedule_id = self.selected_schedule()
+        if schedule_id:
+            enabled = self.scheduler.schedules[schedule_id].get('enabled', True)
+            self.scheduler.set_enabled(schedule_id, not enabled)
+
+    def run_schedule(self):
+        schedule_id = self.selected_schedule()
+        if not schedule_id:
+            return
+        if not self.scheduler.run_now(schedule_id):
+            QMessageBox.warning(self, "Warning", "The job is still running or could not be started")
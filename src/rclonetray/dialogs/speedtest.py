@@ -0,0 +1,170 @@
+"""Speed Test Dialog"""
+
+import threading
+from datetime import datetime
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QLineEdit, QFormLayout, QGroupBox,
+                           QTableWidget, QTableWidgetItem, QMessageBox)
+from PyQt6.QtCore import QTimer
+from ..speedtest import CANCELLED, DEFAULT_CONCURRENCY, DEFAULT_SIZES, run_speed_test
+
+class SpeedTestDialog(QDialog):
+    """Measure what throughput a remote sustains before a large transfer"""
+
+    def __init__(self, rclone_manager, remote, parent=None):
+        super().__init__(parent)
+        self.rclone = rclone_manager
+        self.remote = remote
+        self.running = False
+        self.message = ""  # Progress message set by the worker
+        self.stop_event = threading.Event()
+        self.setWindowTitle(f"Speed Test - {remote}:")
+        self.setMinimumSize(650, 550)
+
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(lambda: self.status_label.setText(self.message))
+
+        self.init_ui()
+        self.show_history()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        options_group = QGroupBox("Test Data")
+        options_layout = QFormLayout()
+        self.sizes_edit = QLineEdit(", ".join(str(size) for size in DEFAULT_SIZES))
+        options_layout.addRow("File sizes (MB):", self.sizes_edit)
+        self.concurrency_edit = QLineEdit(", ".join(str(count) for count in DEFAULT_CONCURRENCY))
+        options_layout.addRow("Parallel transfers:", self.concurrency_edit)
+        options_layout.addRow(QLabel("Each run uploads as many files as transfers run in parallel, "
+                                     "then downloads them again."))
+        options_group.setLayout(options_layout)
+        layout.addWidget(options_group)
+
+        # Throughput of the latest test
+        self.samples_table = QTableWidget()
+        self.samples_table.setColumnCount(4)
+        self.samples_table.setHorizontalHeaderLabels(["Direction", "File Size", "Transfers", "Throughput"])
+        self.samples_table.horizontalHeader().setStretchLastSection(True)
+        self.samples_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.samples_table)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        history_group = QGroupBox("History")
+        history_layout = QVBoxLayout()
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(5)
+        self.history_table.setHorizontalHeaderLabels(["Tested", "Upload", "Download",
+                                                      "Latency p50", "Transfers"])
+        self.history_table.horizontalHeader().setStretchLastSection(True)
+        self.history_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        history_layout.addWidget(self.history_table)
+        history_group.setLayout(history_layout)
+        layout.addWidget(history_group)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        self.run_btn = QPushButton("Run Test")
+        self.run_btn.clicked.connect(self.run)
+        buttons.addWidget(self.run_btn)
+
+        buttons.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def parse_numbers(self, text):
+        numbers = [int(part) for part in text.replace(',', ' ').split()]
+        if not numbers or min(numbers) < 1:
+            raise ValueError("Enter positive whole numbers separated by commas")
+        return numbers
+
+    def run(self):
+        """Run the test in the background"""
+        if self.running:
+            return
+        try:
+            sizes = self.parse_numbers(self.sizes_edit.text())
+            concurrency = self.parse_numbers(self.concurrency_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        # Every run uploads its files and downloads them again
+        total = 2 * sum(sizes) * sum(set(concurrency))
+        if QMessageBox.question(
+            self, "Run Speed Test",
+            f"This uploads and downloads about {total:,} MB to {self.remote}:, "
+            f"which may count against quotas or cost money. Continue?"
+        ) != QMessageBox.StandardButton.Yes:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+        self.run_btn.setEnabled(False)
+        self.message = "Starting..."
+        self.progress_timer.start(500)
+        self.rclone.runner.run_long(
+            run_speed_test, self.show_result, self.remote, sizes, concurrency, 'rclone',
+            self.set_message, self.stop_event.is_set
+        )
+
+    def set_message(self, message):
+        self.message = message
+
+    def show_result(self, result, error):
+        self.running = False
+        self.progress_timer.stop()
+        self.run_btn.setEnabled(True)
+        if error:
+            self.status_label.setText(f"Speed test failed: {error}")
+            return
+        self.rclone.record_speed_test(result)
+
+        self.samples_table.setRowCount(len(result.samples))
+        for i, sample in enumerate(result.samples):
+            self.samples_table.setItem(i, 0, QTableWidgetItem(sample['direction'].title()))
+            self.samples_table.setItem(i, 1, QTableWidgetItem(f"{sample['size_mb']} MB"))
+            self.samples_table.setItem(i, 2, QTableWidgetItem(str(sample['concurrency'])))
+            self.samples_table.setItem(i, 3, QTableWidgetItem(f"{sample['mbps']:.1f} MB/s"))
+        self.samples_table.resizeColumnsToContents()
+        self.summary_label.setText(result.describe())
+        if result.error == CANCELLED:
+            self.status_label.setText("Speed test stopped; the transfer defaults were left unchanged.")
+        elif result.error:
+            self.status_label.setText("Speed test failed; the transfer defaults were left unchanged.")
+        else:
+            self.status_label.setText("New transfers to and from this remote use the recommended "
+                                      "number of transfers unless they set their own.")
+        self.show_history()
+
+    def show_history(self):
+        results = list(reversed(self.rclone.speed_tests.results(self.remote)))
+        self.history_table.setRowCount(len(results))
+        for i, result in enumerate(results):
+            tested = datetime.fromtimestamp(result.tested_at).strftime('%Y-%m-%d %H:%M')
+            self.history_table.setItem(i, 0, QTableWidgetItem(tested))
+            for column, direction in ((1, 'upload'), (2, 'download')):
+                best = result.best_mbps(direction)
+                text = f"{best:.1f} MB/s" if best is not None else "-"
+                self.history_table.setItem(i, column, QTableWidgetItem(text))
+            latency = result.latency.get('upload')
+            self.history_table.setItem(i, 3, QTableWidgetItem(f"{latency['p50']:.0f} ms" if latency else "-"))
+            transfers = ("stopped" if result.error == CANCELLED else "failed") if result.error else \
+                f"{result.best_concurrency('upload') or '-'} up / {result.best_concurrency('download') or '-'} down"
+            self.history_table.setItem(i, 4, QTableWidgetItem(transfers))
+        self.history_table.resizeColumnsToContents()
+
+    def done(self, result):
+        # Stop after the current run; the worker removes the test data
+        self.stop_event.set()
+        self.progress_timer.stop()
+        super().done(result)
@@ -0,0 +1,185 @@
+"""Storage Analyzer Dialog"""
+
+import threading
+from datetime import datetime
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QTableWidget, QTableWidgetItem, QProgressBar,
+                           QGroupBox, QSplitter)
+from PyQt6.QtCore import Qt, QTimer
+from ..analyzer import SizeTree, scan_remote
+from ..formatting import format_size
+
+class StorageAnalyzerDialog(QDialog):
+    """Drill-down view of what takes up space on a remote"""
+
+    def __init__(self, rclone_manager, remote, parent=None):
+        super().__init__(parent)
+        self.rclone = rclone_manager
+        self.remote = remote
+        self.cache_path = rclone_manager.data_dir / 'analysis' / f"{remote}.pickle"
+        self.tree = None
+        self.node = 0
+        self.scanned = 0  # Files read by a running scan
+        self.scanning = False
+        self.stop_event = threading.Event()
+        self.setWindowTitle(f"Storage Usage - {remote}:")
+        self.setMinimumSize(700, 550)
+
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(self.show_progress)
+
+        self.init_ui()
+        self.tree = SizeTree.load(self.cache_path)
+        if self.tree:
+            self.show_node(0)
+        else:
+            self.rescan()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # Location and navigation
+        nav = QHBoxLayout()
+        self.up_btn = QPushButton("Up")
+        self.up_btn.clicked.connect(self.go_up)
+        nav.addWidget(self.up_btn)
+        self.location_label = QLabel()
+        nav.addWidget(self.location_label)
+        nav.addStretch()
+        layout.addLayout(nav)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+
+        # Directory contents, largest first
+        self.table = QTableWidget()
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(["Name", "Size", "Share", "Files"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(self.open_row)
+        splitter.addWidget(self.table)
+
+        # Largest files anywhere on the remote
+        files_group = QGroupBox("Largest Files")
+        files_layout = QVBoxLayout()
+        self.files_table = QTableWidget()
+        self.files_table.setColumnCount(2)
+        self.files_table.setHorizontalHeaderLabels(["Path", "Size"])
+        self.files_table.horizontalHeader().setStretchLastSection(True)
+        self.files_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        files_layout.addWidget(self.files_table)
+        files_group.setLayout(files_layout)
+        splitter.addWidget(files_group)
+        layout.addWidget(splitter)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        buttons = QHBoxLayout()
+        self.rescan_btn = QPushButton("Rescan")
+        self.rescan_btn.clicked.connect(self.rescan)
+        buttons.addWidget(self.rescan_btn)
+
+        buttons.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def rescan(self):
+        """List the whole remote again in the background"""
+        if self.scanning:
+            return
+        self.scanning = True
+        self.scanned = 0
+        self.stop_event.clear()
+        self.rescan_btn.setEnabled(False)
+        self.progress_timer.start(500)
+        self.show_progress()
+        self.rclone.runner.run_long(
+            scan_remote, self.on_scan_finished,
+            self.remote, self.cache_path, self.set_scanned, self.stop_event.is_set
+        )
+
+    def set_scanned(self, count):
+        # Called from the worker thread; only a plain attribute is touched
+        self.scanned = count
+
+    def show_progress(self):
+        self.status_label.setText(f"Scanning {self.remote}: ... {self.scanned:,} files so far")
+
+    def on_scan_finished(self, tree, error):
+        self.scanning = False
+        self.progress_timer.stop()
+        self.rescan_btn.setEnabled(True)
+        if error:
+            self.status_label.setText(f"Scan failed: {error}")
+            return
+        if tree:
+            self.tree = tree
+            self.show_node(0)
+
+    def show_node(self, node):
+        """Show the contents of a directory"""
+        tree = self.tree
+        self.node = node
+        path = tree.path(node)
+        self.location_label.setText(f"{self.remote}:{path}")
+        self.up_btn.setEnabled(node != 0)
+
+        total = tree.sizes[node] or 1
+        children = tree.children.get(node, [])
+        rows = [(tree.names[child] + '/', tree.sizes[child], tree.counts[child], child)
+                for child in children]
+        if tree.own_counts[node]:
+            # Files directly in this directory share one row
+            rows.append((f"({tree.own_counts[node]} files)", tree.own_sizes[node],
+                         tree.own_counts[node], None))
+        rows.sort(key=lambda row: row[1], reverse=True)
+
+        self.table.setRowCount(len(rows))
+        for i, (name, size, count, child) in enumerate(rows):
+            name_item = QTableWidgetItem(name)
+            name_item.setData(Qt.ItemDataRole.UserRole, child)
+            self.table.setItem(i, 0, name_item)
+            size_item = QTableWidgetItem(format_size(size))
+            size_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(i, 1, size_item)
+            share = QProgressBar()
+            share.setValue(int(size * 100 / total))
+            self.table.setCellWidget(i, 2, share)
+            self.table.setItem(i, 3, QTableWidgetItem(f"{count:,}"))
+        self.table.resizeColumnsToContents()
+
+        # Largest files below the current directory
+        prefix = f"{path}/" if path else ""
+        files = [(size, file_path) for size, file_path in tree.top_files if file_path.startswith(prefix)]
+        self.files_table.setRowCount(len(files))
+        for i, (size, file_path) in enumerate(files):
+            self.files_table.setItem(i, 0, QTableWidgetItem(file_path))
+            self.files_table.setItem(i, 1, QTableWidgetItem(format_size(size)))
+        self.files_table.resizeColumnsToContents()
+
+        scanned_at = datetime.fromtimestamp(tree.scanned_at).strftime('%Y-%m-%d %H:%M') if tree.scanned_at else "unknown"
+        self.status_label.setText(f"{format_size(tree.sizes[0])} in {tree.counts[0]:,} files, "
+                                  f"{len(tree.names):,} directories (scanned {scanned_at})")
+
+    def open_row(self, row, column):
+        child = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        if child is not None:
+            self.show_node(child)
+
+    def go_up(self):
+        if self.tree and self.node:
+            self.show_node(self.tree.parents[self.node])
+
+    def done(self, result):
+        # Abandon a scan nobody will look at
+        self.stop_event.set()
+        self.progress_timer.stop()
+        super().done(result)
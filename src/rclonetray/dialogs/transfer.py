@@ -3,14 +3,22 @@
 import os
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                            QLabel, QComboBox, QLineEdit, QFormLayout,
-                           QGroupBox, QCheckBox)
+                           QGroupBox, QCheckBox, QFileDialog, QMessageBox,
+                           QListWidget, QListWidgetItem)
 from PyQt6.QtCore import Qt
+from .remote_browser import RemoteBrowserDialog
 
 class TransferDialog(QDialog):
-    def __init__(self, operation_type, remotes, parent=None):
+    def __init__(self, operation_type, remotes, parent=None, allow_preview=False, advise=None):
         super().__init__(parent)
-        self.operation_type = operation_type  # 'sync' or 'copy'
+        self.operation_type = operation_type  # 'sync', 'copy', 'bisync', 'replicate' or 'watch'
         self.remotes = remotes
+        self.allow_preview = allow_preview and operation_type in ('sync', 'copy')
+        # Callable (callback, source, dest, flags) that works out an Advice in the
+        # background and hands it to callback(advice, error)
+        self.advise = advise if operation_type in ('sync', 'copy') else None
+        self.advised_flags = []
+        self.source_file = None  # Source path picked as a single file in the browser
         self.setWindowTitle(f"New {operation_type.title()} Operation")
         self.setMinimumWidth(500)
         self.init_ui()
@@ -18,32 +26,59 @@ class TransferDialog(QDialog):
     def init_ui(self):
         layout = QVBoxLayout()
         
-        # Source selection
-        source_group = QGroupBox("Source")
+        # Source selection; bisync has no direction, just two paths
+        source_group = QGroupBox("Path 1" if self.operation_type == 'bisync' else "Source")
         source_layout = QFormLayout()
         
-        self.source_remote = QComboBox()
-        self.source_remote.addItems(self.remotes)
-        source_layout.addRow("Remote:", self.source_remote)
-        
-        self.source_path = QLineEdit()
-        self.source_path.setPlaceholderText("Path (optional)")
-        source_layout.addRow("Path:", self.source_path)
+        if self.operation_type == 'watch':
+            # Watch mode pushes a local folder, so the source is a directory
+            self.source_remote = None
+            self.source_path = QLineEdit()
+            self.source_path.setPlaceholderText("Local folder to watch")
+            browse_layout = QHBoxLayout()
+            browse_layout.addWidget(self.source_path)
+            browse_btn = QPushButton("Browse...")
+            browse_btn.clicked.connect(self.browse_local_source)
+            browse_layout.addWidget(browse_btn)
+            source_layout.addRow("Folder:", browse_layout)
+        else:
+            self.source_remote = QComboBox()
+            self.source_remote.addItems(self.remotes)
+            source_layout.addRow("Remote:", self.source_remote)
+            
+            self.source_path = QLineEdit()
+            self.source_path.setPlaceholderText("Path (optional)")
+            source_layout.addRow("Path:", self.path_row(self.source_remote, self.source_path))
         
         source_group.setLayout(source_layout)
         layout.addWidget(source_group)
         
         # Destination selection
-        dest_group = QGroupBox("Destination")
+        if self.operation_type == 'replicate':
+            dest_group = QGroupBox("Destinations")
+        else:
+            dest_group = QGroupBox("Path 2" if self.operation_type == 'bisync' else "Destination")
         dest_layout = QFormLayout()
         
-        self.dest_remote = QComboBox()
-        self.dest_remote.addItems(self.remotes)
-        dest_layout.addRow("Remote:", self.dest_remote)
-        
         self.dest_path = QLineEdit()
         self.dest_path.setPlaceholderText("Path (optional)")
-        dest_layout.addRow("Path:", self.dest_path)
+        if self.operation_type == 'replicate':
+            # The same path on every checked remote
+            self.dest_remote = None
+            self.dest_list = QListWidget()
+            for remote in self.remotes:
+                item = QListWidgetItem(remote)
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(Qt.CheckState.Unchecked)
+                self.dest_list.addItem(item)
+            self.dest_list.setMaximumHeight(120)
+            dest_layout.addRow("Remotes:", self.dest_list)
+            dest_layout.addRow("Path:", self.dest_path)
+        else:
+            self.dest_remote = QComboBox()
+            self.dest_remote.addItems(self.remotes)
+            dest_layout.addRow("Remote:", self.dest_remote)
+            dest_layout.addRow("Path:", self.path_row(self.dest_remote, self.dest_path))
         
         dest_group.setLayout(dest_layout)
         layout.addWidget(dest_group)
@@ -60,11 +95,34 @@ class TransferDialog(QDialog):
         options_layout.addWidget(self.verbose)
         
         self.update = QCheckBox("Skip files that are newer on destination")
-        options_layout.addWidget(self.update)
+        if self.operation_type != 'bisync':
+            options_layout.addWidget(self.update)
         
         self.create_empty_dirs = QCheckBox("Create empty directories")
         options_layout.addWidget(self.create_empty_dirs)
         
+        self.preview = QCheckBox("Preview changes before starting")
+        if self.allow_preview:
+            options_layout.addWidget(self.preview)
+        
+        self.resync = QCheckBox("Force a full resync (Path 1 wins, nothing is deleted)")
+        if self.operation_type == 'bisync':
+            options_layout.addWidget(self.resync)
+        
+        if self.advise:
+            advice_layout = QHBoxLayout()
+            advise_btn = QPushButton("Suggest Flags...")
+            advise_btn.clicked.connect(self.show_advice)
+            advice_layout.addWidget(advise_btn)
+            self.advice_label = QLabel()
+            advice_layout.addWidget(self.advice_label)
+            advice_layout.addStretch()
+            options_layout.addLayout(advice_layout)
+        
+        if self.operation_type == 'watch':
+            self.propagate_deletes = QCheckBox("Propagate deletions during periodic full sync")
+            options_layout.addWidget(self.propagate_deletes)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -84,15 +142,94 @@ class TransferDialog(QDialog):
         layout.addLayout(buttons)
         self.setLayout(layout)
         
+    def path_row(self, remote_combo, path_edit):
+        """Path field with a button to pick the path from a listing of the remote"""
+        row = QHBoxLayout()
+        row.addWidget(path_edit)
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(lambda: self.browse_remote(remote_combo, path_edit))
+        row.addWidget(browse_btn)
+        return row
+
+    def browse_remote(self, remote_combo, path_edit):
+        """Pick a path on the selected remote"""
+        remote = remote_combo.currentText()
+        if not remote:
+            return
+        # Destinations are directories; a sync source has to be one too
+        dirs_only = path_edit is self.dest_path or self.operation_type != 'copy'
+        browser = RemoteBrowserDialog(remote, path_edit.text(), dirs_only, self)
+        if browser.exec():
+            path_edit.setText(browser.selected_path())
+            if path_edit is self.source_path:
+                self.source_file = browser.selected_path() if browser.selected_is_file else None
+
+    def show_advice(self):
+        """Recommend listing and comparison flags for this job and offer to use them"""
+        self.advised_flags = []
+        self.advice_label.setText("Looking up both sides...")
+        source, dest, flags = self.get_values()
+        self.advise(self.on_advice, source, dest, flags)
+
+    def on_advice(self, advice, error):
+        self.advice_label.clear()
+        if not self.isVisible():
+            return
+        if error:
+            QMessageBox.warning(self, "Suggested Flags", f"Could not suggest flags: {error}")
+            return
+        if not advice.flags:
+            QMessageBox.information(self, "Suggested Flags", advice.summary())
+            return
+        reply = QMessageBox.question(
+            self, "Suggested Flags",
+            f"{advice.summary()}\n\nAdd {' '.join(advice.flags)} to this job?"
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.advised_flags = advice.flags
+            self.advice_label.setText(' '.join(advice.flags))
+
+    def browse_local_source(self):
+        """Pick a local folder to watch"""
+        path = QFileDialog.getExistingDirectory(self, "Folder to Watch", self.source_path.text())
+        if path:
+            self.source_path.setText(path)
+
+    def source_is_file(self):
+        """Whether the source is a single file picked in the browser and not edited since"""
+        return self.source_file is not None and self.source_path.text() == self.source_file
+
+    def get_full_mode(self):
+        """Operation used for periodic full runs in watch mode"""
+        return 'sync' if self.propagate_deletes.isChecked() else 'copy'
+
+    def get_destinations(self):
+        """Checked destinations of a replication"""
+        dests = []
+        for i in range(self.dest_list.count()):
+            item = self.dest_list.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                dest = f"{item.text()}:"
+                if self.dest_path.text():
+                    dest = os.path.join(dest, self.dest_path.text().lstrip('/'))
+                dests.append(dest)
+        return dests
+
     def get_values(self):
-        """Get dialog values"""
-        source = f"{self.source_remote.currentText()}:"
-        if self.source_path.text():
-            source = os.path.join(source, self.source_path.text().lstrip('/'))
+        """Get dialog values; for a replication the destination is a list"""
+        if self.source_remote is None:
+            source = self.source_path.text()
+        else:
+            source = f"{self.source_remote.currentText()}:"
+            if self.source_path.text():
+                source = os.path.join(source, self.source_path.text().lstrip('/'))
             
-        dest = f"{self.dest_remote.currentText()}:"
-        if self.dest_path.text():
-            dest = os.path.join(dest, self.dest_path.text().lstrip('/'))
+        if self.dest_remote is None:
+            dest = self.get_destinations()
+        else:
+            dest = f"{self.dest_remote.currentText()}:"
+            if self.dest_path.text():
+                dest = os.path.join(dest, self.dest_path.text().lstrip('/'))
             
         # Build flags list
         flags = []
@@ -104,5 +241,8 @@ class TransferDialog(QDialog):
             flags.append('--update')
         if self.create_empty_dirs.isChecked():
             flags.append('--create-empty-dirs')
+        if self.resync.isChecked():
+            flags.append('--resync')
+        flags.extend(self.advised_flags)
             
         return source, dest, flags
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""Keeps the VFS cache and local transfer destinations from filling their disks"""
+
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .formatting import format_size
+
+GIB = 1024 ** 3
+
+# --vfs-cache-max-size never goes below this, so a nearly full disk still caches something
+MIN_CACHE_SIZE = GIB // 4
+
+# First rclone with --vfs-cache-min-free-space
+MIN_FREE_SPACE_VERSION = (1, 64)
+
+# Seconds; a disk that would fill sooner at the current rate counts as low
+FILL_HORIZON = 600
+
+# Seconds between walks of the VFS caches to add up what they hold
+CACHE_USAGE_INTERVAL = 300
+
+# Transfer types that write to their destination (and bisync to both sides)
+WRITE_TYPES = ('sync', 'copy', 'bisync')
+
+OK = 'ok'
+LOW = 'low'
+CRITICAL = 'critical'
+
+def default_cache_dir() -> Path:
+    """Where rclone keeps its VFS cache unless --cache-dir says otherwise"""
+    base = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+    return Path(base) / 'rclone'
+
+def cache_dir_from_args(args: List[str]) -> Path:
+    for i, arg in enumerate(args):
+        if arg == '--cache-dir' and i + 1 < len(args):
+            return Path(args[i + 1])
+        if arg.startswith('--cache-dir='):
+            return Path(arg.partition('=')[2])
+    return default_cache_dir()
+
+def existing_parent(path: Path) -> Path:
+    """Nearest directory of ``path`` that exists, for destinations not created yet"""
+    path = Path(path).expanduser().absolute()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+def disk_usage_bytes(path: Path) -> int:
+    """Bytes a directory takes on disk; cached files are sparse, so blocks are counted"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except OSError:
+                pass
+    return total
+
+def parse_version(text: str) -> Tuple[int, ...]:
+    """(1, 66, 0) from 'rclone v1.66.0'; () if there is no version"""
+    match = re.search(r'v(\d+)\.(\d+)(?:\.(\d+))?', text or '')
+    return tuple(int(part) for part in match.groups() if part is not None) if match else ()
+
+def format_version(version: Tuple[int, ...]) -> str:
+    """'v1.66.0' from (1, 66, 0); '' if the version is unknown"""
+    return 'v' + '.'.join(str(part) for part in version) if version else ''
+
+def cache_max_size(free: int, used: int, reserve: int, share: float, mounts: int) -> int:
+    """--vfs-cache-max-size for one of ``mounts`` mounts sharing a cache disk.
+
+    What the cache already holds counts as usable, since rclone evicts it
+    to stay under the limit; ``reserve`` always stays free for everything else.
+    """
+    usable = max(free + used - reserve, 0)
+    return max(int(usable * share / max(mounts, 1)), MIN_CACHE_SIZE)
+
+class DiskState:
+    """Free space of one filesystem and how fast it is shrinking"""
+
+    def __init__(self, path: str, free: int, total: int):
+        self.path = path
+        self.free = free
+        self.total = total
+        self.checked_at = time.monotonic()
+        self.rate = 0.0  # Bytes per second being used up, negative when space is freed
+        self.level = OK
+
+    @property
+    def seconds_left(self) -> Optional[float]:
+        """Time until the disk is full at the current rate, None if it is not filling"""
+        if self.rate <= 0:
+            return None
+        return self.free / self.rate
+
+    def describe(self) -> str:
+        text = f"{format_size(self.free)} free on {self.path}"
+        if self.seconds_left is not None and self.seconds_left < FILL_HORIZON * 6:
+            text += f", full in about {self.seconds_left / 60:.0f} min"
+        return text
+
+def measure(paths: List[str], cache_dirs: List[str]) -> Tuple[Dict[str, Tuple[int, int, int]], Dict[str, int]]:
+    """Device, free and total bytes per path, and bytes held per VFS cache
+    directory (worker side, disks may be slow)"""
+    results = {}
+    for path in paths:
+        try:
+            existing = existing_parent(Path(path))
+            usage = shutil.disk_usage(existing)
+            results[path] = (os.stat(existing).st_dev, usage.free, usage.total)
+        except OSError as e:
+            print(f"Error checking free space of {path}: {e}")
+    used = {}
+    for cache_dir in cache_dirs:
+        vfs = Path(cache_dir) / 'vfs'
+        used[cache_dir] = disk_usage_bytes(vfs) if vfs.exists() else 0
+    return results, used
+
+class DiskGuard(QObject):
+    """Watches free space where rclone writes and steps in before a disk fills.
+
+    Mounts get a --vfs-cache-max-size that fits the cache disk. New
+    transfers into a disk that is running low are started with a bandwidth
+    limit, and running ones are paused once less than ``min_free`` would be
+    left, then resumed when space is back. Each change of level is reported
+    once through ``warning``.
+    """
+    warning = pyqtSignal(str)  # Message for a tray notification
+
+    def __init__(self, rclone_manager, interval: int = 15, min_free_gb: float = 2.0,
+                 cache_share: float = 0.5, low_bwlimit: str = '10M'):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.interval = interval
+        self.min_free = int(min_free_gb * GIB)
+        self.cache_share = cache_share
+        self.low_bwlimit = low_bwlimit
+        self.states: Dict[int, DiskState] = {}  # Device -> latest state
+        self.devices: Dict[str, int] = {}  # Watched path -> device
+        self.paused: Dict[str, int] = {}  # Transfer id -> device whose space paused it
+        self.cache_used: Dict[str, int] = {}  # VFS cache directory -> bytes it holds
+        self._cache_measured_at: Optional[float] = None
+        self._pending = False
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.setInterval(interval * 1000)
+
+    def start(self):
+        self.timer.start()
+        self.check()
+
+    def stop(self):
+        self.timer.stop()
+
+    @staticmethod
+    def written_paths(transfer: dict) -> List[str]:
+        """Local paths a transfer writes to"""
+        if transfer['type'] not in WRITE_TYPES:
+            return []
+        paths = [transfer['dest']] + ([transfer['source']] if transfer['type'] == 'bisync' else [])
+        return [path for path in paths if not (':' in path and not path.startswith('/'))]
+
+    def cache_dirs(self) -> List[str]:
+        """Cache directories of the default mount options and of every mount started here"""
+        config = self.rclone.config
+        if not config:
+            return [str(default_cache_dir())]
+        options = [config.get_mount_options()] + [config.get_mount_options(remote)
+                                                  for remote in self.rclone.mounts]
+        return list(dict.fromkeys(str(cache_dir_from_args(opts.split())) for opts in options))
+
+    def watched_paths(self) -> List[str]:
+        paths = self.cache_dirs()
+        for transfer in self.rclone.transfers.values():
+            if transfer['status'] in ('starting', 'running', 'paused'):
+                paths.extend(self.written_paths(transfer))
+        return list(dict.fromkeys(paths))
+
+    def check(self):
+        """Measure every watched disk in the background"""
+        if self._pending:
+            return
+        self._pending = True
+        # Walking the caches takes far longer than asking for free space, so it is done less often
+        cache_dirs = []
+        if self._cache_measured_at is None or \
+                time.monotonic() - self._cache_measured_at >= CACHE_USAGE_INTERVAL:
+            cache_dirs = self.cache_dirs()
+            self._cache_measured_at = time.monotonic()
+        self.rclone.runner.run_in_background(measure, self._on_measured, self.watched_paths(), cache_dirs)
+
+    def _on_measured(self, result, error):
+        self._pending = False
+        if error:
+            print(f"Error checking free space: {error}")
+            return
+        results, cache_used = result
+        self.cache_used.update(cache_used)
+        # Forget transfers that finished or were resumed by hand meanwhile
+        self.paused = {transfer_id: device for transfer_id, device in self.paused.items()
+                       if self.rclone.transfers.get(transfer_id, {}).get('status') == 'paused'}
+        seen = set()
+        for path, (device, free, total) in results.items():
+            self.devices[path] = device
+            if device in seen:
+                continue
+            seen.add(device)
+            state = DiskState(path, free, total)
+            previous = self.states.get(device)
+            if previous:
+                elapsed = state.checked_at - previous.checked_at
+                if elapsed > 0:
+                    state.rate = (previous.free - free) / elapsed
+            state.level = self._level(state)
+            self.states[device] = state
+            if not previous or previous.level != state.level:
+                self._on_level_changed(device, state)
+            if state.level == CRITICAL:
+                self._pause_writers(device, state)
+
+    def _level(self, state: DiskState) -> str:
+        seconds_left = state.seconds_left
+        if state.free < self.min_free or (seconds_left is not None and seconds_left < self.interval * 2):
+            return CRITICAL
+        if state.free < self.min_free * 2 or (seconds_left is not None and seconds_left < FILL_HORIZON):
+            return LOW
+        return OK
+
+    def _on_level_changed(self, device: int, state: DiskState):
+        if state.level == OK:
+            resumed = self._resume_writers(device)
+            if resumed:
+                self.warning.emit(f"Disk space recovered ({state.describe()}); "
+                                  f"resumed {len(resumed)} transfer(s)")
+            return
+        is_cache = any(self.devices.get(cache_dir) == device for cache_dir in self.cache_dirs())
+        message = f"Low disk space: {state.describe()}."
+        if state.level == CRITICAL:
+            message += " Transfers writing there are paused."
+        else:
+            message += f" New transfers writing there are limited to {self.low_bwlimit}/s."
+        if is_cache:
+            message += " The VFS cache is on this disk; remounting shrinks its size limit."
+        self.warning.emit(message)
+
+    def _transfers_on(self, device: int) -> List[str]:
+        ids = []
+        for transfer_id, transfer in self.rclone.transfers.items():
+            if transfer.get('batch'):
+                continue  # Paused and resumed through their batch
+            if any(self.devices.get(path) == device for path in self.written_paths(transfer)):
+                ids.append(transfer_id)
+        return ids
+
+    def _pause_writers(self, device: int, state: DiskState):
+        for transfer_id in self._transfers_on(device):
+            if transfer_id not in self.paused and self.rclone.pause_transfer(transfer_id):
+                print(f"Paused {transfer_id}: {state.describe()}")
+                self.paused[transfer_id] = device
+
+    def _resume_writers(self, device: int) -> List[str]:
+        resumed = []
+        for transfer_id, paused_device in list(self.paused.items()):
+            if paused_device != device:
+                continue
+            del self.paused[transfer_id]
+            # Transfers the user paused themselves in the meantime stay as they are
+            if self.rclone.resume_transfer(transfer_id):
+                resumed.append(transfer_id)
+        return resumed
+
+    def level_of(self, path: str) -> str:
+        """Last known level of the disk a local path is on"""
+        device = self.devices.get(path)
+        if device is None:
+            try:
+                device = os.stat(existing_parent(Path(path))).st_dev
+            except OSError:
+                return OK
+        state = self.states.get(device)
+        return state.level if state else OK
+
+    def transfer_flags(self, transfer_type: str, source: str, dest: str) -> List[str]:
+        """--bwlimit for a new transfer writing to a disk that is running low"""
+        transfer = {'type': transfer_type, 'source': source, 'dest': dest}
+        if any(self.level_of(path) != OK for path in self.written_paths(transfer)):
+            return ['--bwlimit', self.low_bwlimit]
+        return []
+
+    def cache_flags(self, mount_args: List[str], mounts: int, rclone_version: Tuple[int, ...]) -> List[str]:
+        """Cache size limits for a new mount, unless its options set them already.
+
+        Uses the latest background measurement of the cache disk, so mounting
+        does not wait for a walk of the cache.
+        """
+        flags = []
+        cache_dir = cache_dir_from_args(mount_args)
+        if not any(arg.startswith('--vfs-cache-max-size') for arg in mount_args):
+            state = self.states.get(self.devices.get(str(cache_dir)))
+            if state:
+                free = state.free
+            else:
+                # Not watched yet; free space is cheap to ask for
+                try:
+                    free = shutil.disk_usage(existing_parent(cache_dir)).free
+                except OSError as e:
+                    print(f"Error checking free space of {cache_dir}: {e}")
+                    return flags
+            # Until the cache has been walked it counts as empty, giving a smaller limit
+            used = self.cache_used.get(str(cache_dir), 0)
+            size = cache_max_size(free, used, self.min_free, self.cache_share, mounts)
+            flags.extend(['--vfs-cache-max-size', f"{size // 1024 ** 2}M"])
+        if rclone_version >= MIN_FREE_SPACE_VERSION and \
+                not any(arg.startswith('--vfs-cache-min-free-space') for arg in mount_args):
+            flags.extend(['--vfs-cache-min-free-space', f"{self.min_free // 1024 ** 2}M"])
+        return flags
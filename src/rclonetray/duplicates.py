@@ -0,0 +1,158 @@
+"""Duplicate files across remotes, found by size first and then by hash"""
+
+import json
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from .index import ListingIndex
+from .listing import parse_lsjson_line, stream_rclone
+
+# Empty files are never worth reporting
+MIN_SIZE = 1
+
+# Files whose hashes are fetched per rclone call
+HASH_BATCH = 5000
+
+# Backends that compute hashes by reading the data; only md5 is asked of them
+COMPUTED_HASH_BACKENDS = ('local', 'sftp', 'smb')
+
+class DuplicateSet:
+    """Files with the same size and a matching hash"""
+
+    def __init__(self, size: int, files: List[Tuple[str, str]]):
+        self.size = size
+        self.files = files  # (remote, path)
+
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by keeping a single copy"""
+        return self.size * (len(self.files) - 1)
+
+def _find(parents: Dict[int, int], item: int) -> int:
+    while parents[item] != item:
+        parents[item] = parents[parents[item]]
+        item = parents[item]
+    return item
+
+def group_by_hash(files: List[Tuple[str, str, int, Dict[str, str]]]) -> List[DuplicateSet]:
+    """Group (remote, path, size, hashes) entries of one size into duplicate sets.
+
+    Remotes support different hash types, so two files are the same if any
+    hash type both of them have matches.
+    """
+    parents = {i: i for i in range(len(files))}
+    first_with: Dict[Tuple[str, str], int] = {}
+    for i, (_, _, _, hashes) in enumerate(files):
+        for hash_type, value in hashes.items():
+            if not value:
+                continue
+            other = first_with.setdefault((hash_type, value.lower()), i)
+            if other != i:
+                parents[_find(parents, i)] = _find(parents, other)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(files)):
+        if any(files[i][3].values()):
+            groups.setdefault(_find(parents, i), []).append(i)
+    return [
+        DuplicateSet(files[members[0]][2], [(files[i][0], files[i][1]) for i in members])
+        for members in groups.values() if len(members) > 1
+    ]
+
+def find_duplicates(index: ListingIndex, remotes: List[str],
+                    remote_types: Optional[Dict[str, str]] = None,
+                    max_listing_age: float = 86400,
+                    progress: Callable[[str], None] = lambda message: None,
+                    should_stop: Callable[[], bool] = lambda: False) -> Tuple[List[DuplicateSet], int]:
+    """Find files stored more than once across ``remotes``.
+
+    Listings come from the search index and are refreshed when older than
+    ``max_listing_age``. A remote that is not indexed yet is listed once,
+    without being added to the indexer's periodic refreshes. Only files sharing their size with another file
+    are hashed, and hashes are cached in the index by size and modtime, so
+    a re-run only asks rclone for new or changed candidates. Returns the
+    duplicate sets, largest reclaimable first, and the number of candidates
+    that have no hash to compare.
+    """
+    remote_types = remote_types or {}
+    known = index.remotes()
+    for remote in remotes:
+        info = known.get(remote) or {}
+        if info.get('full_at') and time.time() - info['full_at'] < max_listing_age:
+            continue
+        progress(f"Listing {remote}:...")
+        index.add_remote(remote, periodic=False)
+        lines = stream_rclone(['rclone', 'lsjson', '-R', '--no-mimetype', f'{remote}:'], should_stop)
+        _, stamp = index.store_listing(remote, lines, should_stop)
+        if should_stop():
+            return [], 0
+        index.finish_refresh(remote, stamp, True)
+
+    # Only sizes that occur more than once can hold duplicates
+    conn = index.connection()
+    in_remotes = ','.join('?' * len(remotes))
+    rows = conn.execute(
+        f'SELECT f.remote, f.path, f.size, f.mtime, h.hashes FROM files f '
+        f'LEFT JOIN hashes h ON h.remote = f.remote AND h.path = f.path '
+        f'AND h.size = f.size AND h.mtime IS f.mtime '
+        f'WHERE f.is_dir = 0 AND f.size >= ? AND f.remote IN ({in_remotes}) AND f.size IN ('
+        f'SELECT size FROM files WHERE is_dir = 0 AND size >= ? AND remote IN ({in_remotes}) '
+        f'GROUP BY size HAVING COUNT(*) > 1)',
+        (MIN_SIZE, *remotes, MIN_SIZE, *remotes)
+    ).fetchall()
+
+    hashes: Dict[Tuple[str, str], Dict[str, str]] = {}
+    missing: Dict[str, List[str]] = {}
+    for row in rows:
+        if row['hashes'] is None:
+            missing.setdefault(row['remote'], []).append(row['path'])
+        else:
+            hashes[(row['remote'], row['path'])] = json.loads(row['hashes'])
+
+    for remote, paths in missing.items():
+        for start in range(0, len(paths), HASH_BATCH):
+            progress(f"Hashing {remote}: {start:,} of {len(paths):,} candidates")
+            batch = _fetch_hashes(index, remote, paths[start:start + HASH_BATCH],
+                                  remote_types.get(remote) in COMPUTED_HASH_BACKENDS, should_stop)
+            if should_stop():
+                return [], 0
+            hashes.update(((remote, path), value) for path, value in batch.items())
+
+    progress("Grouping...")
+    by_size: Dict[int, List[Tuple[str, str, int, Dict[str, str]]]] = {}
+    unhashable = 0
+    for row in rows:
+        file_hashes = hashes.get((row['remote'], row['path']), {})
+        if not any(file_hashes.values()):
+            unhashable += 1
+        by_size.setdefault(row['size'], []).append((row['remote'], row['path'], row['size'], file_hashes))
+
+    sets = [dup for files in by_size.values() for dup in group_by_hash(files)]
+    sets.sort(key=lambda dup: dup.reclaimable, reverse=True)
+    return sets, unhashable
+
+def _fetch_hashes(index: ListingIndex, remote: str, paths: List[str], md5_only: bool,
+                  should_stop: Callable[[], bool]) -> Dict[str, Dict[str, str]]:
+    """Ask rclone for the hashes of some files and cache them in the index"""
+    with tempfile.NamedTemporaryFile('w', suffix='.files') as files_from:
+        files_from.write('\n'.join(paths) + '\n')
+        files_from.flush()
+        args = ['rclone', 'lsjson', '-R', '--files-only', '--no-mimetype', '--hash',
+                '--files-from', files_from.name, f'{remote}:']
+        if md5_only:
+            args.extend(['--hash-type', 'md5'])
+
+        found = {}
+        rows = []
+        for line in stream_rclone(args, should_stop):
+            entry = parse_lsjson_line(line)
+            if not entry:
+                continue
+            found[entry['Path']] = entry.get('Hashes') or {}
+            rows.append((remote, entry['Path'], entry.get('Size'), entry.get('ModTime'),
+                         json.dumps(found[entry['Path']])))
+
+    conn = index.connection()
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)', rows)
+    return found
@@ -0,0 +1,9 @@
+"""Human readable values shared by the dialogs and notifications"""
+
+def format_size(size: float) -> str:
+    """Format size in bytes to human readable format"""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} PB"
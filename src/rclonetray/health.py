@@ -0,0 +1,62 @@
+"""Background health monitoring for active mounts"""
+
+from typing import Callable, Dict, Optional
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .probe import MountHealth, probe_mount
+
+class MountHealthMonitor(QObject):
+    """Periodically probes every active mount without touching it from the GUI thread"""
+    health_changed = pyqtSignal(str, object)  # Remote, MountHealth
+
+    def __init__(self, rclone_manager, interval: int = 30, deadline: float = 5.0,
+                 slow_threshold: float = 1.0):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.deadline = deadline
+        self.slow_threshold = slow_threshold
+        self.results: Dict[str, MountHealth] = {}
+        self._pending = set()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check_all)
+        self.timer.setInterval(interval * 1000)
+
+    def start(self):
+        """Start periodic checks"""
+        self.timer.start()
+        self.check_all()
+
+    def stop(self):
+        """Stop periodic checks"""
+        self.timer.stop()
+
+    def check_all(self):
+        """Probe every active mount"""
+        active = self.rclone.active_mounts()
+        for remote in list(self.results):
+            if remote not in active:
+                del self.results[remote]
+        for remote, mount_point in active.items():
+            self.check(remote, mount_point)
+
+    def check(self, remote: str, mount_point: str,
+              callback: Optional[Callable[[MountHealth], None]] = None):
+        """Probe one mount in the background; ``callback`` runs on the GUI thread"""
+        if remote in self._pending and not callback:
+            return
+        self._pending.add(remote)
+        self.rclone.runner.run_in_background(
+            probe_mount,
+            lambda result, error: self._on_result(remote, result, error, callback),
+            mount_point, self.deadline, self.slow_threshold
+        )
+
+    def _on_result(self, remote, result, error, callback):
+        self._pending.discard(remote)
+        if error:
+            print(f"Error probing mount {remote}: {error}")
+            return
+        self.results[remote] = result
+        self.health_changed.emit(remote, result)
+        if callback:
+            callback(result)
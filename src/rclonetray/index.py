@@ -0,0 +1,335 @@
+"""Offline index of remote listings with full-text search"""
+
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .listing import parse_lsjson_line, stream_rclone
+
+# Rows written per transaction while a listing streams in
+BATCH_SIZE = 5000
+
+# Extra look-back for incremental refreshes, to cover clock skew between hosts
+MAX_AGE_MARGIN = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    remote TEXT NOT NULL,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime TEXT,
+    is_dir INTEGER NOT NULL DEFAULT 0,
+    seen INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (remote, path)
+);
+CREATE TABLE IF NOT EXISTS remotes (
+    remote TEXT PRIMARY KEY,
+    indexed_at REAL,
+    full_at REAL,
+    error TEXT,
+    periodic INTEGER NOT NULL DEFAULT 1  -- 0: listed once, e.g. for a duplicate search
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    remote TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER,
+    mtime TEXT,
+    hashes TEXT NOT NULL,
+    PRIMARY KEY (remote, path)
+);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    name, path, content='files', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE OF name, path ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+    INSERT INTO files_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+"""
+
+UPSERT = """
+INSERT INTO files (remote, path, name, size, mtime, is_dir, seen) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (remote, path) DO UPDATE SET
+    size = excluded.size, mtime = excluded.mtime, is_dir = excluded.is_dir, seen = excluded.seen
+"""
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS query matching every word as a prefix"""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+class ListingIndex:
+    """SQLite database of every indexed file, searchable by name and path.
+
+    Each thread uses its own connection; WAL mode lets searches run while
+    the indexer is writing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        # Databases created before one-off listings lack the column
+        if 'periodic' not in [row['name'] for row in conn.execute('PRAGMA table_info(remotes)')]:
+            conn.execute('ALTER TABLE remotes ADD COLUMN periodic INTEGER NOT NULL DEFAULT 1')
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def remotes(self) -> Dict[str, Dict[str, Any]]:
+        """Indexed remotes with their last refresh times and file counts"""
+        conn = self.connection()
+        counts = dict(conn.execute('SELECT remote, COUNT(*) FROM files GROUP BY remote').fetchall())
+        return {
+            row['remote']: {**dict(row), 'files': counts.get(row['remote'], 0)}
+            for row in conn.execute('SELECT * FROM remotes ORDER BY remote')
+        }
+
+    def indexed_at(self, remote: str) -> Optional[float]:
+        """When a remote was last refreshed, without counting its files"""
+        row = self.connection().execute('SELECT indexed_at FROM remotes WHERE remote = ?',
+                                        (remote,)).fetchone()
+        return row['indexed_at'] if row else None
+
+    def add_remote(self, remote: str, periodic: bool = True):
+        """Register a remote; only ``periodic`` ones are refreshed by the indexer"""
+        with self.connection() as conn:
+            # A remote listed once becomes periodic when added for good, never the reverse
+            conn.execute('INSERT INTO remotes (remote, periodic) VALUES (?, ?) '
+                         'ON CONFLICT (remote) DO UPDATE SET periodic = MAX(periodic, excluded.periodic)',
+                         (remote, int(periodic)))
+
+    def remove_remote(self, remote: str):
+        """Stop indexing a remote and forget its files"""
+        with self.connection() as conn:
+            conn.execute('DELETE FROM files WHERE remote = ?', (remote,))
+            conn.execute('DELETE FROM hashes WHERE remote = ?', (remote,))
+            conn.execute('DELETE FROM remotes WHERE remote = ?', (remote,))
+
+    def search(self, text: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """Files whose name or path contain words starting with those in ``text``"""
+        query = fts_query(text)
+        if not query:
+            return []
+        rows = self.connection().execute(
+            'SELECT f.remote, f.path, f.size, f.mtime, f.is_dir FROM files_fts '
+            'JOIN files f ON f.id = files_fts.rowid '
+            'WHERE files_fts MATCH ? ORDER BY rank LIMIT ?',
+            (query, limit)
+        )
+        return [dict(row) for row in rows]
+
+    def tree_stats(self, remote: str, path: str = '') -> Optional[Dict[str, int]]:
+        """Object count, directory count, depth and bytes below ``path``.
+
+        Returns None unless the remote has had a full listing.
+        """
+        conn = self.connection()
+        indexed = conn.execute('SELECT full_at FROM remotes WHERE remote = ?', (remote,)).fetchone()
+        if not indexed or not indexed['full_at']:
+            return None
+        path = path.strip('/')
+        where, params = 'remote = ?', [remote]
+        if path:
+            # A range on the (remote, path) index rather than a LIKE scan
+            where += ' AND path > ? AND path < ?'
+            params += [path + '/', path + '0']  # '0' sorts right after '/'
+        row = conn.execute(
+            f"SELECT SUM(is_dir = 0) AS objects, SUM(is_dir) AS dirs, COALESCE(SUM(size), 0) AS bytes, "
+            f"MAX(LENGTH(path) - LENGTH(REPLACE(path, '/', ''))) AS depth FROM files WHERE {where}",
+            params
+        ).fetchone()
+        depth_offset = path.count('/') + 1 if path else 0
+        return {
+            'objects': row['objects'] or 0,
+            'dirs': row['dirs'] or 0,
+            'bytes': row['bytes'],
+            'depth': max((row['depth'] or 0) - depth_offset, 0),
+        }
+
+    def store_listing(self, remote: str, lines, should_stop=lambda: False) -> Tuple[int, int]:
+        """Store the ``lsjson -R`` output lines of ``remote`` as they arrive.
+
+        Returns the number of entries and the stamp they were marked with,
+        for ``finish_refresh``.
+        """
+        conn = self.connection()
+        stamp = int(time.time() * 1000)
+        count = 0
+        batch = []
+        for line in lines:
+            if should_stop():
+                return count, stamp
+            entry = parse_lsjson_line(line)
+            if not entry:
+                continue
+            batch.append((remote, entry['Path'], entry['Name'], entry.get('Size'),
+                          entry.get('ModTime'), int(entry.get('IsDir', False)), stamp))
+            if len(batch) >= BATCH_SIZE:
+                count += self._write_batch(conn, batch)
+                batch = []
+        count += self._write_batch(conn, batch)
+        return count, stamp
+
+    def finish_refresh(self, remote: str, stamp: int, full: bool):
+        """Record a successful refresh; a full one also drops files not seen again"""
+        conn = self.connection()
+        now = time.time()
+        with conn:
+            if full:
+                # Rows written by a newer concurrent listing are kept
+                conn.execute('DELETE FROM files WHERE remote = ? AND seen < ?', (remote, stamp))
+                conn.execute('UPDATE remotes SET indexed_at = ?, full_at = ?, error = NULL '
+                             'WHERE remote = ?', (now, now, remote))
+            else:
+                conn.execute('UPDATE remotes SET indexed_at = ?, error = NULL WHERE remote = ?',
+                             (now, remote))
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list) -> int:
+        if batch:
+            with conn:
+                conn.executemany(UPSERT, batch)
+        return len(batch)
+
+    def set_error(self, remote: str, error: str):
+        with self.connection() as conn:
+            conn.execute('UPDATE remotes SET error = ? WHERE remote = ?', (error, remote))
+
+class Indexer(QObject):
+    """Keeps the listing index of the selected remotes up to date in the background.
+
+    Refreshes are incremental (--max-age since the last run) except for a
+    periodic full listing, which also picks up deletions and files uploaded
+    with an old modification time. Remotes are listed one at a time, at low
+    CPU priority and with --tpslimit, to stay out of the way.
+    """
+    index_updated = pyqtSignal(str)  # Remote
+
+    def __init__(self, rclone_manager, path: Path, interval: int = 3600,
+                 full_interval: int = 86400, tpslimit: float = 10):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.index = ListingIndex(path)
+        self.full_interval = full_interval
+        self.tpslimit = tpslimit
+        self.running: Optional[str] = None  # Remote being listed
+        self._busy = False
+        self._queued: Dict[str, bool] = {}  # Remote -> full, requested during a refresh
+        self._stop = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.setInterval(interval * 1000)
+
+    def start(self):
+        self.timer.start()
+        self.refresh()
+
+    def stop(self):
+        """Stop refreshing and abandon a listing in progress"""
+        self.timer.stop()
+        self._stop.set()
+        process = self._process
+        if process and process.poll() is None:
+            process.kill()
+
+    def add_remote(self, remote: str):
+        """Index a remote; its first full listing starts right away"""
+        self.index.add_remote(remote)
+        self.refresh([remote])
+
+    def remove_remote(self, remote: str):
+        self.index.remove_remote(remote)
+        self.index_updated.emit(remote)
+
+    def refresh(self, remotes: Optional[List[str]] = None, full: bool = False):
+        """Refresh ``remotes`` (default: all periodic), after any refresh already running"""
+        known = self.index.remotes()
+        periodic = [remote for remote, info in known.items() if info['periodic']]
+        targets = [remote for remote in (remotes or periodic) if remote in known]
+        if not targets:
+            return
+        if self._busy:
+            for remote in targets:
+                self._queued[remote] = self._queued.get(remote, False) or full
+            return
+        self._busy = True
+        self._stop.clear()
+        self.rclone.runner.run_long(
+            self._refresh_all, lambda result, error: self._on_finished(error),
+            targets, known, full
+        )
+
+    def _refresh_all(self, remotes: List[str], known: Dict[str, Dict[str, Any]], full: bool):
+        """Worker: list the remotes one after another"""
+        for remote in remotes:
+            if self._stop.is_set():
+                return
+            info = known[remote]
+            now = time.time()
+            remote_full = full or not info.get('full_at') or now - info['full_at'] > self.full_interval
+            max_age = None if remote_full else int(now - info['indexed_at']) + MAX_AGE_MARGIN
+            self.running = remote
+            try:
+                count = self._list_remote(remote, max_age)
+                print(f"Indexed {count} entries of {remote} ({'full' if remote_full else 'incremental'})")
+            except Exception as e:
+                print(f"Error indexing {remote}: {e}")
+                self.index.set_error(remote, str(e))
+            finally:
+                self.running = None
+            # Signals are thread-safe; the connected slots run on the GUI thread
+            self.index_updated.emit(remote)
+
+    def _list_remote(self, remote: str, max_age: Optional[int]) -> int:
+        args = ['rclone', 'lsjson', '-R', '--no-mimetype', f'{remote}:']
+        if max_age is not None:
+            args.extend(['--max-age', f'{max_age}s'])
+        if self.tpslimit:
+            args.extend(['--tpslimit', str(self.tpslimit)])
+
+        try:
+            lines = stream_rclone(args, self._stop.is_set, self._set_process, low_priority=True)
+            count, stamp = self.index.store_listing(remote, lines, self._stop.is_set)
+        finally:
+            self._process = None
+        # Only a complete listing may be used to find deleted files
+        if not self._stop.is_set():
+            self.index.finish_refresh(remote, stamp, max_age is None)
+        return count
+
+    def _set_process(self, process: subprocess.Popen):
+        self._process = process
+
+    def _on_finished(self, error):
+        self._busy = False
+        if error:
+            print(f"Error refreshing index: {error}")
+        if self._queued and not self._stop.is_set():
+            queued, self._queued = self._queued, {}
+            full = [remote for remote, want_full in queued.items() if want_full]
+            if full:
+                self.refresh(full, full=True)
+            self.refresh([remote for remote in queued if remote not in full])
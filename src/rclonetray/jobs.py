@@ -0,0 +1,226 @@
+"""Persistent journal of transfer jobs"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from PyQt6.QtCore import QTimer
+
+# Journal states that mean the job still has work to do
+UNFINISHED_STATES = ('queued', 'starting', 'running', 'paused')
+
+# Failed jobs kept for retrying; older ones are dropped with their files
+MAX_FAILED_JOBS = 50
+
+# Milliseconds of journal changes collected into one write
+SAVE_DELAY = 200
+
+# rclone logs this after each unsuccessful pass over the tree
+ATTEMPT_FAILED = re.compile(r'^Attempt \d+/\d+ failed')
+
+# rclone bisync logs this for every file changed on both sides since the last run
+BISYNC_CONFLICT = re.compile(r'New or changed in both paths\s+-\s+(.+?)\s*$')
+
+def write_json_atomic(path: Path, data: Any, mode: Optional[int] = None):
+    """Write JSON so that readers never see a half-written file.
+
+    With ``mode`` the file has those permissions before anything is written
+    to it, for files that hold secrets.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666 if mode is None else mode)
+    if mode is not None:
+        os.fchmod(fd, mode)  # A leftover temp file keeps its old mode otherwise
+    with open(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class JobJournal:
+    """Keeps job definitions on disk so unfinished jobs survive a restart.
+
+    Only state changes are written (start, pause, resume, finish), never
+    progress updates, and every write replaces the file atomically. Changes
+    made within SAVE_DELAY, such as cancelling or queueing hundreds of jobs,
+    share one write; ``flush`` writes pending changes right away.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files_dir = self.path.parent / 'jobs'
+        self.jobs: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.flush)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                jobs = json.load(f)
+            return jobs if isinstance(jobs, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading job journal {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        self._dirty = True
+        if not self._save_timer.isActive():
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        self._save_timer.stop()
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            write_json_atomic(self.path, self.jobs)
+        except OSError as e:
+            print(f"Error writing job journal {self.path}: {e}")
+
+    def record(self, job_id: str, job_type: str, source: str, dest: str,
+               flags: Optional[List[str]] = None, **extra):
+        """Record a job that is starting"""
+        self.jobs[job_id] = {
+            'type': job_type,
+            'source': source,
+            'dest': dest,
+            'flags': list(flags or []),
+            'status': 'running',
+            'started': time.time(),
+            **extra,
+        }
+        self._save()
+
+    def update(self, job_id: str, **fields):
+        """Update fields of a recorded job"""
+        if job_id in self.jobs:
+            self.jobs[job_id].update(fields)
+            self._save()
+
+    def remove(self, job_id: str):
+        """Forget a job and delete its log and file lists"""
+        if self.jobs.pop(job_id, None) is not None:
+            self._save()
+        for path in (self.log_path(job_id), self.failed_path(job_id), self.files_path(job_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing {path}: {e}")
+
+    def mark_failed(self, job_id: str, failed_files: List[str], other_errors: int):
+        """Record a failed job together with the files that need another try"""
+        if job_id not in self.jobs:
+            return
+        self.write_file_list(self.failed_path(job_id), failed_files)
+        self.update(job_id, status='failed', failed_files=len(failed_files),
+                    other_errors=other_errors)
+
+        failed = sorted((job.get('started', 0), other_id) for other_id, job in self.jobs.items()
+                        if job.get('status') == 'failed')
+        for _, old_id in failed[:-MAX_FAILED_JOBS]:
+            self.remove(old_id)
+
+    def log_path(self, job_id: str) -> Path:
+        """JSON log written by the job's rclone process"""
+        return self.files_dir / f"{job_id}.log"
+
+    def failed_path(self, job_id: str) -> Path:
+        """Paths that failed in the job, relative to its source"""
+        return self.files_dir / f"{job_id}.failed"
+
+    def files_path(self, job_id: str) -> Path:
+        """Paths a job is restricted to (its --files-from list)"""
+        return self.files_dir / f"{job_id}.files"
+
+    def write_file_list(self, path: Path, files: List[str]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            for name in files:
+                f.write(name + '\n')
+
+    def read_file_list(self, path: Path) -> List[str]:
+        try:
+            with open(path) as f:
+                return [line.rstrip('\n') for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def unfinished(self) -> Dict[str, Dict[str, Any]]:
+        """Jobs that were still active when last recorded"""
+        return {
+            job_id: job for job_id, job in self.jobs.items()
+            if job.get('status') in UNFINISHED_STATES
+        }
+
+
+def parse_failed_files(log_path: Path) -> Tuple[List[str], int]:
+    """Extract the objects that failed from a job's JSON log.
+
+    rclone retries the whole job (--retries) and logs errors on every pass,
+    so only errors from the last pass count. Returns the failed object
+    paths, relative to the job's root, and the number of other errors
+    (directory listings and the like) that a file list cannot retry.
+    """
+    current: List[str] = []
+    current_other = 0
+    last: List[str] = []
+    last_other = 0
+    try:
+        with open(log_path, errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith('{'):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('level') not in ('error', 'critical'):
+                    continue
+
+                msg = entry.get('msg', '')
+                if ATTEMPT_FAILED.match(msg):
+                    last, last_other = current, current_other
+                    current, current_other = [], 0
+                elif entry.get('object') and entry.get('objectType', '').endswith('Object'):
+                    current.append(entry['object'])
+                elif not msg.startswith('Failed to '):
+                    current_other += 1
+    except FileNotFoundError:
+        return [], 0
+
+    # Anything logged after the final "Attempt" line is the summary, not a pass
+    files, other = (current, current_other) if current else (last, last_other)
+    return list(dict.fromkeys(files)), other
+
+def parse_bisync_conflicts(log_path: Path) -> List[str]:
+    """Files a bisync run found changed on both sides, from its JSON log"""
+    conflicts = []
+    try:
+        with open(log_path, errors='replace') as f:
+            for line in f:
+                try:
+                    msg = json.loads(line).get('msg', '')
+                except ValueError:
+                    msg = line
+                match = BISYNC_CONFLICT.search(msg)
+                if match:
+                    conflicts.append(match.group(1))
+    except FileNotFoundError:
+        return []
+    return list(dict.fromkeys(conflicts))
@@ -0,0 +1,107 @@
+"""Directory listings of remotes, streamed from rclone lsjson and cached"""
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Seconds a cached directory listing stays valid
+DEFAULT_LISTING_TTL = 300
+
+def join_remote_path(remote: str, path: str) -> str:
+    """Build 'remote:path' with the path normalised for caching"""
+    return f"{remote}:{path.strip('/')}"
+
+def parse_lsjson_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse one line of ``rclone lsjson`` output.
+
+    lsjson prints a JSON array with one object per line, so a listing can be
+    consumed as it arrives instead of after the whole array has been read.
+    Returns None for the array brackets and anything unparsable.
+    """
+    line = line.strip().rstrip(',')
+    if not line.startswith('{'):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def stream_rclone(args: List[str], should_stop: Callable[[], bool] = lambda: False,
+                  on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+                  low_priority: bool = False) -> Iterator[str]:
+    """Yield the output lines of an rclone command as they arrive.
+
+    Stops early, killing rclone, once ``should_stop`` returns True; raises
+    RuntimeError with rclone's last error line if it fails.
+    """
+    # stderr goes to a file so a chatty command cannot block on a full pipe
+    with tempfile.TemporaryFile(mode='w+', errors='replace') as stderr:
+        process = subprocess.Popen(
+            args, stdout=subprocess.PIPE, stderr=stderr, text=True, errors='replace',
+            preexec_fn=(lambda: os.nice(10)) if low_priority else None
+        )
+        if on_start:
+            on_start(process)
+        try:
+            for line in process.stdout:
+                if should_stop():
+                    return
+                yield line
+            if process.wait() != 0 and not should_stop():
+                stderr.seek(0)
+                error = stderr.read().strip()
+                raise RuntimeError(error.splitlines()[-1] if error
+                                   else f"rclone exited with {process.returncode}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+class ListingCache:
+    """Directory listings per 'remote:path', kept for ``ttl`` seconds"""
+
+    def __init__(self, ttl: float = DEFAULT_LISTING_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, tuple] = {}  # Key -> (stored at, entries)
+        self._lock = threading.Lock()
+
+    def get(self, remote: str, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached entries of a directory, or None if missing or expired"""
+        key = join_remote_path(remote, path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if time.monotonic() - cached[0] > self.ttl:
+                del self._entries[key]
+                return None
+            return cached[1]
+
+    def put(self, remote: str, path: str, entries: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[join_remote_path(remote, path)] = (time.monotonic(), entries)
+
+    def invalidate(self, remote: Optional[str] = None, path: str = ''):
+        """Drop the listings of ``remote`` below ``path``, or everything"""
+        with self._lock:
+            if remote is None:
+                self._entries.clear()
+                return
+            prefix = join_remote_path(remote, path)
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+_cache: Optional[ListingCache] = None
+
+
+def get_listing_cache() -> ListingCache:
+    """Return the shared listing cache"""
+    global _cache
+    if _cache is None:
+        _cache = ListingCache()
+    return _cache
@@ -0,0 +1,211 @@
+"""Folders kept available offline by prefetching them into the VFS cache of their mount"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .diskguard import cache_dir_from_args, default_cache_dir
+
+# Bytes read per call while prefetching
+CHUNK_SIZE = 1024 * 1024
+
+# Niceness of the prefetch threads
+PREFETCH_NICENESS = 10
+
+# Seconds after a mount comes up before its folders are warmed
+WARM_DELAY = 10
+
+def is_fully_cached(cache_dir: Path, remote: str, rel_path: str, size: int) -> bool:
+    """Whether the VFS cache of a mount already holds every byte of a file.
+
+    rclone keeps the cached ranges of each file in a metadata file under
+    vfsMeta; anything unexpected there counts as not cached.
+    """
+    meta_path = cache_dir / 'vfsMeta' / remote / rel_path
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('Size') != size:
+            return False
+        covered = 0
+        for cached in sorted(meta.get('Rs') or [], key=lambda r: r['Pos']):
+            if cached['Pos'] > covered:
+                return False
+            covered = max(covered, cached['Pos'] + cached['Size'])
+        return covered >= size
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+class PinStatus:
+    """Progress of warming one pinned folder"""
+
+    def __init__(self):
+        self.state = 'pending'  # pending, warming, done, failed or stopped
+        self.files = 0
+        self.fetched = 0  # Bytes read from the remote
+        self.cached = 0  # Files that were already in the cache
+        self.error = ''
+        self.finished_at: Optional[float] = None
+
+    def describe(self) -> str:
+        if self.state == 'warming':
+            return f"warming, {self.files:,} files ({self.fetched / 1024 ** 2:.0f} MB fetched)"
+        if self.state == 'failed':
+            return f"failed: {self.error}"
+        if self.state == 'done':
+            return f"available offline ({self.files:,} files)"
+        return self.state
+
+class PinManager(QObject):
+    """Keeps pinned folders of mounted remotes in the VFS cache.
+
+    Pins are stored per remote in the remote settings of Config. Folders
+    are read through the mount in a low-priority thread, limited to
+    ``rate_limit`` MB/s; files already fully cached are only touched, which
+    resets their age for --vfs-cache-max-age. Folders are warmed again
+    after every mount and every ``interval`` seconds.
+    """
+    status_changed = pyqtSignal(str, str)  # Remote, path
+    warm_requested = pyqtSignal(str)  # Remote; queued to the GUI thread from mount threads
+
+    def __init__(self, rclone_manager, config, interval: int = 1800, rate_limit: float = 10.0,
+                 cache_dir: Optional[Path] = None):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.config = config
+        self.rate_limit = rate_limit
+        self.cache_dir = Path(cache_dir) if cache_dir else None  # Overrides the mount options
+        self.status: Dict[Tuple[str, str], PinStatus] = {}
+        self._threads: Dict[Tuple[str, str], threading.Thread] = {}
+        self._stop = threading.Event()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.warm_all)
+        self.timer.setInterval(interval * 1000)
+        self.warm_requested.connect(self._warm_after_delay)
+
+    def start(self):
+        """Warm every pinned folder now and periodically"""
+        self.timer.start()
+        self.warm_all()
+
+    def stop(self):
+        """Stop warming; running threads end after their current chunk"""
+        self.timer.stop()
+        self._stop.set()
+
+    def pins(self, remote: str) -> List[str]:
+        """Pinned folders of a remote, relative to its root"""
+        if not self.config:
+            return []
+        return list(self.config.get_remote_settings(remote).get('pinned', []))
+
+    def _save_pins(self, remote: str, pins: List[str]):
+        settings = dict(self.config.get_remote_settings(remote))
+        settings['pinned'] = pins
+        self.config.set_remote_settings(remote, settings)
+
+    def pin(self, remote: str, path: str):
+        """Keep a folder of a remote available offline"""
+        path = path.strip('/')
+        pins = self.pins(remote)
+        if path not in pins:
+            self._save_pins(remote, pins + [path])
+        self.warm(remote, [path])
+
+    def unpin(self, remote: str, path: str):
+        """Stop keeping a folder offline; the cache evicts it as usual"""
+        path = path.strip('/')
+        self._save_pins(remote, [pin for pin in self.pins(remote) if pin != path])
+        self.status.pop((remote, path), None)
+
+    def warm_later(self, remote: str):
+        """Warm the pinned folders of a remote once its new mount has settled.
+
+        Safe to call from any thread: the delay runs on the thread that owns
+        this manager, which has an event loop, unlike the dashboard's mount threads.
+        """
+        self.warm_requested.emit(remote)
+
+    def _warm_after_delay(self, remote: str):
+        QTimer.singleShot(WARM_DELAY * 1000, lambda: self.warm(remote))
+
+    def warm_all(self):
+        for remote in self.rclone.active_mounts():
+            self.warm(remote)
+
+    def warm(self, remote: str, paths: Optional[List[str]] = None):
+        """Prefetch pinned folders of a mounted remote in the background"""
+        mount_point = self.rclone.active_mounts().get(remote)
+        if not mount_point:
+            return
+        for path in paths if paths is not None else self.pins(remote):
+            key = (remote, path)
+            if key in self._threads and self._threads[key].is_alive():
+                continue
+            status = self.status[key] = PinStatus()
+            thread = threading.Thread(target=self._warm_folder,
+                                      args=(remote, path, Path(mount_point), self.cache_dir_for(remote), status),
+                                      daemon=True)
+            self._threads[key] = thread
+            thread.start()
+
+    def cache_dir_for(self, remote: str) -> Path:
+        """VFS cache directory of a remote's mount, honouring --cache-dir in its options"""
+        if self.cache_dir:
+            return self.cache_dir
+        if not self.config:
+            return default_cache_dir()
+        return cache_dir_from_args(self.config.get_mount_options(remote).split())
+
+    @staticmethod
+    def _raise(error: OSError):
+        raise error
+
+    def _warm_folder(self, remote: str, path: str, mount_point: Path, cache_dir: Path,
+                     status: PinStatus):
+        # Runs on its own thread, so its niceness does not leak into shared workers
+        status.state = 'warming'
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+        except (OSError, AttributeError):
+            pass
+
+        started = time.monotonic()
+        budget = self.rate_limit * 1024 ** 2
+        try:
+            for dirpath, _, filenames in os.walk(mount_point / path, onerror=self._raise):
+                for name in filenames:
+                    if self._stop.is_set() or self.status.get((remote, path)) is not status:
+                        status.state = 'stopped'
+                        return
+                    file_path = Path(dirpath) / name
+                    rel_path = str(file_path.relative_to(mount_point))
+                    size = file_path.stat().st_size
+                    with open(file_path, 'rb') as f:
+                        if is_fully_cached(cache_dir, remote, rel_path, size):
+                            # Opening it is enough to reset its age in the cache
+                            f.read(1)
+                            status.cached += 1
+                        else:
+                            while True:
+                                chunk = f.read(CHUNK_SIZE)
+                                if not chunk or self._stop.is_set():
+                                    break
+                                status.fetched += len(chunk)
+                                if budget > 0:
+                                    ahead = status.fetched / budget - (time.monotonic() - started)
+                                    if ahead > 0:
+                                        time.sleep(ahead)
+                    status.files += 1
+            status.state = 'done'
+        except OSError as e:
+            status.state = 'failed'
+            status.error = str(e)
+            print(f"Error warming {remote}:{path}: {e}")
+        finally:
+            status.finished_at = time.time()
+            self.status_changed.emit(remote, path)
@@ -0,0 +1,141 @@
+"""Mount health probe.
+
+The checks run in a separate Python process so that a dead or hung FUSE
+mount can only ever block that process, never the caller. The worker prints
+one line per completed operation, which lets the caller tell which operation
+hung when the deadline expires.
+"""
+
+import errno
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+HEALTHY = 'healthy'
+SLOW = 'slow'
+STALE = 'stale'
+
+# Bytes read from the first regular file found
+READ_SIZE = 4096
+# Directory entries inspected while looking for a file to read
+MAX_ENTRIES = 64
+
+
+class MountHealth:
+    """Result of probing one mount point"""
+
+    def __init__(self, status: str, latencies: Optional[Dict[str, float]] = None,
+                 error: str = ''):
+        self.status = status
+        self.latencies = latencies or {}  # Operation -> milliseconds
+        self.error = error
+        self.checked_at = time.time()
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.latencies.values())
+
+    def describe(self) -> str:
+        """Human readable per-operation summary"""
+        parts = [f"{op} {ms:.0f} ms" for op, ms in self.latencies.items()]
+        if self.error:
+            parts.append(self.error)
+        return ", ".join(parts) if parts else "no data"
+
+
+def _run_checks(mount_point: str):
+    """Worker side: stat, list and read the mount, reporting each step"""
+    def report(op, start):
+        print(f"{op} {(time.monotonic() - start) * 1000:.3f}", flush=True)
+
+    try:
+        start = time.monotonic()
+        os.stat(mount_point)
+        report('stat', start)
+
+        start = time.monotonic()
+        candidate = None
+        with os.scandir(mount_point) as entries:
+            for i, entry in enumerate(entries):
+                if entry.is_file(follow_symlinks=False):
+                    candidate = entry.path
+                    break
+                if i >= MAX_ENTRIES:
+                    break
+        report('readdir', start)
+
+        if candidate:
+            start = time.monotonic()
+            with open(candidate, 'rb') as f:
+                f.read(READ_SIZE)
+            report('read', start)
+    except OSError as e:
+        print(f"error {e.errno or 0} {e.strerror or e}", flush=True)
+
+
+def _parse(output: str):
+    """Caller side: turn worker output into latencies and an error"""
+    latencies = {}
+    error = ''
+    error_code = 0
+    for line in output.splitlines():
+        op, _, value = line.partition(' ')
+        if op == 'error':
+            code, _, message = value.partition(' ')
+            error_code = int(code) if code.isdigit() else 0
+            error = message
+        elif value:
+            try:
+                latencies[op] = float(value)
+            except ValueError:
+                pass
+    return latencies, error, error_code
+
+
+def probe_mount(mount_point: str, deadline: float = 5.0,
+                slow_threshold: float = 1.0) -> MountHealth:
+    """Probe a mount point with a hard deadline (seconds).
+
+    Mounts that fail or do not answer in time are stale; mounts where any
+    operation took longer than ``slow_threshold`` seconds are slow.
+    """
+    try:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'rclonetray.probe', mount_point],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+    except OSError as e:
+        return MountHealth(STALE, error=f"Could not start probe: {e}")
+
+    try:
+        output, _ = process.communicate(timeout=deadline)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        process.kill()
+        try:
+            output, _ = process.communicate(timeout=1)
+        except subprocess.TimeoutExpired:
+            # Stuck in the kernel; abandon it rather than block on it
+            output = ''
+
+    latencies, error, error_code = _parse(output)
+    if timed_out:
+        pending = next((op for op in ('stat', 'readdir', 'read') if op not in latencies), 'probe')
+        return MountHealth(STALE, latencies, f"{pending} timed out after {deadline:g}s")
+    if error:
+        if error_code == errno.ENOTCONN:
+            error = "Transport endpoint is not connected"
+        return MountHealth(STALE, latencies, error)
+    if any(ms > slow_threshold * 1000 for ms in latencies.values()):
+        return MountHealth(SLOW, latencies)
+    return MountHealth(HEALTHY, latencies)
+
+
+if __name__ == '__main__':
+    _run_checks(sys.argv[1])
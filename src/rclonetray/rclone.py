@@ -1,26 +1,200 @@
 """Rclone process management module"""
 
+import hashlib
+import json
 import os
+import posixpath
+import re
+import signal
 import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
-from PyQt6.QtCore import QProcess
+from typing import Callable, Dict, List, Optional, Tuple
+from PyQt6.QtCore import QProcess, QProcessEnvironment, QTimer
+from .advisor import Advice, StrategyAdvisor, split_endpoint
+from .diskguard import DiskGuard, parse_version
+from .health import MountHealthMonitor
+from .index import Indexer
+from .jobs import JobJournal, parse_bisync_conflicts, parse_failed_files
+from .listing import get_listing_cache, stream_rclone
+from .pinning import PinManager
+from .prewarm import (DEFAULT_DIR_CACHE_TIME, LONG_DIR_CACHE_TIME, NOTIFY_BACKENDS,
+                      PrewarmResult, new_rc_endpoint, prewarm_mount)
+from .runner import get_runner
+from .scheduler import Scheduler
+from .serve import ServeManager
+from .speedtest import SpeedTestHistory, SpeedTestResult
+from .serverside import ACROSS_CONFIGS, remote_name, server_side_mode
+from .watch import WatchManager
+
+# Extra transfer fields carried over when a job is resumed or retried
+TRANSFER_INFO_KEYS = ('schedule', 'watch', 'replication')
+
+# Transfer states in which the rclone process may still be alive
+ACTIVE_STATES = ('starting', 'running', 'paused', 'cancelling')
+
+def split_parent(path: str):
+    """Split 'remote:dir/file' or '/dir/file' into its parent and last element"""
+    if ':' in path and not path.startswith('/'):
+        prefix, _, rest = path.partition(':')
+        prefix += ':'
+    else:
+        prefix, rest = '', path
+    parent, name = posixpath.split(rest)
+    return prefix + parent, name
+
+def resolve_mounted_path(path: str, mount_sources: Dict[str, str]) -> str:
+    """Translate a local path inside an rclone mount to the 'remote:path' it shows.
+
+    ``mount_sources`` maps mount points to what is mounted there ('remote:'
+    or 'remote:dir'). Other paths are returned unchanged. The path is only
+    normalised, never resolved, so a hung mount is not touched.
+    """
+    if ':' in path and not path.startswith('/'):
+        return path
+    local = os.path.normpath(os.path.abspath(os.path.expanduser(path)))
+    for mount_point in sorted(mount_sources, key=len, reverse=True):
+        if local == mount_point or local.startswith(mount_point.rstrip('/') + '/'):
+            remote, _, root = mount_sources[mount_point].partition(':')
+            rel = local[len(mount_point):].strip('/')
+            return f"{remote}:{posixpath.join(root.strip('/'), rel).strip('/')}"
+    return path
+
+def split_bwlimit(limit: str, parts: int) -> Optional[str]:
+    """Divide a bandwidth limit like '10M' evenly, as a --bwlimit value in KiB/s"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', limit or '', re.IGNORECASE)
+    if not match or float(match.group(1)) <= 0:
+        return None
+    # A bare number means MB/s, as for mounts
+    kib = float(match.group(1)) * 1024 ** 'KMGT'.index((match.group(2) or 'M').upper())
+    return f"{max(int(kib / parts), 1)}K"
+
+class UnmountReport:
+    """Outcome of unmounting several remotes under a deadline"""
+
+    def __init__(self):
+        self.unmounted: List[str] = []
+        self.lazy: List[str] = []  # Detached with fusermount -uz because they were busy
+        self.failed: Dict[str, str] = {}  # Remote -> reason
+        self.released: List[str] = []  # Mount points that are gone (unmounted or lazily)
+        self.transfers_killed: List[str] = []
+
+    @property
+    def left_behind(self) -> List[str]:
+        """Remotes that may still be mounted or have a live rclone process"""
+        return list(self.failed)
+
+    def summary(self) -> str:
+        """Human readable description of anything that did not go cleanly"""
+        lines = []
+        if self.lazy:
+            lines.append(f"Lazily unmounted (busy): {', '.join(self.lazy)}")
+        for remote, reason in self.failed.items():
+            lines.append(f"Could not unmount {remote}: {reason}")
+        if self.transfers_killed:
+            lines.append(f"Killed {len(self.transfers_killed)} transfer(s) that did not stop in time")
+        return "\n".join(lines)
 
 class RcloneManager:
     def __init__(self, config=None):
+        # All short-lived commands go through the shared runner
+        self.runner = get_runner()
+        if config:
+            self.runner.default_timeout = config.get('command_timeout', 30)
+            get_listing_cache().ttl = config.get('listing_cache_ttl', 300)
+
         # Check if rclone is installed
         try:
-            version = subprocess.check_output(['rclone', 'version']).decode()
+            version = self.runner.run(['rclone', 'version'], check=True).stdout
             print(f"Using {version.splitlines()[0]}")
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            self.rclone_version = parse_version(version)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
             raise RuntimeError("rclone is not installed or not in PATH. Please install rclone first.") from e
             
         self.mounts = {}
+        self.mount_points: Dict[str, str] = {}  # Remote -> mount point of mounts started here
+        self.mount_rc: Dict[str, Dict[str, str]] = {}  # Remote -> rc endpoint of mounts started here
+        self.prewarm_results: Dict[str, PrewarmResult] = {}
         self.transfers = {}  # Track active transfers
         self.config = config
         self.config_path = Path(config.get('config_path')) if config else Path.home() / '.config' / 'rclone' / 'rclone.conf'
+        self.data_dir = Path(config.get('data_dir')) if config else Path.home() / '.config' / 'archclonetray'
+        self.journal = JobJournal(self.data_dir / 'jobs.json')
+        # Settings of every remote, read in the background whenever rclone.conf changes
+        self._remote_configs: Dict[str, dict] = {}
+        self._remote_configs_mtime: Optional[float] = None
+        self.cached_remote_configs()
+        self._restore_failed_jobs()
+        self._shutting_down = False
         self.refresh_mounts()  # Initialize current mounts
 
+        # Small copies queued within one window are started as a single rclone run
+        self.copy_queue: List[str] = []
+        self.coalesce_timer = QTimer()
+        self.coalesce_timer.setSingleShot(True)
+        self.coalesce_timer.setInterval(int((config.get('coalesce_window', 1.0) if config else 1.0) * 1000))
+        self.coalesce_timer.timeout.connect(self._start_queued)
+
+        # Probe active mounts in the background
+        self.health = MountHealthMonitor(
+            self,
+            interval=config.get('health_check_interval', 30) if config else 30,
+            deadline=config.get('health_check_deadline', 5.0) if config else 5.0,
+            slow_threshold=config.get('health_slow_threshold', 1.0) if config else 1.0,
+        )
+        self.health.start()
+
+        # Free space of the VFS cache disk and local destinations
+        self.disk_guard = DiskGuard(
+            self,
+            interval=config.get('disk_guard_interval', 15) if config else 15,
+            min_free_gb=config.get('disk_min_free_gb', 2.0) if config else 2.0,
+            cache_share=config.get('vfs_cache_share', 0.5) if config else 0.5,
+            low_bwlimit=config.get('disk_low_bwlimit', '10M') if config else '10M',
+        )
+        self.disk_guard_enabled = config.get('disk_guard', True) if config else True
+        if self.disk_guard_enabled:
+            self.disk_guard.start()
+
+        # Searchable listings of the remotes chosen for indexing
+        self.indexer = Indexer(
+            self, self.data_dir / 'index.db',
+            interval=config.get('index_interval', 3600) if config else 3600,
+            full_interval=config.get('index_full_interval', 86400) if config else 86400,
+            tpslimit=config.get('index_tpslimit', 10) if config else 10,
+        )
+        self.indexer.start()
+
+        # Flag recommendations from index statistics and past run times
+        self.advisor = StrategyAdvisor(self.indexer.index, self.data_dir / 'advisor.json')
+
+        # Measured throughput per remote, which also tunes --transfers
+        self.speed_tests = SpeedTestHistory(self.data_dir / 'speedtest.json')
+
+        # Recurring jobs, started by start_recurring once resumable jobs are dealt with
+        self.scheduler = Scheduler(self, self.data_dir / 'schedules.json')
+
+        # Local folders pushed to remotes as they change
+        self.watches = WatchManager(
+            self, self.data_dir / 'watches.json',
+            debounce=config.get('watch_debounce', 1.0) if config else 1.0,
+            full_interval=config.get('watch_full_interval', 3600) if config else 3600,
+        )
+
+        # rclone serve endpoints, an alternative to FUSE mounts
+        self.serve = ServeManager(self.data_dir / 'serve.json', self.data_dir / 'serve')
+        self.serve.start()
+
+        # Folders kept in the VFS cache of their mount
+        self.pins = PinManager(
+            self, config,
+            interval=config.get('pin_refresh_interval', 1800) if config else 1800,
+            rate_limit=config.get('pin_rate_limit', 10.0) if config else 10.0,
+        )
+        self.pins.start()
+
     def mount(self, remote: str, mount_point: str) -> Optional[QProcess]:
         """Mount a remote"""
         if not self.config_path.exists():
@@ -68,12 +242,37 @@ class RcloneManager:
             if transfers:
                 args.extend(['--transfers', str(transfers)])
         
+        # Backends that report changes can keep directory listings for long,
+        # since --poll-interval picks up what changed remotely
+        long_dir_cache = self.config.get('long_dir_cache', True) if self.config else True
+        dir_cache_time = DEFAULT_DIR_CACHE_TIME
+        remote_type = self.cached_remote_configs().get(remote, {}).get('type')
+        if long_dir_cache and remote_type in NOTIFY_BACKENDS:
+            dir_cache_time = LONG_DIR_CACHE_TIME
+
+        # An rc server lets the directory cache be filled right after mounting
+        prewarm = self.config.get('prewarm_dir_cache', False) if self.config else False
+        rc = None
+        if prewarm:
+            rc = new_rc_endpoint()
+            args.extend(['--rc', '--rc-addr', rc['addr']])
+            # Credentials go through the environment so they don't show up in ps
+            env = QProcessEnvironment.systemEnvironment()
+            env.insert('RCLONE_RC_USER', rc['user'])
+            env.insert('RCLONE_RC_PASS', rc['pass'])
+            process.setProcessEnvironment(env)
+        
+        # Size the cache to fit its disk, as --vfs-cache-max-age alone lets it grow
+        if self.disk_guard_enabled:
+            args.extend(self.disk_guard.cache_flags(args, len(self.active_mounts()) + 1,
+                                                    self.rclone_version))
+        
         # Add mount options for better reliability
         args.extend([
             '--daemon',                    # Run in background
             '--log-level', 'DEBUG',        # Verbose logging
             '--stats', '1s',               # Frequent stats
-            '--dir-cache-time', '5m',      # Directory caching
+            '--dir-cache-time', dir_cache_time,  # Directory caching
             '--poll-interval', '15s',      # Check for changes
             '--vfs-write-back', '5s',      # Write-back cache
             '--vfs-read-chunk-size', '32M', # Read in chunks
@@ -126,15 +325,17 @@ class RcloneManager:
             if self.verify_mount(mount_point):
                 print(f"Mount successful on attempt {attempt + 1}")
                 self.mounts[remote] = process
+                self.mount_points[remote] = str(mount_point)
+                if rc:
+                    self.mount_rc[remote] = rc
+                    self.prewarm(remote)
+                else:
+                    self.pins.warm_later(remote)
                 return process
             
             # Check for fusermount process
             try:
-                fuse_check = subprocess.run(
-                    ['pgrep', '-f', f'fusermount.*{mount_point}'],
-                    capture_output=True,
-                    text=True
-                )
+                fuse_check = self.runner.run(['pgrep', '-f', f'fusermount.*{mount_point}'])
                 if fuse_check.returncode == 0:
                     print("Fusermount process found, continuing to wait...")
                 else:
@@ -147,35 +348,164 @@ class RcloneManager:
         process.kill()
         # Try to clean up
         try:
-            subprocess.run(['fusermount', '-u', mount_point], check=False)
+            self.runner.run(['fusermount', '-u', mount_point])
         except:
             pass
         raise RuntimeError(f"Mount failed to initialize after {max_attempts} attempts: {error}")
 
+    def prewarm(self, remote: str):
+        """Fill the directory cache of a mount in the background, timing the first ls"""
+        rc = self.mount_rc.get(remote)
+        mount_point = self.active_mounts().get(remote)
+        if not rc or not mount_point:
+            return
+        paths = self.config.get_remote_settings(remote).get('prewarm_paths', []) if self.config else []
+        print(f"Prewarming directory cache of {remote}: {', '.join(paths) or '/'}")
+        self.runner.run_long(
+            prewarm_mount,
+            lambda result, error: self._on_prewarmed(remote, result, error),
+            mount_point, rc, paths
+        )
+
+    def _on_prewarmed(self, remote: str, result: Optional[PrewarmResult], error):
+        if error:
+            result = PrewarmResult()
+            result.error = str(error)
+        self.prewarm_results[remote] = result
+        print(f"Prewarm of {remote}: {result.describe()}")
+        # Offline folders are read after their directories are cached
+        self.pins.warm(remote)
+
     def unmount(self, remote: str) -> bool:
         """Unmount a remote"""
         if not self.is_mounted(remote):
             return False
 
-        mount_point = Path.home() / 'mnt' / remote
-        process = self.mounts.get(remote)
-        
-        if process:
-            process.terminate()
-            if not process.waitForFinished(5000):  # 5 second timeout
-                process.kill()
-        
-        # Also try fusermount -u as backup
-        try:
-            subprocess.run(['fusermount', '-u', str(mount_point)], check=True)
-        except subprocess.CalledProcessError:
-            pass
-        
-        # Remove from mounts dict if it was there
-        if remote in self.mounts:
-            del self.mounts[remote]
-        
-        return True
+        report = self.unmount_all([remote])
+        return remote not in report.failed
+
+    def _unmount_targets(self, remotes: Optional[List[str]]) -> Dict[str, tuple]:
+        """Collect remote and rclone pid per mount point (GUI thread only).
+
+        Only mounts this app owns are touched: those it started and those
+        under ~/mnt. rclone mounts started by systemd or by hand elsewhere
+        are left alone.
+        """
+        mnt_dir = Path.home() / 'mnt'
+        owned = {}  # Mount point -> remote
+        for remote in self.mounts:
+            owned[self.mount_points.get(remote, str(mnt_dir / remote))] = remote
+        for mount_point, source in self.owned_mount_sources().items():
+            owned.setdefault(mount_point, source.split(':', 1)[0] or Path(mount_point).name)
+        if remotes is not None:
+            owned = {mount_point: remote for mount_point, remote in owned.items() if remote in remotes}
+            for remote in remotes:
+                if remote not in owned.values():
+                    owned[str(mnt_dir / remote)] = remote
+
+        targets = {}
+        for mount_point, remote in owned.items():
+            pid = None
+            process = self.mounts.get(remote)
+            if process is not None and self.mount_points.get(remote, str(mnt_dir / remote)) == mount_point:
+                pid = process.processId() or getattr(process, 'pid', None)
+            targets[mount_point] = (remote, pid)
+        return targets
+
+    def _unmount_one(self, mount_point: str, pid: Optional[int], end: float) -> str:
+        """Unmount one mount point before ``end``; returns 'unmounted' or 'lazy'"""
+        result = self.runner.run(['fusermount', '-u', mount_point],
+                                 timeout=max(end - time.monotonic(), 0.1))
+        if result.returncode == 0 or 'not found' in result.stderr:
+            outcome = 'unmounted'
+        else:
+            # Busy mounts are detached now and released once the last user lets go
+            print(f"fusermount -u {mount_point} failed ({result.stderr.strip()}), trying lazy unmount")
+            lazy = self.runner.run(['fusermount', '-uz', mount_point],
+                                   timeout=max(end - time.monotonic(), 0.1))
+            if lazy.returncode != 0:
+                raise RuntimeError(lazy.stderr.strip() or result.stderr.strip())
+            outcome = 'lazy'
+
+        if pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass  # Already gone once the mount went away
+        return outcome
+
+    def _unmount_targets_parallel(self, targets: Dict[str, tuple], deadline: float) -> UnmountReport:
+        """Unmount all targets concurrently, giving up on stragglers at the deadline"""
+        report = UnmountReport()
+        if not targets:
+            return report
+
+        # A remote mounted more than once is reported per mount point
+        counts: Dict[str, int] = {}
+        for remote, _ in targets.values():
+            counts[remote] = counts.get(remote, 0) + 1
+
+        end = time.monotonic() + deadline
+        pool = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix='rclonetray-unmount')
+        futures = {
+            pool.submit(self._unmount_one, mount_point, pid, end): (mount_point, remote)
+            for mount_point, (remote, pid) in targets.items()
+        }
+        done, not_done = wait(futures, timeout=deadline)
+        pool.shutdown(wait=False)
+
+        def label(mount_point, remote):
+            return remote if counts[remote] == 1 else f"{remote} ({mount_point})"
+
+        for future in done:
+            mount_point, remote = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                report.failed[label(mount_point, remote)] = str(e)
+                continue
+            if outcome == 'lazy':
+                report.lazy.append(label(mount_point, remote))
+            else:
+                report.unmounted.append(label(mount_point, remote))
+            report.released.append(mount_point)
+        for future in not_done:
+            report.failed[label(*futures[future])] = f"no response within {deadline:g}s"
+        return report
+
+    def _forget_mounts(self, report: UnmountReport):
+        mnt_dir = Path.home() / 'mnt'
+        for remote in list(self.mounts):
+            if self.mount_points.get(remote, str(mnt_dir / remote)) in report.released:
+                self.mounts.pop(remote, None)
+                self.mount_points.pop(remote, None)
+                self.mount_rc.pop(remote, None)
+                self.prewarm_results.pop(remote, None)
+
+    def unmount_all(self, remotes: Optional[List[str]] = None,
+                    deadline: Optional[float] = None) -> UnmountReport:
+        """Unmount remotes (all by default) in parallel, waiting at most ``deadline`` seconds"""
+        if deadline is None:
+            deadline = self.config.get('shutdown_timeout', 10.0) if self.config else 10.0
+        report = self._unmount_targets_parallel(self._unmount_targets(remotes), deadline)
+        self._forget_mounts(report)
+        return report
+
+    def unmount_all_async(self, callback: Callable[[UnmountReport], None],
+                          remotes: Optional[List[str]] = None, deadline: Optional[float] = None):
+        """Like unmount_all, but without blocking; ``callback`` runs on the GUI thread"""
+        if deadline is None:
+            deadline = self.config.get('shutdown_timeout', 10.0) if self.config else 10.0
+        targets = self._unmount_targets(remotes)
+
+        def finished(report, error):
+            if error:
+                report = UnmountReport()
+                report.failed = {remote: str(error) for remote, _ in targets.values()}
+            self._forget_mounts(report)
+            callback(report)
+
+        self.runner.run_in_background(self._unmount_targets_parallel, finished, targets, deadline)
         
     def is_mounted(self, remote: str) -> bool:
         """Check if a remote is currently mounted"""
@@ -198,11 +528,7 @@ class RcloneManager:
         """Verify if a mount point is working"""
         try:
             # Check mount status using findmnt
-            result = subprocess.run(
-                ['findmnt', mount_point],
-                capture_output=True,
-                text=True
-            )
+            result = self.runner.run(['findmnt', mount_point])
             
             if result.returncode != 0:
                 print(f"findmnt shows {mount_point} is not mounted")
@@ -227,21 +553,197 @@ class RcloneManager:
                 print(f"Error checking /proc/mounts: {e2}")
                 return False
 
+    def active_mounts(self) -> Dict[str, str]:
+        """Map remote name to mount point for every rclone FUSE mount of a configured remote"""
+        # On-the-fly remotes (':local:/tmp/...', e.g. the mount benchmark) have no name
+        return {source.split(':', 1)[0]: mount_point
+                for mount_point, source in self.mount_sources().items()
+                if source.split(':', 1)[0]}
+
+    def mount_sources(self) -> Dict[str, str]:
+        """Map the mount point of every rclone FUSE mount to the 'remote:path' it shows.
+
+        Reads the kernel mount table only, so it never touches the mounts
+        themselves and cannot hang on a dead one.
+        """
+        mounts = {}
+        try:
+            with open('/proc/self/mounts') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            print(f"Error reading mount table: {e}")
+            return mounts
+
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 3 or fields[2] != 'fuse.rclone':
+                continue
+            # Spaces and other specials are octal-escaped in the mount table
+            device = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), fields[0])
+            mount_point = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), fields[1])
+            if ':' not in device:
+                device = f"{Path(mount_point).name}:"
+            mounts[mount_point] = device
+        return mounts
+
+    def owned_mount_sources(self) -> Dict[str, str]:
+        """mount_sources() limited to the mounts this app owns: those it started and those under ~/mnt.
+
+        Mounts made by systemd, by hand or by another user may use another
+        rclone.conf, where the same remote name is a different account.
+        """
+        mnt_dir = Path.home() / 'mnt'
+        started = set(self.mount_points.values())
+        return {mount_point: source for mount_point, source in self.mount_sources().items()
+                if mount_point in started or Path(mount_point).parent == mnt_dir}
+
+    def direct_path(self, path: str) -> str:
+        """The remote path behind a local path in one of our mounts, so reading it skips FUSE.
+
+        Only used for paths a transfer reads: writing past the mount would
+        leave its directory cache showing stale listings.
+        """
+        if (':' in path and not path.startswith('/')) or \
+                (self.config and not self.config.get('rewrite_mounted_paths', True)):
+            return path
+        direct = resolve_mounted_path(path, self.owned_mount_sources())
+        if direct != path:
+            print(f"Using {direct} directly instead of the mounted {path}")
+        return direct
+
     def list_remotes(self) -> list[str]:
         """List configured remotes"""
         if not self.config_path.exists():
             return []
 
         try:
-            output = subprocess.check_output(['rclone', 'listremotes'])
-            return [r.strip(':') for r in output.decode().splitlines()]
-        except subprocess.CalledProcessError:
+            output = self.runner.run(['rclone', 'listremotes'], check=True).stdout
+            return [r.strip(':') for r in output.splitlines()]
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
             return []
 
+    def list_remotes_async(self, callback: Callable[[List[str]], None]):
+        """Like list_remotes, but hands the remotes to ``callback`` on the GUI thread"""
+        if not self.config_path.exists():
+            callback([])
+            return
+
+        def listed(result, error):
+            if error or result.returncode != 0:
+                callback([])
+            else:
+                callback([r.strip(':') for r in result.stdout.splitlines()])
+        self.runner.run_async(['rclone', 'listremotes'], listed)
+
+    def get_remote_type(self, remote: str) -> str:
+        """Get the backend type of a configured remote (worker side, waits for rclone)"""
+        try:
+            output = self.runner.run(['rclone', 'config', 'show', remote], check=True).stdout
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+            return 'Unknown'
+
+        # Output is the INI section for the remote
+        for line in output.splitlines():
+            if line.strip().startswith('type = '):
+                return line.split('=', 1)[1].strip()
+        return 'Unknown'
+
+    def remote_states(self) -> Dict[str, Tuple[str, bool]]:
+        """Type and mount state of every configured remote (worker side, rclone may be slow)"""
+        return {remote: (self.get_remote_type(remote),
+                         self.verify_mount(str(Path.home() / 'mnt' / remote)))
+                for remote in self.list_remotes()}
+
+    def remote_configs(self) -> Dict[str, dict]:
+        """Settings of every configured remote"""
+        try:
+            output = self.runner.run(['rclone', 'config', 'dump'], check=True).stdout
+            return json.loads(output)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError, ValueError):
+            return {}
+
+    def cached_remote_configs(self) -> Dict[str, dict]:
+        """remote_configs as last read, without waiting for rclone.
+
+        When rclone.conf has changed it is read again in the background, so
+        the result catches up a moment later.
+        """
+        try:
+            mtime = self.config_path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._remote_configs_mtime:
+            self._remote_configs_mtime = mtime
+            self.runner.invalidate('rclone', 'config', 'dump')
+            self.runner.run_in_background(self.remote_configs, self._on_remote_configs)
+        return self._remote_configs
+
+    def _on_remote_configs(self, configs, error):
+        if error:
+            print(f"Error reading remote settings: {error}")
+            return
+        self._remote_configs = configs
+
+    def server_side_mode(self, source: str, dest: str) -> Optional[str]:
+        """Whether a transfer can be done by the provider itself (see serverside.py)"""
+        if remote_name(source) is None or remote_name(dest) is None:
+            return None
+        return server_side_mode(source, dest, self.cached_remote_configs())
+
+    def endpoint_type(self, path: str) -> str:
+        """Backend type of a transfer endpoint; plain paths are 'local'"""
+        remote, _ = split_endpoint(path)
+        if remote is None:
+            return 'local'
+        return self.cached_remote_configs().get(remote, {}).get('type', 'Unknown')
+
+    def advise(self, transfer_type: str, source: str, dest: str, flags: list = None,
+               cached_only: bool = False) -> Advice:
+        """Recommend performance flags for a sync or copy.
+
+        Without ``cached_only`` this queries the search index, so call it on a worker.
+        """
+        return self.advisor.advise(transfer_type, source, dest, flags,
+                                   self.endpoint_type(source), self.endpoint_type(dest),
+                                   cached_only)
+
+    def _record_outcome(self, transfer_type: str, source: str, dest: str,
+                        flags: List[str], duration: float):
+        """Feed the run time of a finished job back to the advisor"""
+        self.advisor.record(transfer_type, source, dest, self.endpoint_type(source),
+                            self.endpoint_type(dest), flags, duration)
+
+    def record_speed_test(self, result: SpeedTestResult):
+        """Keep a finished speed test and use it for the remote's concurrency"""
+        self.speed_tests.add(result)
+        if result.error or not self.config:
+            return
+        settings = dict(self.config.get_remote_settings(result.remote))
+        for direction in ('upload', 'download'):
+            transfers = result.best_concurrency(direction)
+            if transfers:
+                settings[f'{direction}_transfers'] = transfers
+        self.config.set_remote_settings(result.remote, settings)
+
+    def default_transfers(self, source: str, dest: str) -> int:
+        """--transfers for a job without one: what speed tests found, else 4"""
+        if not self.config or not self.config.get('speed_test_transfers', True):
+            return 4
+        measured = []
+        for path, direction in ((dest, 'upload'), (source, 'download')):
+            remote = remote_name(path)
+            if remote:
+                transfers = self.config.get_remote_settings(remote).get(f'{direction}_transfers')
+                if transfers:
+                    measured.append(int(transfers))
+        # Between two remotes the slower side decides
+        return min(measured) if measured else 4
+
     def refresh_mounts(self):
         """Refresh the current mount status"""
         # Clear current mounts
         self.mounts.clear()
+        self.mount_points.clear()
         
         # Check mnt directory for existing mounts
         mnt_dir = Path.home() / 'mnt'
@@ -253,48 +755,184 @@ class RcloneManager:
                 remote = mount_point.name
                 # Try to find the rclone process for this mount
                 try:
-                    output = subprocess.check_output(['pgrep', '-f', f'rclone mount.*{remote}:/']).decode()
+                    output = self.runner.run(['pgrep', '-f', f'rclone mount.*{remote}:/'], check=True).stdout
                     if output.strip():
-                        pid = int(output.strip())
+                        pid = int(output.split()[0])
                         # Create a QProcess for the existing mount
                         process = QProcess()
                         # Store the PID for later use
                         process.pid = pid
                         self.mounts[remote] = process
-                except subprocess.CalledProcessError:
+                except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
                     pass  # No process found
 
     def sync(self, source: str, dest: str, flags: list = None) -> QProcess:
         """Sync files from source to destination"""
+        return self._start_transfer('sync', source, dest, flags)
+
+    def copy(self, source: str, dest: str, flags: list = None,
+             source_is_file: bool = False) -> Optional[QProcess]:
+        """Copy files from source to destination.
+
+        A single file (``source_is_file``, or a local path that is a file) is
+        queued with enqueue_copy, so copies started close together share one
+        rclone run; None is returned then.
+        """
+        direct = self.direct_path(source)
+        # Only local paths are checked; asking a remote would block
+        if not source_is_file and not (':' in direct and not direct.startswith('/')):
+            source_is_file = os.path.isfile(direct)
+        if source_is_file:
+            self.enqueue_copy(source, dest, flags)
+            return None
+        return self._start_transfer('copy', source, dest, flags)
+
+    def bisync(self, path1: str, path2: str, flags: list = None) -> QProcess:
+        """Synchronise two paths in both directions"""
+        return self._start_transfer('bisync', path1, path2, flags)
+
+    def bisync_workdir(self, path1: str, path2: str) -> Path:
+        """Working directory holding the listings bisync compares against"""
+        key = hashlib.sha1(f"{path1}\n{path2}".encode()).hexdigest()[:16]
+        return self.data_dir / 'bisync' / key
+
+    def _bisync_flags(self, path1: str, path2: str, flags: Optional[list]) -> List[str]:
+        """Point bisync at its own working directory, adding --resync on the first run.
+
+        Raises RuntimeError when an earlier run left no listings behind, as
+        bisync does after a critical failure: the user has to look before
+        resyncing, since a resync can bring back files deleted on one side.
+        """
+        workdir = self.bisync_workdir(path1, path2)
+        first_run = not workdir.exists() or not any(workdir.iterdir())
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        # A journaled job already carries the --workdir it was started with
+        user_flags = []
+        skip_next = False
+        for flag in flags or []:
+            if skip_next:
+                skip_next = False
+            elif flag == '--workdir':
+                skip_next = True
+            elif not flag.startswith('--workdir='):
+                user_flags.append(flag)
+
+        args = ['--workdir', str(workdir)]
+        # The listings of the last good run make later runs process only the deltas
+        if '--resync' not in user_flags and not any(workdir.glob('*.path1.lst')):
+            if not first_run:
+                raise RuntimeError(f"The last bisync of {path1} <-> {path2} failed and left no "
+                                   f"listings. Check both sides, then run it again with "
+                                   f"\"Force a full resync\".")
+            print(f"First bisync of {path1} <-> {path2}, running with --resync")
+            args.append('--resync')
+
+        # A lock left behind by an interrupted run would make every later run fail
+        running = any(
+            transfer['type'] == 'bisync' and transfer['source'] == path1
+            and transfer['dest'] == path2 and transfer['status'] in ACTIVE_STATES
+            for transfer in self.transfers.values()
+        )
+        if not running:
+            for lock in workdir.glob('*.lck'):
+                print(f"Removing stale bisync lock {lock}")
+                lock.unlink()
+        return args + user_flags
+
+    def new_transfer_id(self, transfer_type: str) -> str:
+        """Generate an id that is unique across sessions"""
+        return f"{transfer_type}_{uuid.uuid4().hex[:8]}"
+
+    def start_transfer(self, transfer_type: str, source: str, dest: str,
+                       flags: list = None, transfer_id: Optional[str] = None, **info) -> str:
+        """Start a transfer and return its id; ``info`` is stored with the transfer"""
+        if transfer_id is None:
+            transfer_id = self.new_transfer_id(transfer_type)
+        self._start_transfer(transfer_type, source, dest, flags, transfer_id=transfer_id, info=info)
+        return transfer_id
+
+    def _start_transfer(self, transfer_type: str, source: str, dest: str,
+                        flags: list = None, transfer_id: Optional[str] = None,
+                        attempt: int = 0, info: Optional[dict] = None) -> QProcess:
+        """Start an rclone transfer and track it"""
         process = QProcess()
         process.setProgram('rclone')
         
-        args = ['sync', source, dest, '--progress']
+        if transfer_id is None:
+            transfer_id = self.new_transfer_id(transfer_type)
+        if transfer_type != 'bisync':
+            # bisync writes to both paths, so neither bypasses its mount
+            source = self.direct_path(source)
+        if transfer_type == 'bisync':
+            flags = self._bisync_flags(source, dest, flags)
+        elif transfer_type in ('sync', 'copy') and '--files-from' not in (flags or []) \
+                and self.config and self.config.get('auto_apply_advice', False):
+            # Only statistics computed earlier are used; the index is not queried here
+            advice = self.advise(transfer_type, source, dest, flags, cached_only=True)
+            if advice.flags:
+                print(f"Adding advised flags to {transfer_id}: {' '.join(advice.flags)}")
+                flags = list(flags or []) + advice.flags
+            # ...but brought up to date for the next run of the job
+            self.runner.run_in_background(self.advisor.tree_stats, None, source)
+            self.runner.run_in_background(self.advisor.tree_stats, None, dest)
+
+        # Copies within one provider account need not pass through this machine
+        server_side = None
+        if transfer_type in ('sync', 'copy', 'bisync') and \
+                (not self.config or self.config.get('prefer_server_side', True)):
+            server_side = self.server_side_mode(source, dest)
+            if server_side == ACROSS_CONFIGS and '--server-side-across-configs' not in (flags or []):
+                flags = list(flags or []) + ['--server-side-across-configs']
+
+        # Writes into a disk that is running low start throttled
+        if self.disk_guard_enabled and not any(flag.startswith('--bwlimit') for flag in flags or []):
+            throttle = self.disk_guard.transfer_flags(transfer_type, source, dest)
+            if throttle:
+                print(f"Limiting {transfer_id} to {throttle[1]}/s: low disk space")
+                flags = list(flags or []) + throttle
+
+        args = [transfer_type, source, dest, '--progress']
         if flags:
             args.extend(flags)
+
+        # JSON log per job, so failed files can be picked out afterwards
+        if not any(arg == '--log-file' or arg.startswith('--log-file=') for arg in flags or []):
+            log_path = self.journal.log_path(transfer_id)
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            args.extend(['--log-file', str(log_path), '--use-json-log'])
             
-        # Add default options for better reliability
+        # Add default options for better reliability; concurrency set by the caller wins
+        for flag, value in (('--transfers', str(self.default_transfers(source, dest))), ('--checkers', '8')):
+            if not any(arg == flag or arg.startswith(flag + '=') for arg in flags or []):
+                args.extend([flag, value])
         args.extend([
-            '--transfers', '4',
-            '--checkers', '8',
             '--stats', '1s',
             '--stats-one-line'
         ])
         
         process.setArguments(args)
-        print(f"Starting rclone sync with args: {' '.join(args)}")
+        print(f"Starting rclone {transfer_type} with args: {' '.join(args)}")
         
-        transfer_id = f"sync_{source}_{dest}_{len(self.transfers)}"
         self.transfers[transfer_id] = {
             'process': process,
-            'type': 'sync',
+            'type': transfer_type,
             'source': source,
             'dest': dest,
+            'flags': list(flags or []),
             'status': 'starting',
             'progress': 0,
             'speed': '0 B/s',
-            'eta': 'unknown'
+            'eta': 'unknown',
+            'attempt': attempt,
+            'failed_files': 0,
+            'started_at': time.time(),
+            'server_side': server_side,
+            **(info or {}),
         }
+        # A watch starts with a full run anyway, so its transfers are not resumed
+        if not (info or {}).get('watch'):
+            self.journal.record(transfer_id, transfer_type, source, dest, flags, attempt=attempt, **(info or {}))
         
         # Connect process signals
         process.readyReadStandardOutput.connect(
@@ -307,67 +945,367 @@ class RcloneManager:
         process.start()
         return process
 
-    def copy(self, source: str, dest: str, flags: list = None) -> QProcess:
-        """Copy files from source to destination"""
-        process = QProcess()
-        process.setProgram('rclone')
-        
-        args = ['copy', source, dest, '--progress']
-        if flags:
-            args.extend(flags)
-            
-        # Add default options for better reliability
-        args.extend([
-            '--transfers', '4',
-            '--checkers', '8',
-            '--stats', '1s',
-            '--stats-one-line'
-        ])
-        
-        process.setArguments(args)
-        print(f"Starting rclone copy with args: {' '.join(args)}")
-        
-        transfer_id = f"copy_{source}_{dest}_{len(self.transfers)}"
+    def enqueue_copy(self, source: str, dest: str, flags: list = None,
+                     attempt: int = 0) -> str:
+        """Queue a copy of the single file ``source`` into ``dest``.
+
+        Copies queued within the coalesce window that share the source
+        directory, destination and flags run as one rclone invocation with
+        --files-from, while each keeps its own entry in the transfer list.
+        """
+        transfer_id = self._add_queued('copy', self.direct_path(source), dest,
+                                       flags, attempt)
+        self.copy_queue.append(transfer_id)
+        # The window is not restarted, so a steady stream of jobs still gets going
+        if not self.coalesce_timer.isActive():
+            self.coalesce_timer.start()
+        return transfer_id
+
+    def _add_queued(self, transfer_type: str, source: str, dest: str, flags: Optional[list],
+                    attempt: int = 0, **info) -> str:
+        """Track and journal a transfer that will be started later"""
+        transfer_id = self.new_transfer_id(transfer_type)
         self.transfers[transfer_id] = {
-            'process': process,
-            'type': 'copy',
+            'process': QProcess(),  # Placeholder until the transfer is started
+            'type': transfer_type,
             'source': source,
             'dest': dest,
-            'status': 'starting',
+            'flags': list(flags or []),
+            'status': 'queued',
             'progress': 0,
             'speed': '0 B/s',
-            'eta': 'unknown'
+            'eta': 'unknown',
+            'attempt': attempt,
+            'failed_files': 0,
+            **info,
         }
-        
-        # Connect process signals
-        process.readyReadStandardOutput.connect(
-            lambda: self._update_transfer_progress(transfer_id)
-        )
-        process.finished.connect(
-            lambda: self._handle_transfer_completion(transfer_id)
+        self.journal.record(transfer_id, transfer_type, source, dest, flags, status='queued',
+                            attempt=attempt, **info)
+        return transfer_id
+
+    def replicate(self, source: str, dests: List[str], flags: list = None) -> List[str]:
+        """Copy one source to several destinations; returns a transfer id per destination.
+
+        The source is listed once into a file list that every destination's
+        copy reads with --files-from, instead of each copy listing it again.
+        The copies share one budget: the configured transfers and bandwidth
+        limit are divided between them.
+        """
+        source = self.direct_path(source)
+        replication_id = self.new_transfer_id('replicate')
+        member_ids = [
+            self._add_queued('copy', source, dest, flags, replication=replication_id)
+            for dest in dests
+        ]
+        files_path = self.journal.files_path(replication_id)
+        print(f"Listing {source} once for {len(member_ids)} destinations")
+        self.runner.run_in_background(
+            self._snapshot_source,
+            lambda result, error: self._start_replicas(replication_id, files_path, result, error),
+            source, files_path
         )
-        
-        process.start()
-        return process
+        return member_ids
+
+    def _snapshot_source(self, source: str, files_path: Path) -> int:
+        """Write every file below ``source`` to a --files-from list"""
+        files_path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with open(files_path, 'w') as f:
+            for line in stream_rclone(['rclone', 'lsf', '-R', '--files-only', source],
+                                      lambda: self._shutting_down):
+                f.write(line)
+                count += 1
+        return count
+
+    def _replicas(self, replication_id: str) -> List[str]:
+        return [transfer_id for transfer_id, transfer in self.transfers.items()
+                if transfer.get('replication') == replication_id]
+
+    def _start_replicas(self, replication_id: str, files_path: Path, count, error):
+        """Start the copy to each destination that was not cancelled while listing"""
+        member_ids = [member_id for member_id in self._replicas(replication_id)
+                      if self.transfers[member_id]['status'] == 'queued']
+        if error or self._shutting_down:
+            if error:
+                print(f"Listing the source of {replication_id} failed: {error}")
+                for member_id in member_ids:
+                    self.transfers[member_id]['status'] = 'failed'
+                    self.journal.remove(member_id)
+            files_path.unlink(missing_ok=True)
+            return
+        if not member_ids:
+            files_path.unlink(missing_ok=True)
+            return
+
+        print(f"Replicating {count} files to {len(member_ids)} destinations")
+        total_transfers = self.config.get('transfers', 4) if self.config else 4
+        budget = ['--checkers', str(max(8 // len(member_ids), 1))]
+        bwlimit = split_bwlimit(self.config.get('bandwidth_limit', '0') if self.config else '0',
+                                len(member_ids))
+        if bwlimit:
+            budget += ['--bwlimit', bwlimit]
+
+        for i, member_id in enumerate(member_ids):
+            member = self.transfers[member_id]
+            # Transfers left over by the division go to the first destinations
+            transfers = total_transfers // len(member_ids) + (i < total_transfers % len(member_ids))
+            flags = member['flags'] + ['--files-from', str(files_path),
+                                       '--transfers', str(max(transfers, 1))] + budget
+            try:
+                self._start_transfer('copy', member['source'], member['dest'], flags,
+                                     transfer_id=member_id, attempt=member['attempt'],
+                                     info={'replication': replication_id})
+            except Exception as e:
+                print(f"Failed to start replica {member_id}: {e}")
+                member['status'] = 'failed'
+
+    def _finish_replica(self, replication_id: str):
+        """Delete the shared file list once no copy of the replication needs it"""
+        if any(self.transfers[member_id]['status'] in ACTIVE_STATES + ('queued',)
+               for member_id in self._replicas(replication_id)):
+            return
+        self.journal.files_path(replication_id).unlink(missing_ok=True)
+
+    def _start_queued(self):
+        """Start the queued copies, one rclone run per source directory and destination"""
+        groups: Dict[tuple, List[str]] = {}
+        for transfer_id in self.copy_queue:
+            transfer = self.transfers.get(transfer_id)
+            if not transfer or transfer['status'] != 'queued':
+                continue
+            parent, name = split_parent(transfer['source'])
+            key = (parent, transfer['dest'], tuple(transfer['flags'])) if name else (transfer_id,)
+            groups.setdefault(key, []).append(transfer_id)
+        self.copy_queue.clear()
+
+        for key, member_ids in groups.items():
+            try:
+                if len(member_ids) == 1:
+                    transfer = self.transfers[member_ids[0]]
+                    self._start_transfer('copy', transfer['source'], transfer['dest'],
+                                         transfer['flags'], transfer_id=member_ids[0],
+                                         attempt=transfer.get('attempt', 0))
+                else:
+                    self._start_batch(key[0], key[1], list(key[2]), member_ids)
+            except Exception as e:
+                print(f"Failed to start queued copies: {e}")
+                for member_id in member_ids:
+                    self.transfers[member_id]['status'] = 'failed'
+                    self.journal.remove(member_id)
+
+    def _start_batch(self, parent: str, dest: str, flags: List[str], member_ids: List[str]) -> str:
+        """Copy the files of several queued jobs in one rclone run"""
+        batch_id = self.new_transfer_id('copy')
+        names = [split_parent(self.transfers[member_id]['source'])[1] for member_id in member_ids]
+        files_path = self.journal.files_path(batch_id)
+        self.journal.write_file_list(files_path, list(dict.fromkeys(names)))
+        print(f"Coalescing {len(member_ids)} queued copies from {parent} into {batch_id}")
+
+        self._start_transfer('copy', parent, dest,
+                             flags + ['--files-from', str(files_path), '--no-traverse'],
+                             transfer_id=batch_id, info={'members': member_ids})
+        for member_id in member_ids:
+            self.transfers[member_id]['batch'] = batch_id
+            # The batch is journaled instead, so a resume does not copy twice
+            self.journal.remove(member_id)
+        self._sync_batch(batch_id)
+        return batch_id
+
+    def _sync_batch(self, batch_id: str, failed_files: Optional[List[str]] = None):
+        """Mirror the state of a batch run onto the jobs it is made of"""
+        batch = self.transfers.get(batch_id)
+        if not batch or 'members' not in batch:
+            return
+        failed = set(failed_files or [])
+        for member_id in batch['members']:
+            member = self.transfers.get(member_id)
+            if not member or member.get('batch') != batch_id:
+                continue
+            member.update(progress=batch['progress'], speed=batch['speed'], eta=batch['eta'],
+                          server_side=batch.get('server_side'))
+            if batch['status'] != 'failed':
+                member['status'] = batch['status']
+            elif failed_files is not None:
+                # Without a file list the batch failed as a whole (auth, listing, ...)
+                if not failed or split_parent(member['source'])[1] in failed:
+                    member['status'] = 'failed'
+                    member['failed_files'] = 1
+                else:
+                    member['status'] = 'completed'
+                    member['progress'] = 100
+
+    def _batch_of(self, transfer_id: str) -> str:
+        """Batched copies are controlled through the rclone run they are part of"""
+        return self.transfers.get(transfer_id, {}).get('batch', transfer_id)
+
+    def _restore_failed_jobs(self):
+        """Show jobs that failed in an earlier session, so their files can be retried"""
+        for job_id, job in self.journal.jobs.items():
+            if job.get('status') != 'failed' or not job.get('failed_files'):
+                continue
+            self.transfers[job_id] = {
+                'process': QProcess(),  # Placeholder; the job is not running
+                'type': job['type'],
+                'source': job['source'],
+                'dest': job['dest'],
+                'flags': list(job.get('flags') or []),
+                'status': 'failed',
+                'progress': 0,
+                'speed': '0 B/s',
+                'eta': 'unknown',
+                'attempt': job.get('attempt', 0),
+                'failed_files': job['failed_files'],
+                'other_errors': job.get('other_errors', 0),
+                **{key: job[key] for key in TRANSFER_INFO_KEYS if key in job},
+            }
+
+    def start_recurring(self):
+        """Start scheduled jobs and watches.
+
+        Called after the resume prompt, so a catch-up or full watch run never
+        overlaps the resumed copy of the same job.
+        """
+        # Journals written before watch transfers were left out may still hold some
+        self.discard_jobs([job_id for job_id, job in self.journal.unfinished().items()
+                           if job.get('watch') and job_id not in self.transfers])
+        self.scheduler.start()
+        self.watches.start()
+
+    def unfinished_jobs(self) -> Dict[str, dict]:
+        """Jobs from a previous session that never finished"""
+        return {
+            job_id: job for job_id, job in self.journal.unfinished().items()
+            if job_id not in self.transfers and not job.get('watch')
+        }
+
+    def resume_jobs(self, job_ids: Optional[List[str]] = None) -> List[str]:
+        """Relaunch unfinished jobs; rclone skips whatever was already copied"""
+        jobs = self.unfinished_jobs()
+        resumed = []
+        for job_id in job_ids if job_ids is not None else list(jobs):
+            job = jobs.get(job_id)
+            if not job or job['type'] not in ('sync', 'copy', 'bisync'):
+                continue
+            try:
+                info = {key: job[key] for key in TRANSFER_INFO_KEYS if key in job}
+                self._start_transfer(job['type'], job['source'], job['dest'],
+                                     job.get('flags'), transfer_id=job_id,
+                                     attempt=job.get('attempt', 0), info=info)
+                resumed.append(job_id)
+            except Exception as e:
+                print(f"Failed to resume job {job_id}: {e}")
+        return resumed
+
+    def discard_jobs(self, job_ids: Optional[List[str]] = None):
+        """Forget unfinished jobs instead of resuming them"""
+        for job_id in job_ids if job_ids is not None else list(self.unfinished_jobs()):
+            self.journal.remove(job_id)
 
     def get_transfers(self) -> dict:
         """Get current transfers and their status"""
         return self.transfers
 
-    def cancel_transfer(self, transfer_id: str) -> bool:
-        """Cancel a transfer"""
+    def _request_cancel(self, transfer_id: str) -> bool:
+        """Ask a transfer to stop without waiting; returns False if unknown.
+
+        Cancelling a batched copy stops the whole batch it runs in.
+        """
         if transfer_id not in self.transfers:
             return False
-            
+        if self.transfers[transfer_id]['status'] == 'queued':
+            if transfer_id in self.copy_queue:
+                self.copy_queue.remove(transfer_id)
+            self.transfers[transfer_id]['status'] = 'cancelled'
+            self.journal.remove(transfer_id)
+            return True
+
+        transfer_id = self._batch_of(transfer_id)
         transfer = self.transfers[transfer_id]
         process = transfer['process']
         
-        if process.state() == QProcess.ProcessState.Running:
-            process.terminate()
-            if not process.waitForFinished(5000):  # 5 second timeout
-                process.kill()
-            
-        transfer['status'] = 'cancelled'
+        if process.state() == QProcess.ProcessState.NotRunning:
+            if transfer['status'] in ('starting', 'running', 'paused'):
+                transfer['status'] = 'cancelled'
+                self.journal.remove(transfer_id)
+                self._sync_batch(transfer_id)
+            return True
+
+        process.terminate()
+        if transfer['status'] == 'paused':
+            # A stopped process only acts on SIGTERM once it is continued
+            self._signal_transfer(transfer, signal.SIGCONT)
+        transfer['status'] = 'cancelling'
+        if not self._shutting_down:
+            self.journal.remove(transfer_id)
+        self._sync_batch(transfer_id)
+        return True
+
+    def _kill_remaining(self, transfer_ids: List[str]):
+        """Kill transfers that ignored the terminate request"""
+        for transfer_id in transfer_ids:
+            transfer = self.transfers.get(self._batch_of(transfer_id))
+            if transfer and transfer['process'].state() != QProcess.ProcessState.NotRunning:
+                print(f"Transfer {transfer_id} did not stop, killing it")
+                transfer['process'].kill()
+
+    def _kill_timeout_ms(self) -> int:
+        return int((self.config.get('cancel_kill_timeout', 5.0) if self.config else 5.0) * 1000)
+
+    def cancel_transfer(self, transfer_id: str) -> bool:
+        """Cancel a transfer, escalating to kill if it does not stop in time"""
+        if not self._request_cancel(transfer_id):
+            return False
+        QTimer.singleShot(self._kill_timeout_ms(), lambda: self._kill_remaining([transfer_id]))
+        return True
+
+    def cancel_all(self) -> int:
+        """Cancel every active transfer; returns how many were asked to stop"""
+        cancelled = [
+            transfer_id for transfer_id, transfer in self.transfers.items()
+            if transfer['status'] in ('queued', 'starting', 'running', 'paused')
+            and self._request_cancel(transfer_id)
+        ]
+        # One escalation timer for the whole batch
+        if cancelled:
+            QTimer.singleShot(self._kill_timeout_ms(), lambda: self._kill_remaining(cancelled))
+        return len(cancelled)
+
+    def _signal_transfer(self, transfer: dict, sig: int) -> bool:
+        pid = transfer['process'].processId()
+        if not pid:
+            return False
+        try:
+            os.kill(pid, sig)
+            return True
+        except (ProcessLookupError, PermissionError) as e:
+            print(f"Could not signal transfer process {pid}: {e}")
+            return False
+
+    def pause_transfer(self, transfer_id: str) -> bool:
+        """Pause a running transfer by stopping its rclone process"""
+        transfer_id = self._batch_of(transfer_id)
+        transfer = self.transfers.get(transfer_id)
+        if not transfer or transfer['status'] not in ('starting', 'running'):
+            return False
+        if not self._signal_transfer(transfer, signal.SIGSTOP):
+            return False
+        transfer['status'] = 'paused'
+        transfer['speed'] = '0 B/s'
+        self.journal.update(transfer_id, status='paused')
+        self._sync_batch(transfer_id)
+        return True
+
+    def resume_transfer(self, transfer_id: str) -> bool:
+        """Resume a paused transfer"""
+        transfer_id = self._batch_of(transfer_id)
+        transfer = self.transfers.get(transfer_id)
+        if not transfer or transfer['status'] != 'paused':
+            return False
+        if not self._signal_transfer(transfer, signal.SIGCONT):
+            return False
+        transfer['status'] = 'running'
+        self.journal.update(transfer_id, status='running')
+        self._sync_batch(transfer_id)
         return True
 
     def set_bandwidth_limit(self, limit: str):
@@ -413,7 +1351,10 @@ class RcloneManager:
                 if len(parts) > 2:
                     transfer['eta'] = parts[2].strip().replace('ETA ', '')
                     
-                transfer['status'] = 'running'
+                # Output buffered before a pause or cancel must not revive the job
+                if transfer['status'] == 'starting':
+                    transfer['status'] = 'running'
+                self._sync_batch(transfer_id)
             except Exception as e:
                 print(f"Error parsing transfer progress: {e}")
 
@@ -425,21 +1366,190 @@ class RcloneManager:
         transfer = self.transfers[transfer_id]
         process = transfer['process']
         
-        if process.exitCode() == 0:
+        if transfer['status'] in ('cancelling', 'cancelled'):
+            transfer['status'] = 'cancelled'
+        elif process.exitCode() == 0:
             transfer['status'] = 'completed'
             transfer['progress'] = 100
         else:
             transfer['status'] = 'failed'
-            
-        # Keep failed/completed transfers in list for history
-        # Could add cleanup after certain time/number of transfers
-
-    def cleanup(self):
-        """Clean up all mounts and transfers"""
-        # Clean up mounts
-        for remote in list(self.mounts.keys()):
-            self.unmount(remote)
-            
-        # Clean up transfers
-        for transfer_id in list(self.transfers.keys()):
-            self.cancel_transfer(transfer_id)
+        self._sync_batch(transfer_id)
+
+        # Cached listings of the remotes written to are out of date now
+        written = [transfer['dest']] + ([transfer['source']] if transfer['type'] == 'bisync' else [])
+        for path in written:
+            if ':' in path and not path.startswith('/'):
+                get_listing_cache().invalidate(path.partition(':')[0])
+
+        # Jobs interrupted by shutdown stay journaled so they can be resumed
+        if self._shutting_down:
+            return
+        if transfer.get('replication'):
+            self._finish_replica(transfer['replication'])
+        if transfer['type'] == 'bisync':
+            # A failed bisync is rerun as a whole, so only conflicts are of interest
+            self.runner.run_in_background(
+                parse_bisync_conflicts,
+                lambda result, error: self._record_conflicts(transfer_id, result, error),
+                self.journal.log_path(transfer_id)
+            )
+        elif transfer['status'] == 'failed':
+            # The log of a large job can be big, so parse it off the GUI thread
+            self.runner.run_in_background(
+                parse_failed_files,
+                lambda result, error: self._record_failed_files(transfer_id, result, error),
+                self.journal.log_path(transfer_id)
+            )
+        else:
+            self.journal.remove(transfer_id)
+            # Whole-tree runs tell the advisor how well their flags worked
+            flags = transfer['flags']
+            if transfer['status'] == 'completed' and transfer['type'] in ('sync', 'copy') \
+                    and '--files-from' not in flags and '--dry-run' not in flags:
+                self.runner.run_in_background(
+                    self._record_outcome, None, transfer['type'], transfer['source'],
+                    transfer['dest'], flags, time.time() - transfer['started_at']
+                )
+
+    def _record_conflicts(self, transfer_id: str, result, error):
+        """Store the files a bisync run found changed on both sides"""
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            return
+        if error:
+            print(f"Error reading log of {transfer_id}: {error}")
+        elif result:
+            # bisync keeps both versions, renaming them with a conflict suffix
+            print(f"Bisync {transfer_id} found {len(result)} conflict(s)")
+            transfer['conflicts'] = result
+        self.journal.remove(transfer_id)
+
+    def _record_failed_files(self, transfer_id: str, result, error):
+        """Store the failed-file list of a job and schedule an automatic retry"""
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            return
+        if error:
+            print(f"Error reading log of {transfer_id}: {error}")
+            result = ([], 0)
+
+        failed_files, other_errors = result
+        transfer['failed_files'] = len(failed_files)
+        transfer['other_errors'] = other_errors
+
+        if 'members' in transfer:
+            # Failures are reported, and retried, per queued job
+            self._sync_batch(transfer_id, failed_files)
+            self.journal.remove(transfer_id)
+            for member_id in transfer['members']:
+                member = self.transfers.get(member_id)
+                if member and member.get('batch') == transfer_id and member['status'] == 'failed':
+                    self._schedule_retry(member_id, 1)
+            return
+
+        self.journal.mark_failed(transfer_id, failed_files, other_errors)
+        if failed_files:
+            self._schedule_retry(transfer_id, len(failed_files))
+
+    def _schedule_retry(self, transfer_id: str, failed_count: int):
+        """Retry a failed job automatically if configured, with exponential backoff"""
+        if not self.config or not self.config.get('auto_retry_failed', False):
+            return
+        transfer = self.transfers[transfer_id]
+        attempt = transfer.get('attempt', 0)
+        if attempt >= self.config.get('max_failed_retries', 3):
+            return
+
+        # Exponential backoff between automatic retries
+        delay = self.config.get('retry_backoff', 30) * (2 ** attempt)
+        transfer['retry_at'] = time.time() + delay
+        print(f"Retrying {failed_count} failed file(s) of {transfer_id} in {delay}s")
+        QTimer.singleShot(int(delay * 1000), lambda: self.retry_failed(transfer_id))
+
+    def retry_failed(self, transfer_id: str) -> Optional[str]:
+        """Re-run only the files that failed in a transfer; returns the new transfer id"""
+        transfer = self.transfers.get(transfer_id)
+        if not transfer or transfer['status'] != 'failed':
+            return None
+        if transfer.get('batch'):
+            # A queued single-file copy goes back into the queue
+            retry_id = self.enqueue_copy(transfer['source'], transfer['dest'], transfer['flags'],
+                                         attempt=transfer.get('attempt', 0) + 1)
+            transfer['status'] = 'retried'
+            transfer.pop('retry_at', None)
+            return retry_id
+        failed_files = self.journal.read_file_list(self.journal.failed_path(transfer_id))
+        if not failed_files:
+            return None
+
+        # Drop any file list from an earlier retry before adding the new one
+        flags = []
+        skip_next = False
+        for flag in transfer.get('flags', []):
+            if skip_next:
+                skip_next = False
+            elif flag == '--files-from':
+                skip_next = True
+            elif flag != '--no-traverse' and not flag.startswith('--files-from='):
+                flags.append(flag)
+
+        retry_id = self.new_transfer_id(transfer['type'])
+        files_path = self.journal.files_path(retry_id)
+        self.journal.write_file_list(files_path, failed_files)
+        flags.extend(['--files-from', str(files_path), '--no-traverse'])
+
+        # Only copy the listed files; deletions are left to the next full sync
+        info = {key: transfer[key] for key in TRANSFER_INFO_KEYS if key in transfer}
+        self._start_transfer('copy', transfer['source'], transfer['dest'], flags,
+                             transfer_id=retry_id, attempt=transfer.get('attempt', 0) + 1,
+                             info=info)
+        transfer['status'] = 'retried'
+        transfer.pop('retry_at', None)
+        self.journal.remove(transfer_id)
+        return retry_id
+
+    def cleanup(self, deadline: Optional[float] = None) -> UnmountReport:
+        """Clean up all mounts and transfers within one overall deadline"""
+        if deadline is None:
+            deadline = self.config.get('shutdown_timeout', 10.0) if self.config else 10.0
+        end = time.monotonic() + deadline
+        self.health.stop()
+        self.disk_guard.stop()
+        self.scheduler.stop()
+        self.watches.stop()
+        self.indexer.stop()
+        self.pins.stop()
+        serving = self.serve.stop()  # Restarted from serve.json on the next start
+        self.coalesce_timer.stop()  # Queued copies stay journaled for the next start
+        self._shutting_down = True
+
+        # Ask every transfer to stop at once rather than waiting on each in turn
+        running = []
+        for transfer_id, transfer in self.transfers.items():
+            process = transfer['process']
+            if process.state() != QProcess.ProcessState.NotRunning:
+                self._request_cancel(transfer_id)
+                running.append((transfer_id, process))
+
+        # Unmount everything concurrently while the transfers wind down
+        report = self.unmount_all(deadline=deadline)
+
+        for transfer_id, process in running:
+            remaining_ms = int((end - time.monotonic()) * 1000)
+            if remaining_ms <= 0 or not process.waitForFinished(remaining_ms):
+                process.kill()
+                report.transfers_killed.append(transfer_id)
+
+        # Servers were asked to stop first and had the same deadline to exit
+        for process in serving:
+            remaining_ms = int((end - time.monotonic()) * 1000)
+            if process.state() != QProcess.ProcessState.NotRunning and \
+                    (remaining_ms <= 0 or not process.waitForFinished(remaining_ms)):
+                process.kill()
+
+        # Nothing runs the journal's save timer after this
+        self.journal.flush()
+
+        if report.summary():
+            print(f"Shutdown left behind:\n{report.summary()}")
+        return report
@@ -0,0 +1,231 @@
+"""Shared command runner with timeouts, concurrency limits and result caching"""
+
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+# Default timeout (seconds) for a command that has no entry below
+DEFAULT_TIMEOUT = 30
+
+# Per-command timeouts, keyed by rclone subcommand or program name; 'config'
+# also covers 'config show' and the other config subcommands
+COMMAND_TIMEOUTS = {
+    'version': 10,
+    'listremotes': 10,
+    'config': 10,
+    'about': 60,
+    'findmnt': 5,
+    'pgrep': 5,
+    'fusermount': 10,
+}
+
+# Per-command cache lifetimes (seconds); commands not listed are never cached.
+# Only config subcommands that read are listed, so edits are never replayed.
+COMMAND_TTLS = {
+    'version': 3600,
+    'listremotes': 10,
+    'config show': 30,
+    'config dump': 30,
+    'config file': 300,
+    'config providers': 3600,
+    'about': 300,
+}
+
+
+class _Dispatcher(QObject):
+    """Delivers results from worker threads to callbacks on the GUI thread"""
+    deliver = pyqtSignal(object, object, object)  # Callback, result, error
+
+    def __init__(self):
+        super().__init__()
+        self.deliver.connect(self._on_deliver)
+
+    @pyqtSlot(object, object, object)
+    def _on_deliver(self, callback, result, error):
+        try:
+            callback(result, error)
+        except Exception as e:
+            print(f"Error in command callback: {e}")
+
+
+class CommandRunner:
+    """Runs external commands off the GUI thread.
+
+    Every command is bounded by a timeout, at most ``max_rclone`` rclone
+    processes run at once, identical commands already in flight share one
+    process, and successful results are cached for a per-command TTL.
+    Long tasks (indexing, scans, benchmarks) get a pool of ``max_long``
+    threads of their own, so they never hold up short commands.
+    """
+
+    def __init__(self, max_workers: int = 16, max_rclone: int = 4, max_long: int = 4,
+                 default_timeout: float = DEFAULT_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='rclonetray-cmd')
+        self._long_executor = ThreadPoolExecutor(max_workers=max_long,
+                                                 thread_name_prefix='rclonetray-long')
+        self._rclone_slots = threading.BoundedSemaphore(max_rclone)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, ...], Future] = {}
+        self._cache: Dict[Tuple[str, ...], Tuple[float, subprocess.CompletedProcess]] = {}
+        self._dispatcher = _Dispatcher()
+
+    @staticmethod
+    def _command_name(args: Sequence[str]) -> str:
+        """Name used to look up timeouts and TTLs for a command, e.g. 'about' or 'config show'"""
+        program = os.path.basename(args[0])
+        if program == 'rclone' and len(args) > 1:
+            if args[1] == 'config' and len(args) > 2 and not args[2].startswith('-'):
+                return f"config {args[2]}"
+            return args[1]
+        return program
+
+    def _timeout_for(self, args: Sequence[str], timeout: Optional[float]) -> float:
+        if timeout is not None:
+            return timeout
+        name = self._command_name(args)
+        return COMMAND_TIMEOUTS.get(name, COMMAND_TIMEOUTS.get(name.split()[0], self.default_timeout))
+
+    def _ttl_for(self, args: Sequence[str], ttl: Optional[float]) -> float:
+        if ttl is not None:
+            return ttl
+        return COMMAND_TTLS.get(self._command_name(args), 0)
+
+    def _lookup(self, key: Tuple[str, ...], ttl: float) -> Optional[subprocess.CompletedProcess]:
+        """Return a cached result if it is still fresh"""
+        if ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+        return None
+
+    def _claim(self, key: Tuple[str, ...]) -> Tuple[Future, bool]:
+        """Return the in-flight future for a command, creating it if needed"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _execute(self, key: Tuple[str, ...], args: Sequence[str], timeout: float,
+                 ttl: float, future: Future):
+        """Run the command and resolve its future"""
+        is_rclone = os.path.basename(args[0]) == 'rclone'
+        try:
+            if is_rclone:
+                self._rclone_slots.acquire()
+            try:
+                result = subprocess.run(list(args), capture_output=True, text=True,
+                                        timeout=timeout)
+            finally:
+                if is_rclone:
+                    self._rclone_slots.release()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if ttl > 0 and result.returncode == 0:
+                self._cache[key] = (time.monotonic() + ttl, result)
+        future.set_result(result)
+
+    def submit(self, args: Sequence[str], timeout: Optional[float] = None,
+               ttl: Optional[float] = None) -> Future:
+        """Start a command in the background and return a future for its result"""
+        key = tuple(args)
+        ttl = self._ttl_for(args, ttl)
+        cached = self._lookup(key, ttl)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        future, owner = self._claim(key)
+        if owner:
+            self._executor.submit(self._execute, key, args,
+                                  self._timeout_for(args, timeout), ttl, future)
+        return future
+
+    def run(self, args: Sequence[str], timeout: Optional[float] = None,
+            ttl: Optional[float] = None, check: bool = False) -> subprocess.CompletedProcess:
+        """Run a command and wait for it.
+
+        Raises subprocess.TimeoutExpired when the command overruns its timeout
+        and subprocess.CalledProcessError on a non-zero exit if ``check`` is set.
+        """
+        key = tuple(args)
+        ttl = self._ttl_for(args, ttl)
+        result = self._lookup(key, ttl)
+        if result is None:
+            future, owner = self._claim(key)
+            if owner:
+                # Run inline so callers on worker threads cannot starve the pool
+                self._execute(key, args, self._timeout_for(args, timeout), ttl, future)
+            result = future.result()
+
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, list(args),
+                                                result.stdout, result.stderr)
+        return result
+
+    def run_async(self, args: Sequence[str], callback: Callable[[Any, Any], None],
+                  timeout: Optional[float] = None, ttl: Optional[float] = None):
+        """Run a command and call ``callback(result, error)`` on the GUI thread"""
+        future = self.submit(args, timeout, ttl)
+        future.add_done_callback(lambda f: self._deliver(f, callback))
+
+    def run_in_background(self, fn: Callable, callback: Optional[Callable[[Any, Any], None]] = None,
+                          *args, **kwargs) -> Future:
+        """Run ``fn`` on a worker thread, optionally reporting back on the GUI thread"""
+        future = self._executor.submit(fn, *args, **kwargs)
+        if callback:
+            future.add_done_callback(lambda f: self._deliver(f, callback))
+        return future
+
+    def run_long(self, fn: Callable, callback: Optional[Callable[[Any, Any], None]] = None,
+                 *args, **kwargs) -> Future:
+        """Like run_in_background, for tasks that may take minutes or hours"""
+        future = self._long_executor.submit(fn, *args, **kwargs)
+        if callback:
+            future.add_done_callback(lambda f: self._deliver(f, callback))
+        return future
+
+    def _deliver(self, future: Future, callback: Callable[[Any, Any], None]):
+        error = future.exception()
+        result = None if error else future.result()
+        self._dispatcher.deliver.emit(callback, result, error)
+
+    def invalidate(self, *prefix: str):
+        """Drop cached results for commands starting with ``prefix`` (all if empty)"""
+        with self._lock:
+            for key in list(self._cache):
+                if key[:len(prefix)] == prefix:
+                    del self._cache[key]
+
+    def shutdown(self):
+        """Stop accepting work; queued and running commands are left to finish"""
+        self._executor.shutdown(wait=False)
+        self._long_executor.shutdown(wait=False)
+
+
+_runner: Optional[CommandRunner] = None
+
+
+def get_runner() -> CommandRunner:
+    """Return the shared runner, creating it on first use (from the GUI thread)"""
+    global _runner
+    if _runner is None:
+        _runner = CommandRunner()
+    return _runner
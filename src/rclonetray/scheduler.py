@@ -0,0 +1,264 @@
+"""Scheduled recurring transfers"""
+
+import json
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .jobs import write_json_atomic
+
+# Shorthands accepted in place of a cron expression
+CRON_MACROS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+}
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Transfer states during which a scheduled job must not be started again
+ACTIVE_STATES = ('starting', 'running', 'paused', 'cancelling')
+
+def _parse_cron_field(text: str, low: int, high: int) -> Set[int]:
+    """Parse one cron field (lists, ranges and steps) into the values it matches"""
+    values = set()
+    for part in text.split(','):
+        base, _, step_text = part.partition('/')
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in '{part}'")
+
+        if base == '*':
+            start, end = low, high
+        elif '-' in base:
+            start_text, end_text = base.split('-', 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(base)
+            end = high if step_text else start
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"'{part}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = CRON_MACROS.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 fields in cron expression '{expression}'")
+
+        self.minutes = sorted(_parse_cron_field(fields[0], 0, 59))
+        self.hours = sorted(_parse_cron_field(fields[1], 0, 23))
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        # Both 0 and 7 mean Sunday
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = day.isoweekday() % 7 in self.weekdays
+        # As in cron, a restricted day-of-month and day-of-week match either
+        if self.days_restricted and self.weekdays_restricted:
+            return dom or dow
+        if self.days_restricted:
+            return dom
+        if self.weekdays_restricted:
+            return dow
+        return True
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after``"""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 8):  # Covers Feb 29 with a weekday restriction
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __str__(self):
+        return self.expression
+
+class IntervalSchedule:
+    """Fixed interval, written as 'every 30m' (units s, m, h, d)"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        match = re.fullmatch(r'@?every\s+(\d+)\s*([smhd]?)', expression.strip())
+        if not match:
+            raise ValueError(f"Invalid interval '{expression}'")
+        self.seconds = int(match.group(1)) * INTERVAL_UNITS[match.group(2) or 's']
+        if self.seconds <= 0:
+            raise ValueError("Interval must be positive")
+
+    def next_after(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return self.expression
+
+def parse_schedule(expression: str):
+    """Parse a cron expression or an 'every <n><unit>' interval"""
+    if re.match(r'@?every\b', expression.strip()):
+        return IntervalSchedule(expression)
+    return CronSchedule(expression)
+
+class Scheduler(QObject):
+    """Starts persisted sync/copy jobs on their schedules.
+
+    Runs missed while the tray was not running are caught up once at
+    startup, starts are spread by a random jitter, and a job is never
+    started while its previous run is still active.
+    """
+    schedules_changed = pyqtSignal()
+
+    def __init__(self, rclone_manager, path: Path, tick: int = 30):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.path = Path(path)
+        self.schedules: Dict[str, Dict[str, Any]] = self._load()
+        self._pending: Set[str] = set()  # Waiting out their jitter
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.setInterval(tick * 1000)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading schedules {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self.schedules)
+        except OSError as e:
+            print(f"Error writing schedules {self.path}: {e}")
+        self.schedules_changed.emit()
+
+    def start(self):
+        """Catch up on missed runs and start checking"""
+        now = datetime.now()
+        for schedule_id, job in self.schedules.items():
+            if not job.get('enabled', True) or job.get('next_run') is None:
+                continue
+            if job['next_run'] < now.timestamp() and not job.get('catch_up', True):
+                # Missed while not running, and the job does not want a catch-up run
+                job['next_run'] = self._next_run(job, now)
+        self._save()
+        self.timer.start()
+        self.check()
+
+    def stop(self):
+        self.timer.stop()
+
+    def _next_run(self, job: Dict[str, Any], after: datetime) -> float:
+        return parse_schedule(job['schedule']).next_after(after).timestamp()
+
+    def add(self, name: str, transfer_type: str, source: str, dest: str, schedule: str,
+            flags: Optional[list] = None, jitter: int = 60, catch_up: bool = True) -> str:
+        """Add a schedule; raises ValueError for an invalid schedule expression"""
+        parse_schedule(schedule)
+        schedule_id = uuid.uuid4().hex[:8]
+        job = {
+            'name': name,
+            'type': transfer_type,
+            'source': source,
+            'dest': dest,
+            'flags': list(flags or []),
+            'schedule': schedule,
+            'jitter': jitter,
+            'catch_up': catch_up,
+            'enabled': True,
+            'last_run': None,
+            'transfer_id': None,
+        }
+        job['next_run'] = self._next_run(job, datetime.now())
+        self.schedules[schedule_id] = job
+        self._save()
+        return schedule_id
+
+    def remove(self, schedule_id: str):
+        if self.schedules.pop(schedule_id, None) is not None:
+            self._save()
+
+    def set_enabled(self, schedule_id: str, enabled: bool):
+        job = self.schedules.get(schedule_id)
+        if job:
+            job['enabled'] = enabled
+            if enabled:
+                job['next_run'] = self._next_run(job, datetime.now())
+            self._save()
+
+    def is_running(self, schedule_id: str) -> bool:
+        """Whether the last run of a schedule is still active"""
+        job = self.schedules.get(schedule_id, {})
+        transfer = self.rclone.transfers.get(job.get('transfer_id'))
+        return bool(transfer) and transfer['status'] in ACTIVE_STATES
+
+    def check(self):
+        """Start every job that is due"""
+        now = datetime.now()
+        changed = False
+        for schedule_id, job in self.schedules.items():
+            if not job.get('enabled', True) or schedule_id in self._pending:
+                continue
+            if job.get('next_run') is None or job['next_run'] > now.timestamp():
+                continue
+
+            # Due now; the next slot is computed from now so a backlog runs only once
+            job['next_run'] = self._next_run(job, now)
+            changed = True
+            if self.is_running(schedule_id):
+                print(f"Skipping scheduled job '{job['name']}': previous run still active")
+                continue
+
+            self._pending.add(schedule_id)
+            delay = random.uniform(0, job.get('jitter', 0))
+            QTimer.singleShot(int(delay * 1000), lambda sid=schedule_id: self.run_now(sid))
+        # Most ticks find nothing due; only a moved next_run needs writing
+        if changed:
+            self._save()
+
+    def run_now(self, schedule_id: str) -> Optional[str]:
+        """Start a scheduled job immediately unless its last run is still active"""
+        self._pending.discard(schedule_id)
+        job = self.schedules.get(schedule_id)
+        if not job or self.is_running(schedule_id):
+            return None
+        try:
+            transfer_id = self.rclone.start_transfer(
+                job['type'], job['source'], job['dest'], job.get('flags'),
+                schedule=job['name']
+            )
+        except Exception as e:
+            print(f"Failed to start scheduled job '{job['name']}': {e}")
+            return None
+        job['transfer_id'] = transfer_id
+        job['last_run'] = time.time()
+        self._save()
+        return transfer_id
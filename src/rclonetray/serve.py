@@ -0,0 +1,277 @@
+"""Remotes served over NFS, WebDAV, SFTP or HTTP on localhost, as an alternative to FUSE mounts"""
+
+import json
+import secrets
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from PyQt6.QtCore import QObject, QProcess, QProcessEnvironment, QTimer, pyqtSignal
+from .jobs import write_json_atomic
+from .prewarm import free_port
+
+PROTOCOLS = ('nfs', 'webdav', 'sftp', 'http')
+
+# Protocols that check a user and password (rclone serve nfs has no authentication)
+AUTH_PROTOCOLS = ('webdav', 'sftp', 'http')
+
+# Seconds a new server gets to start accepting connections
+READY_TIMEOUT = 15
+
+# Restarts after unexpected exits before giving up; the delay doubles each time
+MAX_RESTARTS = 5
+RESTART_DELAY = 2
+
+# Seconds of uptime after which earlier crashes are forgotten
+STABLE_AFTER = 60
+
+# Seconds a server asked to stop gets before it is killed
+STOP_TIMEOUT = 5
+
+def port_open(port: int) -> bool:
+    """Whether something accepts connections on a local port"""
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+class ServeEndpoint(QObject):
+    """One supervised ``rclone serve`` process, restarted if it dies"""
+    state_changed = pyqtSignal()
+
+    def __init__(self, serve_id: str, remote: str, protocol: str, port: int,
+                 user: str = '', password: str = '', log_path: Optional[Path] = None):
+        super().__init__()
+        self.serve_id = serve_id
+        self.log_path = log_path
+        self.remote = remote
+        self.protocol = protocol
+        self.port = port
+        self.user = user
+        self.password = password
+        self.status = 'stopped'  # starting, running, restarting, failed, stopping or stopped
+        self.error = ''
+        self.restarts = 0
+        self.started_at = 0.0
+        self.process: Optional[QProcess] = None
+        self._stopping = False
+
+        self.ready_timer = QTimer(self)
+        self.ready_timer.setInterval(500)
+        self.ready_timer.timeout.connect(self._check_ready)
+        self.restart_timer = QTimer(self)
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self.start)
+        self.kill_timer = QTimer(self)
+        self.kill_timer.setSingleShot(True)
+        self.kill_timer.timeout.connect(self._kill)
+
+    @property
+    def address(self) -> str:
+        """How a client reaches the server"""
+        if self.protocol == 'nfs':
+            return f"127.0.0.1:/ (mount -t nfs -o port={self.port},mountport={self.port},tcp)"
+        if self.protocol == 'sftp':
+            return f"sftp://{self.user}@127.0.0.1:{self.port}/"
+        return f"http://127.0.0.1:{self.port}/"
+
+    def start(self):
+        """Start rclone serve; the port is kept so clients can reconnect"""
+        self._stopping = False
+        if port_open(self.port):
+            # Someone else took the port while we were stopped
+            self.port = free_port()
+
+        args = ['serve', self.protocol, f'{self.remote}:', '--addr', f'127.0.0.1:{self.port}']
+        if self.protocol != 'http':
+            # Writes through NFS, WebDAV and SFTP need the VFS cache
+            args.extend(['--vfs-cache-mode', 'full'])
+
+        self.kill_timer.stop()
+        self.process = QProcess(self)
+        self.process.setProgram('rclone')
+        self.process.setArguments(args)
+        if self.protocol in AUTH_PROTOCOLS:
+            # Credentials go through the environment so they don't show up in ps
+            env = QProcessEnvironment.systemEnvironment()
+            env.insert('RCLONE_USER', self.user)
+            env.insert('RCLONE_PASS', self.password)
+            self.process.setProcessEnvironment(env)
+        if self.log_path:
+            # Written to a file so a long-running server can't fill a pipe
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self.process.setStandardErrorFile(str(self.log_path))
+        self.process.setStandardOutputFile(QProcess.nullDevice())
+        process = self.process
+        self.process.finished.connect(
+            lambda exit_code, exit_status: self._on_finished(process, exit_code, exit_status))
+        print(f"Starting rclone {' '.join(args)}")
+
+        self.status = 'starting'
+        self.started_at = time.monotonic()
+        self.process.start()
+        self.ready_timer.start()
+        self.state_changed.emit()
+
+    def stop(self):
+        """Ask the server to exit without waiting; it is killed after STOP_TIMEOUT"""
+        self._stopping = True
+        self.ready_timer.stop()
+        self.restart_timer.stop()
+        if self.process and self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.terminate()
+            self.kill_timer.start(STOP_TIMEOUT * 1000)
+            self.status = 'stopping'
+        else:
+            self.status = 'stopped'
+        self.state_changed.emit()
+
+    def _kill(self):
+        if self.process and self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.kill()
+
+    def _check_ready(self):
+        if self.status != 'starting':
+            self.ready_timer.stop()
+            return
+        if port_open(self.port):
+            self.ready_timer.stop()
+            self.status = 'running'
+            self.state_changed.emit()
+        elif time.monotonic() - self.started_at > READY_TIMEOUT:
+            self.ready_timer.stop()
+            self.error = f"Not listening after {READY_TIMEOUT} s"
+            self.process.kill()
+
+    def _on_finished(self, process: QProcess, exit_code, exit_status):
+        # Each start creates a new process; finished ones are not kept around
+        process.deleteLater()
+        if process is not self.process:
+            return
+        self.process = None
+        self.ready_timer.stop()
+        self.kill_timer.stop()
+        if self._stopping:
+            self.status = 'stopped'
+            self.state_changed.emit()
+            return
+        output = ''
+        if self.log_path:
+            try:
+                with open(self.log_path, errors='replace') as f:
+                    output = f.read()[-4096:].strip()
+            except OSError:
+                pass
+        if output:
+            self.error = output.splitlines()[-1]
+        elif not self.error:
+            self.error = f"rclone exited with code {exit_code}"
+        print(f"rclone serve {self.protocol} {self.remote}: stopped unexpectedly: {self.error}")
+
+        if time.monotonic() - self.started_at > STABLE_AFTER:
+            self.restarts = 0
+        if self.restarts >= MAX_RESTARTS:
+            self.status = 'failed'
+        else:
+            self.status = 'restarting'
+            self.restart_timer.start(RESTART_DELAY * 2 ** self.restarts * 1000)
+            self.restarts += 1
+        self.state_changed.emit()
+
+class ServeManager(QObject):
+    """Owns the served endpoints and keeps their definitions on disk"""
+    endpoints_changed = pyqtSignal()
+
+    def __init__(self, path: Path, log_dir: Path):
+        super().__init__()
+        self.path = Path(path)
+        self.log_dir = Path(log_dir)
+        self.endpoints: Dict[str, ServeEndpoint] = {}
+        self.stopping: Dict[str, ServeEndpoint] = {}  # Removed, kept until their process exits
+        self.definitions: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading served endpoints {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            # The file holds the endpoint passwords
+            write_json_atomic(self.path, self.definitions, mode=0o600)
+        except OSError as e:
+            print(f"Error writing served endpoints {self.path}: {e}")
+
+    def start(self):
+        """Start every saved endpoint"""
+        for serve_id, definition in self.definitions.items():
+            self._start(serve_id, definition)
+
+    def _start(self, serve_id: str, definition: Dict[str, Any]) -> ServeEndpoint:
+        endpoint = ServeEndpoint(serve_id, definition['remote'], definition['protocol'],
+                                 definition['port'], definition.get('user', ''),
+                                 definition.get('password', ''),
+                                 self.log_dir / f"serve_{serve_id}.log")
+        endpoint.state_changed.connect(lambda: self._on_state_changed(serve_id))
+        self.endpoints[serve_id] = endpoint
+        endpoint.start()
+        return endpoint
+
+    def _on_state_changed(self, serve_id: str):
+        stopping = self.stopping.get(serve_id)
+        if stopping and stopping.status == 'stopped':
+            del self.stopping[serve_id]
+            stopping.deleteLater()
+        # Keep a port picked on restart, so the address stays the same next time
+        endpoint = self.endpoints.get(serve_id)
+        definition = self.definitions.get(serve_id)
+        if endpoint and definition and definition['port'] != endpoint.port:
+            definition['port'] = endpoint.port
+            self._save()
+        self.endpoints_changed.emit()
+
+    def add(self, remote: str, protocol: str) -> ServeEndpoint:
+        """Serve a remote over ``protocol`` on a free local port"""
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {protocol}")
+        for endpoint in self.endpoints.values():
+            if endpoint.remote == remote and endpoint.protocol == protocol:
+                return endpoint
+        serve_id = uuid.uuid4().hex[:8]
+        definition = {'remote': remote, 'protocol': protocol, 'port': free_port()}
+        if protocol in AUTH_PROTOCOLS:
+            definition.update(user='rclonetray', password=secrets.token_urlsafe(16))
+        endpoint = self._start(serve_id, definition)
+        self.definitions[serve_id] = definition
+        self._save()
+        self.endpoints_changed.emit()
+        return endpoint
+
+    def remove(self, serve_id: str):
+        """Stop serving an endpoint; its process exits in the background"""
+        endpoint = self.endpoints.pop(serve_id, None)
+        if endpoint:
+            self.stopping[serve_id] = endpoint
+            endpoint.stop()
+        if self.definitions.pop(serve_id, None) is not None:
+            self._save()
+        self.endpoints_changed.emit()
+
+    def stop(self) -> List[QProcess]:
+        """Ask all endpoints to stop, keeping their definitions for the next start.
+
+        Returns the processes still running, for the caller to wait on
+        within its own deadline.
+        """
+        for serve_id, endpoint in self.endpoints.items():
+            self.stopping[serve_id] = endpoint
+            endpoint.stop()
+        self.endpoints.clear()
+        return [endpoint.process for endpoint in self.stopping.values() if endpoint.process]
@@ -0,0 +1,58 @@
+"""Detects transfers the storage provider can do itself, without the data passing through this machine"""
+
+from typing import Any, Dict, Optional
+
+# Backends that copy objects within the provider (the Copy feature in rclone)
+SERVER_SIDE_BACKENDS = ('s3', 'b2', 'google cloud storage', 'drive', 'azureblob', 'swift',
+                        'dropbox', 'onedrive', 'box', 'pcloud', 'jottacloud', 'oracleobjectstorage',
+                        'qingstor', 'koofr', 'opendrive', 'putio', 'seafile', 'sharefile')
+
+# Config keys that identify the account behind a remote. Two remotes of one
+# type with the same values can copy between each other server-side; for
+# backends not listed here the account cannot be told from the config.
+ACCOUNT_KEYS = {
+    's3': ('provider', 'endpoint', 'access_key_id', 'env_auth'),
+    'b2': ('account',),
+    'google cloud storage': ('project_number', 'service_account_file'),
+    'drive': ('service_account_file',),
+    'azureblob': ('account',),
+    'swift': ('auth', 'user', 'tenant'),
+    'oracleobjectstorage': ('namespace', 'compartment'),
+}
+
+SAME_REMOTE = 'same remote'
+ACROSS_CONFIGS = 'across configs'
+
+def remote_name(path: str) -> Optional[str]:
+    """Remote part of 'remote:path', None for local paths"""
+    if ':' in path and not path.startswith('/'):
+        return path.partition(':')[0]
+    return None
+
+def server_side_mode(source: str, dest: str, configs: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """How a transfer from ``source`` to ``dest`` can stay on the provider.
+
+    ``configs`` is the output of ``rclone config dump``. Returns SAME_REMOTE
+    when rclone copies server-side on its own, ACROSS_CONFIGS when it needs
+    ``--server-side-across-configs``, and None when data has to be
+    downloaded and uploaded again.
+    """
+    source_remote, dest_remote = remote_name(source), remote_name(dest)
+    if source_remote is None or dest_remote is None:
+        return None
+    source_config = configs.get(source_remote) or {}
+    dest_config = configs.get(dest_remote) or {}
+    backend = source_config.get('type')
+    if backend not in SERVER_SIDE_BACKENDS:
+        return None
+    if source_remote == dest_remote:
+        return SAME_REMOTE
+    if dest_config.get('type') != backend or backend not in ACCOUNT_KEYS:
+        return None
+
+    values = [(source_config.get(key) or '', dest_config.get(key) or '') for key in ACCOUNT_KEYS[backend]]
+    # The account has to be identified by at least one setting, and match on all
+    if any(source_value for source_value, _ in values) and \
+            all(source_value == dest_value for source_value, dest_value in values):
+        return ACROSS_CONFIGS
+    return None
@@ -0,0 +1,246 @@
+"""Throughput and latency test of a remote with synthetic data"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from .benchmark import percentile
+from .jobs import write_json_atomic
+from .runner import get_runner
+
+DEFAULT_SIZES = [1, 16]  # MB per file
+DEFAULT_CONCURRENCY = [1, 4, 8]  # --transfers values tried
+
+# Tiny files copied one at a time to measure per-file latency
+LATENCY_FILES = 20
+LATENCY_FILE_SIZE = 1024
+
+# Seconds one copy of the test data may take
+RUN_TIMEOUT = 600
+
+# Lowest concurrency reaching this share of the best throughput is recommended
+GOOD_ENOUGH = 0.9
+
+# Tests kept per remote
+HISTORY_SIZE = 20
+
+# Error of a test stopped before it finished
+CANCELLED = 'cancelled'
+
+# Folder on the remote the test data goes to, removed afterwards
+TEST_DIR = '.rclonetray-speedtest'
+
+# rclone logs nanosecond timestamps; datetime takes microseconds
+NANOSECONDS = re.compile(r'(\.\d{6})\d+')
+
+class SpeedTestResult:
+    """Throughput per file size and concurrency, and per-file latency, of one test"""
+
+    def __init__(self, remote: str):
+        self.remote = remote
+        self.tested_at = time.time()
+        self.samples: List[Dict[str, float]] = []  # direction, size_mb, concurrency, seconds, mbps
+        self.latency: Dict[str, Dict[str, float]] = {}  # Direction -> p50/p90/p99 in ms
+        self.error = ''
+
+    def to_dict(self) -> dict:
+        return {'remote': self.remote, 'tested_at': self.tested_at, 'samples': self.samples,
+                'latency': self.latency, 'error': self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SpeedTestResult':
+        result = cls(data.get('remote', ''))
+        result.tested_at = data.get('tested_at', 0)
+        result.samples = data.get('samples', [])
+        result.latency = data.get('latency', {})
+        result.error = data.get('error', '')
+        return result
+
+    def best_mbps(self, direction: str) -> Optional[float]:
+        rates = [sample['mbps'] for sample in self.samples if sample['direction'] == direction]
+        return max(rates) if rates else None
+
+    def best_concurrency(self, direction: str) -> Optional[int]:
+        """Fewest parallel transfers that get close to the best throughput"""
+        by_concurrency: Dict[int, List[float]] = {}
+        for sample in self.samples:
+            if sample['direction'] == direction:
+                by_concurrency.setdefault(int(sample['concurrency']), []).append(sample['mbps'])
+        if not by_concurrency:
+            return None
+        averages = {c: sum(rates) / len(rates) for c, rates in by_concurrency.items()}
+        best = max(averages.values())
+        return min(c for c, rate in averages.items() if rate >= best * GOOD_ENOUGH)
+
+    def describe(self) -> str:
+        lines = []
+        for direction in ('upload', 'download'):
+            best = self.best_mbps(direction)
+            if best is not None:
+                lines.append(f"{direction.title()}: up to {best:.1f} MB/s, "
+                             f"{self.best_concurrency(direction)} transfers recommended")
+            latency = self.latency.get(direction)
+            if latency:
+                lines.append(f"{direction.title()} latency per file: p50 {latency['p50']:.0f} ms, "
+                             f"p90 {latency['p90']:.0f} ms, p99 {latency['p99']:.0f} ms")
+        if self.error == CANCELLED:
+            lines.append("Stopped before all runs finished")
+        elif self.error:
+            lines.append(f"Failed: {self.error}")
+        return "\n".join(lines)
+
+class SpeedTestHistory:
+    """Past speed tests per remote, kept in a JSON file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.tests: Dict[str, List[dict]] = self._load()
+
+    def _load(self) -> Dict[str, List[dict]]:
+        try:
+            with open(self.path) as f:
+                tests = json.load(f)
+            return tests if isinstance(tests, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading speed test history {self.path}: {e}")
+            return {}
+
+    def results(self, remote: str) -> List[SpeedTestResult]:
+        """Tests of a remote, oldest first"""
+        with self._lock:
+            return [SpeedTestResult.from_dict(data) for data in self.tests.get(remote, [])]
+
+    def add(self, result: SpeedTestResult):
+        with self._lock:
+            tests = self.tests.get(result.remote, []) + [result.to_dict()]
+            self.tests[result.remote] = tests[-HISTORY_SIZE:]
+            try:
+                write_json_atomic(self.path, self.tests)
+            except OSError as e:
+                print(f"Error writing speed test history {self.path}: {e}")
+
+def _rclone(rclone: str, args: List[str]):
+    result = get_runner().run([rclone] + args, timeout=RUN_TIMEOUT)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"rclone {args[0]} exited with code {result.returncode}")
+
+def _write_files(folder: Path, count: int, size: int) -> List[str]:
+    """Files of random data, so compression on the way cannot flatter the result"""
+    folder.mkdir(parents=True, exist_ok=True)
+    names = []
+    for i in range(count):
+        name = f"file_{i:04d}.bin"
+        with open(folder / name, 'wb') as f:
+            remaining = size
+            while remaining > 0:
+                remaining -= f.write(os.urandom(min(remaining, 1024 * 1024)))
+        names.append(name)
+    return names
+
+def _completion_gaps(log_path: Path) -> List[float]:
+    """Milliseconds between consecutive files finishing, from a JSON log"""
+    times = []
+    try:
+        with open(log_path, errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not entry.get('msg', '').startswith('Copied') or 'time' not in entry:
+                    continue
+                try:
+                    stamp = NANOSECONDS.sub(r'\1', entry['time']).replace('Z', '+00:00')
+                    times.append(datetime.fromisoformat(stamp).timestamp())
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return []
+    times.sort()
+    return [(b - a) * 1000 for a, b in zip(times, times[1:])]
+
+def _latency(gaps: List[float]) -> Dict[str, float]:
+    return {'p50': round(percentile(gaps, 50), 1), 'p90': round(percentile(gaps, 90), 1),
+            'p99': round(percentile(gaps, 99), 1)}
+
+def run_speed_test(remote: str, sizes: Optional[List[int]] = None,
+                   concurrency: Optional[List[int]] = None, rclone: str = 'rclone',
+                   progress: Optional[Callable[[str], None]] = None,
+                   should_stop: Optional[Callable[[], bool]] = None) -> SpeedTestResult:
+    """Upload and download synthetic files to ``remote`` and time them.
+
+    For every size and concurrency, as many files as there are parallel
+    transfers are copied up and back down, so each run keeps all transfers
+    busy. Per-file latency comes from copying tiny files one at a time.
+    The timings include starting rclone, which matters little for all but
+    the smallest sizes. The test folder is removed from the remote afterwards.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    concurrency = sorted(set(concurrency or DEFAULT_CONCURRENCY))
+    result = SpeedTestResult(remote)
+    remote_dir = f"{remote}:{TEST_DIR}-{uuid.uuid4().hex[:8]}"
+    work = Path(tempfile.mkdtemp(prefix='rclonetray-speedtest-'))
+
+    def report(message):
+        if progress:
+            progress(message)
+
+    try:
+        report("Measuring latency...")
+        _write_files(work / 'latency', LATENCY_FILES, LATENCY_FILE_SIZE)
+        for direction, source, dest in (('upload', str(work / 'latency'), f"{remote_dir}/latency"),
+                                        ('download', f"{remote_dir}/latency", str(work / 'latency_down'))):
+            log_path = work / f"latency_{direction}.log"
+            _rclone(rclone, ['copy', source, dest, '--transfers', '1', '--checkers', '1',
+                             '-v', '--use-json-log', '--log-file', str(log_path)])
+            gaps = _completion_gaps(log_path)
+            if gaps:
+                result.latency[direction] = _latency(gaps)
+
+        for size in sizes:
+            names = _write_files(work / f"{size}M", max(concurrency), size * 1024 * 1024)
+            for transfers in concurrency:
+                if should_stop and should_stop():
+                    # Partial samples are kept for the history but tune nothing
+                    result.error = CANCELLED
+                    return result
+                files_from = work / f"{size}M_{transfers}.txt"
+                files_from.write_text("\n".join(names[:transfers]) + "\n")
+                target = f"{remote_dir}/{size}M_{transfers}"
+                down = work / f"down_{size}M_{transfers}"
+                megabytes = size * transfers
+                for direction, args in (
+                        ('upload', ['copy', str(work / f"{size}M"), target, '--files-from', str(files_from),
+                                    '--no-traverse']),
+                        ('download', ['copy', target, str(down)])):
+                    report(f"{direction.title()} of {transfers} x {size} MB...")
+                    start = time.monotonic()
+                    _rclone(rclone, args + ['--transfers', str(transfers), '--checkers', str(transfers)])
+                    seconds = time.monotonic() - start
+                    result.samples.append({'direction': direction, 'size_mb': size,
+                                           'concurrency': transfers, 'seconds': round(seconds, 3),
+                                           'mbps': round(megabytes / max(seconds, 1e-6), 2)})
+                shutil.rmtree(down, ignore_errors=True)
+            shutil.rmtree(work / f"{size}M", ignore_errors=True)
+    except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+        result.error = str(e)
+        print(f"Speed test of {remote} failed: {e}")
+    finally:
+        try:
+            get_runner().run([rclone, 'purge', remote_dir], timeout=RUN_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Error removing speed test data {remote_dir}: {e}")
+        shutil.rmtree(work, ignore_errors=True)
+    return result
@@ -1,13 +1,16 @@
 """System tray interface"""
 
 from pathlib import Path
-from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication
+from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication, QMessageBox
 from PyQt6.QtGui import QIcon, QCursor
-from PyQt6.QtCore import Qt, QObject
+from PyQt6.QtCore import Qt, QObject, QTimer
 from .rclone import RcloneManager
 from .dialogs import PreferencesDialog, AboutDialog, SettingsDialog, RcloneConfigDialog, DashboardDialog
 from .config import Config
 
+# Unfinished jobs named in the resume prompt; the rest are only counted
+MAX_LISTED_JOBS = 10
+
 class RcloneTray(QSystemTrayIcon):
     def __init__(self, app: QApplication):
         super().__init__()
@@ -16,6 +19,12 @@ class RcloneTray(QSystemTrayIcon):
         self.rclone = RcloneManager(self.config)
         self.init_ui()
 
+        # Disks about to fill up
+        self.rclone.disk_guard.warning.connect(self.show_disk_warning)
+
+        # Offer to pick up jobs from the last session once the event loop runs
+        QTimer.singleShot(0, self.offer_resume_jobs)
+
     def init_ui(self):
         # Set icon
         icon_path = str(Path(__file__).parent.parent / 'ui' / 'icons' / 'icon.png')
@@ -34,11 +43,13 @@ class RcloneTray(QSystemTrayIcon):
         self.show()
 
     def build_menu(self):
-        """Build the tray menu"""
+        """Build the tray menu once rclone has listed the remotes"""
+        self.rclone.list_remotes_async(self.fill_menu)
+
+    def fill_menu(self, remotes):
         self.menu.clear()
 
         # Add remotes
-        remotes = self.rclone.list_remotes()
         if remotes:
             for remote in remotes:
                 remote_menu = self.menu.addMenu(remote)
@@ -62,6 +73,45 @@ class RcloneTray(QSystemTrayIcon):
         self.rclone.mount(remote, str(mount_point))
         self.build_menu()
 
+    def offer_resume_jobs(self):
+        """Offer to relaunch transfers that did not finish last session, then start recurring jobs"""
+        try:
+            self.resume_jobs()
+        finally:
+            self.rclone.start_recurring()
+
+    def resume_jobs(self):
+        """Resume or discard last session's jobs, asking first unless auto_resume_jobs is set"""
+        jobs = self.rclone.unfinished_jobs()
+        if not jobs:
+            return
+
+        if not self.config.get('auto_resume_jobs', False):
+            details = "\n".join(f"{job['type']}: {job['source']} → {job['dest']}"
+                                for job in list(jobs.values())[:MAX_LISTED_JOBS])
+            if len(jobs) > MAX_LISTED_JOBS:
+                details += f"\n... and {len(jobs) - MAX_LISTED_JOBS} more"
+            reply = QMessageBox.question(
+                None,
+                "Resume Transfers?",
+                f"{len(jobs)} transfer(s) did not finish last time. Resume them?\n\n"
+                "Files that were already copied will be skipped.\n\n" + details,
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                self.rclone.discard_jobs(list(jobs))
+                return
+
+        resumed = self.rclone.resume_jobs(list(jobs))
+        if resumed:
+            self.showMessage('RcloneTray', f"Resumed {len(resumed)} transfer(s)")
+
+    def show_disk_warning(self, message: str):
+        """Notify about low disk space"""
+        print(message)
+        if self.config.get('show_notifications', True):
+            self.showMessage('RcloneTray', message, QSystemTrayIcon.MessageIcon.Warning)
+
     def show_settings(self):
         """Show settings dialog"""
         dialog = SettingsDialog(self.config)
@@ -72,6 +122,9 @@ class RcloneTray(QSystemTrayIcon):
         """Show rclone config dialog"""
         dialog = RcloneConfigDialog(self.config)
         if dialog.exec():
+            # Remotes may have been added or changed
+            self.rclone.runner.invalidate('rclone', 'listremotes')
+            self.rclone.runner.invalidate('rclone', 'config')
             self.build_menu()
             
     def show_dashboard(self):
@@ -97,5 +150,8 @@ class RcloneTray(QSystemTrayIcon):
 
     def quit_app(self):
         """Quit the application"""
-        self.rclone.cleanup()
+        report = self.rclone.cleanup()
+        if report.summary():
+            self.showMessage('RcloneTray', report.summary(), QSystemTrayIcon.MessageIcon.Warning)
+        self.rclone.runner.shutdown()
         self.app.quit()
@@ -0,0 +1,324 @@
+"""Watch mode: push local changes to a remote as they happen"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+from .jobs import write_json_atomic
+
+# inotify event bits (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# Transfer states during which a new push must wait
+ACTIVE_STATES = ('starting', 'running', 'paused', 'cancelling')
+
+class Inotify:
+    """Minimal non-blocking inotify wrapper on top of libc"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self.paths: Dict[int, str] = {}  # Watch descriptor -> directory
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"Cannot watch {path}: {os.strerror(err)}")
+        self.paths[wd] = path
+        return wd
+
+    def read_events(self):
+        """Return pending (directory, name, mask) events without blocking"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                directory = self.paths.get(wd, '')
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                events.append((directory, name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+        self.paths.clear()
+
+def walk_tree(top: str) -> Tuple[List[str], List[str]]:
+    """List the directories and files below ``top`` (worker side; big trees take a while)"""
+    directories, files = [], []
+    for dirpath, _, filenames in os.walk(top):
+        directories.append(dirpath)
+        files.extend(os.path.join(dirpath, name) for name in filenames)
+    return directories, files
+
+class WatchJob(QObject):
+    """Watches a local directory tree and copies changed files to ``dest``.
+
+    Changes are debounced and pushed in batches with --files-from and
+    --no-traverse, so neither side is walked. A periodic full run catches
+    anything inotify could not report (queue overflows, deletions).
+    """
+    state_changed = pyqtSignal()
+
+    def __init__(self, rclone_manager, watch_id: str, source: str, dest: str,
+                 flags: Optional[List[str]] = None, full_mode: str = 'copy',
+                 debounce: float = 1.0, full_interval: int = 3600):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.watch_id = watch_id
+        self.source = os.path.abspath(os.path.expanduser(source))
+        self.dest = dest
+        self.flags = list(flags or [])
+        self.full_mode = full_mode  # 'copy', or 'sync' to also propagate deletions
+        self.changed: Set[str] = set()
+        self.deleted = 0
+        self.transfer_id: Optional[str] = None
+        self.last_push: Optional[float] = None
+        self.full_pending = False
+        self.inotify: Optional[Inotify] = None
+        self.notifier: Optional[QSocketNotifier] = None
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(int(debounce * 1000))
+        self.debounce_timer.timeout.connect(self.flush)
+
+        self.full_timer = QTimer(self)
+        self.full_timer.setInterval(full_interval * 1000)
+        self.full_timer.timeout.connect(self.full_run)
+
+    @property
+    def name(self) -> str:
+        return f"{self.source} → {self.dest}"
+
+    @property
+    def busy(self) -> bool:
+        transfer = self.rclone.transfers.get(self.transfer_id)
+        return bool(transfer) and transfer['status'] in ACTIVE_STATES
+
+    def start(self):
+        """Start watching; the first full run brings the destination up to date"""
+        self.inotify = Inotify()
+        self._watch_tree(self.source)
+        self.notifier = QSocketNotifier(self.inotify.fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self._on_events)
+        self.full_timer.start()
+        self.full_run()
+
+    def stop(self):
+        self.debounce_timer.stop()
+        self.full_timer.stop()
+        if self.notifier:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+    def _watch_tree(self, top: str, new: bool = False):
+        """Watch ``top`` and every directory below it, walking the tree in the background.
+
+        Files already inside a ``new`` directory are pushed with the next batch.
+        """
+        inotify = self.inotify
+        self.rclone.runner.run_in_background(
+            walk_tree,
+            lambda result, error: self._on_walked(inotify, top, new, result, error),
+            top
+        )
+
+    def _on_walked(self, inotify: Inotify, top: str, new: bool, result, error):
+        if inotify is not self.inotify:
+            return  # Stopped meanwhile
+        if error:
+            print(f"Watch {self.name}: cannot list {top}: {error}")
+            return
+        directories, files = result
+        for directory in directories:
+            try:
+                inotify.add_watch(directory)
+            except OSError as e:
+                print(f"Watch: {e}")
+        if new and files:
+            self.changed.update(self._relative(path) for path in files)
+            self.debounce_timer.start()
+            self.state_changed.emit()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.source)
+
+    def _on_events(self):
+        if not self.inotify:
+            return
+        for directory, name, mask in self.inotify.read_events():
+            path = os.path.join(directory, name)
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; only a full run is safe now
+                print(f"Watch {self.name}: inotify queue overflowed, scheduling full run")
+                self.full_pending = True
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # New directories may already contain files by the time they are watched
+                self._watch_tree(path, new=True)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and not mask & IN_ISDIR:
+                self.changed.add(self._relative(path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.deleted += 1
+        if self.changed or self.full_pending:
+            self.debounce_timer.start()
+            self.state_changed.emit()
+
+    def flush(self):
+        """Push the batch of changed files"""
+        if self.busy:
+            # Never overlap pushes; try again once the current one has had time to finish
+            self.debounce_timer.start()
+            return
+        if self.full_pending:
+            self.full_run()
+            return
+        if not self.changed:
+            return
+
+        batch = sorted(self.changed)
+        self.changed.clear()
+        transfer_id = self.rclone.new_transfer_id('copy')
+        files_path = self.rclone.journal.files_path(transfer_id)
+        self.rclone.journal.write_file_list(files_path, batch)
+        flags = self.flags + ['--files-from', str(files_path), '--no-traverse']
+        try:
+            self.rclone.start_transfer('copy', self.source, self.dest, flags,
+                                       transfer_id=transfer_id, watch=self.name)
+            self.transfer_id = transfer_id
+            self.last_push = time.time()
+        except Exception as e:
+            print(f"Watch {self.name}: failed to push changes: {e}")
+            self.changed.update(batch)
+        self.state_changed.emit()
+
+    def full_run(self):
+        """Run a complete copy (or sync) of the tree"""
+        if self.busy:
+            self.full_pending = True
+            self.debounce_timer.start()
+            return
+        self.full_pending = False
+        # Everything changed so far is covered by the full run
+        self.changed.clear()
+        self.deleted = 0
+        try:
+            self.transfer_id = self.rclone.start_transfer(self.full_mode, self.source, self.dest,
+                                                          self.flags, watch=self.name)
+            self.last_push = time.time()
+        except Exception as e:
+            print(f"Watch {self.name}: full {self.full_mode} failed to start: {e}")
+        self.state_changed.emit()
+
+class WatchManager(QObject):
+    """Owns the watch jobs and keeps their definitions on disk"""
+    watches_changed = pyqtSignal()
+
+    def __init__(self, rclone_manager, path: Path, debounce: float = 1.0,
+                 full_interval: int = 3600):
+        super().__init__()
+        self.rclone = rclone_manager
+        self.path = Path(path)
+        self.debounce = debounce
+        self.full_interval = full_interval
+        self.definitions: Dict[str, Dict[str, Any]] = self._load()
+        self.jobs: Dict[str, WatchJob] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading watches {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self.definitions)
+        except OSError as e:
+            print(f"Error writing watches {self.path}: {e}")
+
+    def start(self):
+        """Start every saved watch"""
+        for watch_id, definition in self.definitions.items():
+            try:
+                self._start(watch_id, definition)
+            except OSError as e:
+                print(f"Could not start watch on {definition['source']}: {e}")
+
+    def _start(self, watch_id: str, definition: Dict[str, Any]) -> WatchJob:
+        job = WatchJob(self.rclone, watch_id, definition['source'], definition['dest'],
+                       definition.get('flags'), definition.get('full_mode', 'copy'),
+                       self.debounce, self.full_interval)
+        job.start()
+        job.state_changed.connect(self.watches_changed)
+        self.jobs[watch_id] = job
+        return job
+
+    def add(self, source: str, dest: str, flags: Optional[List[str]] = None,
+            full_mode: str = 'copy') -> str:
+        """Start watching ``source``; raises OSError if it cannot be watched"""
+        if not os.path.isdir(os.path.expanduser(source)):
+            raise OSError(f"{source} is not a local directory")
+        watch_id = uuid.uuid4().hex[:8]
+        definition = {'source': source, 'dest': dest, 'flags': list(flags or []),
+                      'full_mode': full_mode}
+        self._start(watch_id, definition)
+        self.definitions[watch_id] = definition
+        self._save()
+        self.watches_changed.emit()
+        return watch_id
+
+    def remove(self, watch_id: str):
+        job = self.jobs.pop(watch_id, None)
+        if job:
+            job.stop()
+        if self.definitions.pop(watch_id, None) is not None:
+            self._save()
+        self.watches_changed.emit()
+
+    def stop(self):
+        """Stop all watches, keeping their definitions"""
+        for job in self.jobs.values():
+            job.stop()
+        self.jobs.clear()